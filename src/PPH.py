@@ -1,8 +1,12 @@
+import argparse
 import pandas as pd
 import math
 import os
 
-from src.utils.data_loader import load_data
+from src.utils.data_loader import load_log_monitor
+from utils.event_store import select_store_window_cli
+from utils.message_codecs import decode_messages
+from utils.message_parser import constant_columns
 from utils.time_frame import select_window_cli
 
 # Global Constants
@@ -18,69 +22,69 @@ SEMI = {"IU001", "IU002", "IU003", "IU004"}
 AUTO = {"IU005", "IU006", "IU007"}
 SPS_NAMES = {"SPS001", "SPS002"}
 
-raw_df = load_data()
-
-# Parsing raw data
-temp_df = raw_df.replace('"', '',regex=True)        # Remove all double quotes
-temp_df = temp_df.replace(r"\s+", '',regex=True)    # Remove all whitespace
-
-temp_df.columns = [
-    "timeStamp", "flag", "systemName", "ipAddress", "sender", "unkown",
-    "unkown_2", "timeStampPLC", "mainCabinetName", "messageCode", "sequenceNo",
-    "rawMessage"
-]
+# Header fields and message keys the rate analysis uses or exports, other keys
+# (e.g. destinationNo, comHost, telegramType) are never parsed
+PPH_FIELDS = ['timeStamp', 'sender', 'timeStampPLC', 'messageCode', 'sequenceNo', 'event', 'awcsAction',
+              'plcRecordNo', 'itemID', 'indexNo', 'awcsStateNow', 'awcsStateNew', 'inductionStatus',
+              'inductionNo', 'carrierNo', 'carrierCount']
+
+parser = argparse.ArgumentParser(description="Induction rate (PPH) analysis")
+parser.add_argument("--store", metavar="SITE",
+                    help="read the time window from the event store of SITE (filled by scan.py --ingest)")
+args = parser.parse_args()
+
+if args.store:
+    # Telegrams already decoded when the export was ingested, only the window is read
+    print("Select time window for analysis:")
+    stored_df, start_ts, end_ts = select_store_window_cli(args.store, MESSAGE_CODE_FILTER, TIME_WINDOW)
+    raw_df = None  # The raw export lines are not kept in the store
+    parsed_df = stored_df[PPH_FIELDS].copy()
+else:
+    raw_df = load_log_monitor(message_codes=[MESSAGE_CODE_FILTER])
 
-# timeStamp parsing
-temp_df["timeStamp"] = pd.to_datetime(temp_df["timeStamp"], format="%y%m%d%H%M%S%f", errors="coerce")
+    # Parsing raw data
+    temp_df = raw_df.copy()  # Quotes and whitespace already stripped by the loader
 
-# Droping records that are not "54123" (Items Inducted) in messageCode column
-original_records = len(temp_df)
-temp_df = temp_df[temp_df["messageCode"] == MESSAGE_CODE_FILTER]
-remaining_records = len(temp_df)
-dropped_count = original_records - remaining_records
-print(f"Filtered dataset: kept {remaining_records} rows with messageCode = {MESSAGE_CODE_FILTER} "
-      f"\n\tdropped {dropped_count} out of {original_records} total rows")
+    # Droping records that are not "54123" (Items Inducted) in messageCode column
+    original_records = len(temp_df)
+    temp_df = temp_df[temp_df["messageCode"] == MESSAGE_CODE_FILTER]
+    remaining_records = len(temp_df)
+    dropped_count = original_records - remaining_records
+    print(f"Filtered dataset: kept {remaining_records} rows with messageCode = {MESSAGE_CODE_FILTER} "
+          f"\n\tdropped {dropped_count} out of {original_records} total rows")
 
-# Message Column parsing
-temp_df["rawMessage"] = temp_df["rawMessage"].str.removeprefix("->{").str.removesuffix("}<")
-message_df = temp_df["rawMessage"].str.split(",", expand=True)          # Split into columns
-col_names = message_df.iloc[0].str.split(":", n=1).str[0].str.strip()   # Extract keys (before ':') from the first row as column names
-message_df.columns = col_names                                          # Assign new column names
-message_df = message_df.apply(lambda x: x.str.split(":", n=1).str[1])   # Keep only values (after ':')
+    # Message Column parsing (timeStamp is parsed too)
+    parsed_df = decode_messages(temp_df, MESSAGE_CODE_FILTER, PPH_FIELDS)
 
 # Induction Mapping
 induction_map = {
-    "0": "IU001",
-    "1": "IU002",
-    "2": "IU003",
-    "3": "IU004",
-    "4": "IU005",
-    "5": "IU006",
-    "6": "IU007",
-    "100": "SPS001",
-    "101": "SPS002",
+    0: "IU001",
+    1: "IU002",
+    2: "IU003",
+    3: "IU004",
+    4: "IU005",
+    5: "IU006",
+    6: "IU007",
+    100: "SPS001",
+    101: "SPS002",
     }
 
 # Map InductionNo with the real world names (unknowns -> "No Map Yet")
-message_df["inductionNo"] = message_df["inductionNo"].map(induction_map).fillna("No Map Yet")
-
-# Join dataframes
-parsed_df = pd.concat([temp_df.drop(columns=["rawMessage"]), message_df], axis=1)
+parsed_df["inductionNo"] = parsed_df["inductionNo"].map(induction_map).fillna("No Map Yet")
 
 # Cleaning DataFrame
-# Get list of columns with only 1 unique value, but preserve "inductionNo"
-cols_to_drop = parsed_df.columns[parsed_df.nunique() == 1].tolist()
-if "inductionNo" in cols_to_drop:
-    cols_to_drop.remove("inductionNo")
-# Usual Columns Dropped
-# ['flag', 'systemName', 'ipAddress', 'unkown', 'unkown_2', 'machineCode', 'destinationNo', 'comHost', 'comMode', 'telegramType']    
+# Get list of columns with only 1 unique value (checked on a sample first), but preserve "inductionNo"
+cols_to_drop = constant_columns(parsed_df, keep=["inductionNo"])
 
 clean_df = parsed_df.drop(columns=cols_to_drop)
 # Usual Columns Remaining
 # ['timeStamp', 'sender', 'timeStampPLC', 'messageCode', 'sequenceNo', 'event', 'awcsAction', 'plcRecordNo', 'itemID', 'indexNo', 'awcsStateNow', 'awcsStateNew', 'inductionStatus', 'inductionNo', 'carrierNo', 'carrierCount']
 
-# Rate Analysis
-window_df, start_ts, end_ts = select_window_cli(clean_df, TIME_WINDOW)
+# Rate Analysis (a store window is already selected)
+if args.store:
+    window_df = clean_df
+else:
+    window_df, start_ts, end_ts = select_window_cli(clean_df, TIME_WINDOW)
 
 # Drop "SPS001, SPS002" inductions if any
 # This is because we do not have a target PPH for them and its part of another process
@@ -219,7 +223,8 @@ else:
 
         with pd.ExcelWriter(file_path, engine="xlsxwriter") as writer:
             rate_analysis_df.to_excel(writer, sheet_name="rate_analysis", index=False)
-            raw_df.to_excel(writer, sheet_name="raw_data", index=False)
+            if raw_df is not None:
+                raw_df.to_excel(writer, sheet_name="raw_data", index=False)
             clean_df.to_excel(writer, sheet_name="clean_data", index=False)
             window_df.to_excel(writer, sheet_name="window_data", index=False)
 
@@ -1,142 +1,93 @@
+import argparse
 import os
 
 import pandas as pd
 
-from src.utils.data_loader import load_data
+from src.utils.data_loader import load_log_monitor
+from utils.event_store import select_store_window_cli
+from utils.message_codecs import SORTER_DTYPES, decode_messages
+from utils.message_parser import constant_columns
+from utils.ragged import RaggedArray
+from utils.schema import cast_fields
 from utils.time_frame import select_window_cli
 
 # Global Constants
 WINDOW_TIME = 30  # minutes
 MESSAGE_CODE_FILTER = "54163"  # Items Inducted
-
-print("Select a S02 data file (CSV format) from Log Monitor...")
-raw_df = load_data()
-# Parsing raw data
-temp_df = raw_df.replace('"', "", regex=True)  # Remove all double quotes
-temp_df = temp_df.replace(r"\s+", "", regex=True)  # Remove all whitespace
-
-temp_df.columns = [
+# Header fields and message keys the S02 analysis uses or exports, other keys
+# (e.g. comHost, telegramType) are never parsed
+S02_FIELDS = [
     "timeStamp",
-    "flag",
-    "systemName",
-    "ipAddress",
-    "sender",
-    "unkown",
-    "unkown_2",
     "timeStampPLC",
-    "mainCabinetName",
-    "messageCode",
     "sequenceNo",
-    "rawMessage",
+    "plcRecordNo",
+    "itemID",
+    "indexNo",
+    "locationAWCS",
+    "barcodeAWCS",
+    "actualDestMCID",
+    "requestedDestMCID",
+    "sortCode",
 ]
 
-# timeStamp parsing
-temp_df["timeStamp"] = pd.to_datetime(
-    temp_df["timeStamp"], format="%y%m%d%H%M%S%f", errors="coerce"
+parser = argparse.ArgumentParser(description="S02 analysis")
+parser.add_argument(
+    "--store",
+    metavar="SITE",
+    help="read the time window from the event store of SITE (filled by scan.py --ingest)",
 )
+args = parser.parse_args()
 
-# Droping records that are not "54163" (S02) in messageCode column
-original_records = len(temp_df)
-temp_df = temp_df[temp_df["messageCode"] == MESSAGE_CODE_FILTER]
-remaining_records = len(temp_df)
-dropped_count = original_records - remaining_records
-print(
-    f"Filtered dataset: kept {remaining_records} rows with messageCode = {MESSAGE_CODE_FILTER} "
-    f"\n\tdropped {dropped_count} out of {original_records} total rows"
-)
+if args.store:
+    # Telegrams already decoded when the export was ingested, only the window is read
+    print("Select time window for analysis:")
+    stored_df, start_ts, end_ts = select_store_window_cli(
+        args.store, MESSAGE_CODE_FILTER, WINDOW_TIME
+    )
+    raw_df = None  # The raw export lines are not kept in the store
+    parsed_df = stored_df[S02_FIELDS].copy()
+else:
+    print("Select a S02 data file (CSV format) from Log Monitor...")
+    raw_df = load_log_monitor(message_codes=[MESSAGE_CODE_FILTER])
+    # Parsing raw data
+    temp_df = raw_df.copy()  # Quotes and whitespace already stripped by the loader
+
+    # Droping records that are not "54163" (S02) in messageCode column
+    original_records = len(temp_df)
+    temp_df = temp_df[temp_df["messageCode"] == MESSAGE_CODE_FILTER]
+    remaining_records = len(temp_df)
+    dropped_count = original_records - remaining_records
+    print(
+        f"Filtered dataset: kept {remaining_records} rows with messageCode = {MESSAGE_CODE_FILTER} "
+        f"\n\tdropped {dropped_count} out of {original_records} total rows"
+    )
 
+    # Message Column parsing (timeStamp is parsed too)
+    parsed_df = decode_messages(temp_df, MESSAGE_CODE_FILTER, S02_FIELDS)
 
-# Helper functions to handle arrays inside values
-def split_key_values(text):
-    """Split key:value pairs by commas, ignoring commas inside [brackets]."""
-    parts = []  # Final list of key:value strings
-    buf = ""  # Temporary buffer to collect characters
-    inside_brackets = 0  # Counter to track nesting depth of [ ]
-
-    for ch in text:
-        if ch == "[":
-            inside_brackets += 1  # Entering a bracket → increase depth
-        elif ch == "]":
-            inside_brackets -= 1  # Leaving a bracket → decrease depth
-
-        # Split only on commas that are *outside* brackets
-        if ch == "," and inside_brackets == 0:
-            parts.append(buf.strip())  # Save the current piece
-            buf = ""  # Reset buffer for next piece
-        else:
-            buf += ch  # Keep building the current piece
-
-    # Append the last piece (after the loop ends)
-    if buf:
-        parts.append(buf.strip())
-
-    return parts
-
-
-def parse_row(text):
-    """Convert a rawMessage string into a dictionary of key:value pairs."""
-    key_value_strings = split_key_values(
-        text
-    )  # Split into ["key1:value1", "key2:value2", ...]
-    parsed_dict = {}  # Dictionary to hold final result
-
-    for pair in key_value_strings:
-        if ":" in pair:  # Only process well-formed pairs
-            key, value = pair.split(
-                ":", 1
-            )  # Split into key and value (only on the first colon)
-            parsed_dict[key.strip()] = value.strip()  # Clean whitespace and store
-
-    return parsed_dict
-
-
-def first_element(val):
-    """Extract the first element from a string representation of a list."""
-    if isinstance(val, str) and val.startswith("[") and val.endswith("]"):
-        raw_elements = val.strip("[]").split(",")  # Break into parts
-        parts = []
-        for element in raw_elements:
-            parts.append(element.strip())  # Clean whitespace and collect
-        return parts[0] if parts else val  # Return first element if available
-    return val
-
-
-# Message Column parsing
-temp_df["rawMessage"] = (
-    temp_df["rawMessage"].str.removeprefix("->{").str.removesuffix("}<")
-)
-# Expand rawMessage into columns
-# Keeping in mind that some values are lists enclosed in [ ]
-message_df = temp_df["rawMessage"].apply(parse_row).apply(pd.Series)
-# Extract first element from list-like values
-special_columns = ["requestedDestMCID", "sortCode", "requestedDestStatus"]
-for col in special_columns:
-    message_df[col] = message_df[col].apply(first_element)
-
-# Convert sortCode to integer (nullable type)
-message_df["sortCode"] = pd.to_numeric(message_df["sortCode"], errors="coerce").astype(
-    "Int64"
-)
+# requestedDestMCID and sortCode are arrays, keep the first attempt only
+for col in ["requestedDestMCID", "sortCode"]:
+    parsed_df[col] = RaggedArray.from_series(parsed_df[col]).primary()
 
-# Join parsed message columns with the base dataframe
-parsed_df = pd.concat([temp_df.drop(columns=["rawMessage"]), message_df], axis=1)
+# Declared dtypes of the first attempt (nullable Int32 / Int16)
+cast_fields(
+    parsed_df, {col: SORTER_DTYPES[col] for col in ["requestedDestMCID", "sortCode"]}
+)
 
 # Cleaning DataFrame
-# Get list of columns with only 1 unique value, but preserve "sortCode", "indexNo" and "timeStamp"
-cols_to_drop = parsed_df.columns[parsed_df.nunique() == 1].tolist()
-for col in ["indexNo", "timeStamp"]:  # don’t drop sortCode or indexNo
-    if col in cols_to_drop:
-        cols_to_drop.remove(col)
-# Usual Columns Dropped
-# ['flag', 'systemName', 'ipAddress', 'sender', 'unkown', 'unkown_2', 'machineCode', 'unitID', 'event', 'requestedDestStatus', 'comHost', 'comMode', 'telegramType']
+# Get list of columns with only 1 unique value (checked on a sample first), but preserve "indexNo" and "timeStamp"
+cols_to_drop = constant_columns(parsed_df, keep=["indexNo", "timeStamp"])
 
 clean_df = parsed_df.drop(columns=cols_to_drop)
 # Usual Columns Remaining
 # ['timeStamp', 'PLCTimeStamp', 'sequenceNo', 'plcRecordNo', 'itemID', 'indexNo', 'locationAWCS', 'barcodeAWCS', 'actualDestMCID', 'requestedDestMCID', 'sortCode']
 
-# S02 Analysis
-print("Select time window for analysis:")
-window_df, start_ts, end_ts = select_window_cli(clean_df, WINDOW_TIME)
+# S02 Analysis (a store window is already selected)
+if args.store:
+    window_df = clean_df
+else:
+    print("Select time window for analysis:")
+    window_df, start_ts, end_ts = select_window_cli(clean_df, WINDOW_TIME)
 
 window_df_unique = window_df.drop_duplicates(subset=["barcodeAWCS"], keep="first")
 
@@ -225,7 +176,8 @@ with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
     ws.insert_chart("D7", chart_bar, {"x_scale": 3, "y_scale": 3})
 
     # Other Sheets
-    raw_df.to_excel(writer, sheet_name="Raw_Data", index=False)
+    if raw_df is not None:
+        raw_df.to_excel(writer, sheet_name="Raw_Data", index=False)
     clean_df.to_excel(writer, sheet_name="Clean_Data", index=False)
     window_df_unique.to_excel(writer, sheet_name="Window_Data", index=False)
 
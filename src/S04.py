@@ -1,41 +1,22 @@
-import ast
 import os
 
 import pandas as pd
 
 # Global Constants
 from config import DEFECT_CATEGORY_MAP, S04_MESSAGE_CODE, SORT_CODE_MAP, WINDOW_TIME
-from src.utils.data_loader import load_data
+from src.utils.data_loader import load_data, load_log_monitor
+from utils.message_codecs import decode_messages, explode_attempts
+from utils.message_parser import constant_columns
 from utils.time_frame import select_window_cli
+from utils.timestamps import clock_skew
 
 print("Select a S04 data file (CSV format) from Log Monitor...")
-raw_df = load_data()
+raw_df = load_log_monitor(message_codes=[S04_MESSAGE_CODE])
 
 print(f"Loading data successful, dataframe shape: {raw_df.shape}")
 print("Parsing data...")
 # Parsing raw data
-temp_df = raw_df.replace('"', "", regex=True)  # Remove all double quotes
-temp_df = temp_df.replace(r"\s+", "", regex=True)  # Remove all whitespace
-
-temp_df.columns = [
-    "timeStamp",
-    "flag",
-    "systemName",
-    "ipAddress",
-    "sender",
-    "unkown",
-    "unkown_2",
-    "timeStampPLC",
-    "mainCabinetName",
-    "messageCode",
-    "sequenceNo",
-    "rawMessage",
-]
-
-# timeStamp parsing
-temp_df["timeStamp"] = pd.to_datetime(
-    temp_df["timeStamp"], format="%y%m%d%H%M%S%f", errors="coerce"
-)
+temp_df = raw_df.copy()  # Quotes and whitespace already stripped by the loader
 
 # Droping records that are not "54177" (S04) in messageCode column
 original_records = len(temp_df)
@@ -48,104 +29,18 @@ print(
 )
 
 
-# Helper functions to handle arrays inside values
-def split_key_values(text):
-    """Split key:value pairs by commas, ignoring commas inside [brackets]."""
-    parts = []  # Final list of key:value strings
-    buf = ""  # Temporary buffer to collect characters
-    inside_brackets = 0  # Counter to track nesting depth of [ ]
-
-    for ch in text:
-        if ch == "[":
-            inside_brackets += 1  # Entering a bracket → increase depth
-        elif ch == "]":
-            inside_brackets -= 1  # Leaving a bracket → decrease depth
-
-        # Split only on commas that are *outside* brackets
-        if ch == "," and inside_brackets == 0:
-            parts.append(buf.strip())  # Save the current piece
-            buf = ""  # Reset buffer for next piece
-        else:
-            buf += ch  # Keep building the current piece
-
-    # Append the last piece (after the loop ends)
-    if buf:
-        parts.append(buf.strip())
-
-    return parts
-
-
-def parse_row(text):
-    """Convert a rawMessage string into a dictionary of key:value pairs."""
-    key_value_strings = split_key_values(
-        text
-    )  # Split into ["key1:value1", "key2:value2", ...]
-    parsed_dict = {}  # Dictionary to hold final result
-
-    for pair in key_value_strings:
-        if ":" in pair:  # Only process well-formed pairs
-            key, value = pair.split(
-                ":", 1
-            )  # Split into key and value (only on the first colon)
-            parsed_dict[key.strip()] = value.strip()  # Clean whitespace and store
-
-    return parsed_dict
-
-
-def parse_list(val):
-    """Convert a string representation of a list into an actual Python list."""
-    if isinstance(val, str) and val.startswith("[") and val.endswith("]"):
-        try:
-            return ast.literal_eval(val)  # Safely evaluate the string to a Python list
-        except (ValueError, SyntaxError):
-            return []  # Return empty list on error
-    return [val]  # Fallback: wrap non-list in a list
-
-
-# Message Column parsing
-temp_df["rawMessage"] = (
-    temp_df["rawMessage"].str.removeprefix("->{").str.removesuffix("}<")
-)
-# Expand rawMessage into columns
-# Keeping in mind that some values are lists enclosed in [ ]
-message_df = temp_df["rawMessage"].apply(parse_row).apply(pd.Series)
-# Extract first element from list-like values
-columns_with_arrays = ["requestedDestMCID", "sortCode", "requestedDestStatus"]
-for col in columns_with_arrays:
-    message_df[col] = message_df[col].apply(parse_list)
-
-# Join parsed message columns with the base dataframe
-parsed_df = pd.concat([temp_df.drop(columns=["rawMessage"]), message_df], axis=1)
-
-
-def normalize_lists(row, target_cols):
-    max_len = max(len(row[c]) if isinstance(row[c], list) else 0 for c in target_cols)
-    for c in target_cols:
-        if not isinstance(row[c], list):
-            row[c] = [row[c]]
-        if len(row[c]) < max_len:
-            filler = -1 if c != "requestedDestStatus" else "Unused"
-            row[c] = row[c] + [filler] * (max_len - len(row[c]))
-    return row
-
-
-parsed_df = parsed_df.apply(normalize_lists, axis=1, target_cols=columns_with_arrays)
-parsed_df = parsed_df.explode(column=columns_with_arrays, ignore_index=True)  # type: ignore[arg-type]
-
-# Drop rows that contain -1 in of the exploded columns
-parsed_df = parsed_df[~parsed_df[columns_with_arrays].isin([-1]).any(axis=1)]
+# Message Column parsing (timeStamp included), array fields come back ragged
+parsed_df = decode_messages(temp_df, S04_MESSAGE_CODE)
+# PLC clock offset per cabinet, measured once per telegram
+skew_df = clock_skew(parsed_df)
+# One row per sort attempt, rows padded with -1 are dropped
+parsed_df = explode_attempts(parsed_df)
 
 # Cleaning DataFrame
-# Get list of columns with only 1 unique value, but preserve "sortCode", "indexNo" and "timeStamp"
-cols_to_drop = parsed_df.columns[parsed_df.nunique() == 1].tolist()
-for col in [
-    "sortCode",
-    "indexNo",
-    "timeStamp",
-    "barcodeAWCS",
-]:  # don’t drop sortCode or indexNo
-    if col in cols_to_drop:
-        cols_to_drop.remove(col)
+# Drop columns with only 1 unique value, but preserve "sortCode", "indexNo" and "timeStamp"
+cols_to_drop = constant_columns(
+    parsed_df, keep=["sortCode", "indexNo", "timeStamp", "barcodeAWCS"]
+)
 # Usual Columns Dropped
 # ['flag', 'systemName', 'ipAddress', 'sender', 'unkown', 'unkown_2', 'machineCode', 'unitID', 'event', 'requestedDestStatus', 'comHost', 'comMode', 'telegramType']
 
@@ -178,11 +73,11 @@ else:
         id_col = bad_ids_df.columns[0]
         comment_col = bad_ids_df.columns[1]
 
-        # Build {indexNo -> comment} with 4-digit padding
+        # Build {indexNo -> comment}
         id_comment_dict = {}
         for _, row in bad_ids_df.iterrows():
             if pd.notna(row[id_col]):
-                key = str(int(row[id_col])).zfill(4)
+                key = int(row[id_col])
                 comment = row[comment_col] if pd.notna(row[comment_col]) else ""
                 id_comment_dict[key] = comment
 
@@ -191,6 +86,8 @@ else:
         # Ensure explanation column exists
         if "No Scan Defect Explanation" not in window_df.columns:
             window_df["No Scan Defect Explanation"] = ""
+        # The window shares its columns with clean_df, copy before editing cells
+        window_df["sortCode"] = window_df["sortCode"].copy()
 
         # Restrict to scan-defect rows
         scan_defects = window_df[window_df["sortCode"].isin([8, 9, 10])]
@@ -202,11 +99,11 @@ else:
         for bad_id, comment in zip(bad_ids_df[id_col], bad_ids_df[comment_col]):
             if pd.isna(bad_id):
                 continue
-            padded_id = str(int(bad_id)).zfill(4)
+            index_no = int(bad_id)
 
             # Candidate rows not already used
             candidates = scan_defects.index[
-                (scan_defects["indexNo"] == padded_id)
+                (scan_defects["indexNo"] == index_no).fillna(False)
                 & (~scan_defects.index.isin(used_rows))
             ]
 
@@ -218,14 +115,14 @@ else:
                 )
                 used_rows.add(row_idx)
 
-                matched_ids.append(padded_id)
+                matched_ids.append(index_no)
                 modified_count += 1
 
         # IDs from user list that didn’t get applied
         not_found = [
-            str(int(x)).zfill(4)
+            int(x)
             for x in bad_ids_df[id_col]
-            if pd.notna(x) and str(int(x)).zfill(4) not in matched_ids
+            if pd.notna(x) and int(x) not in matched_ids
         ]
 
         print(
@@ -346,6 +243,9 @@ print("How many barcodes appear more than once:", (counts > 1).sum())
 print("Max occurrences for a single barcode:", counts.max())
 print("Min occurrences for a single barcode:", counts.min())
 
+print("\nPLC clock skew (timeStampPLC - timeStamp) per cabinet:")
+print(skew_df.to_string(index=False))
+
 # Count defects only (exclude NaN)
 defect_summary = (
     window_df["defectCategory"]
@@ -531,5 +431,9 @@ with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
     clean_df.to_excel(writer, sheet_name="Clean_Data", index=False)
     window_df.to_excel(writer, sheet_name="Window_Data", index=False)
     export_df.to_excel(writer, sheet_name="Scan_Defects", index=False)
+    # Offsets in seconds, Excel has no duration type
+    skew_df.assign(
+        **{col: skew_df[col].dt.total_seconds() for col in ["median", "min", "max"]}
+    ).to_excel(writer, sheet_name="Clock_Skew", index=False)
 
 print(f"Analysis results saved to: {output_path}")
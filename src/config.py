@@ -4,7 +4,9 @@ WINDOW_TIME = 30  # minutes
 PPH_MESSAGE_CODE = "54123"
 S01_OH_MESSAGE_CODE = "54113"
 S01_MESSAGE_CODE = "54158"
+S02_MESSAGE_CODE = "54163"
 S04_MESSAGE_CODE = "54177"
+MEASUREMENT_MESSAGE_CODES = ["50102", "50103"]  # Item measurements (S02/S03)
 
 # Dictionary for mapping sort codes
 SORT_CODE_MAP = {
@@ -1,6 +1,8 @@
-import ast
+import argparse
 import os
+from typing import NamedTuple, Optional
 
+import numpy as np
 import pandas as pd
 
 # Global Constants
@@ -10,29 +12,54 @@ from config import (
     SORT_CODE_MAP,
     WINDOW_TIME,
 )
-from utils.data_loader import load_data
-from utils.time_frame import select_window_cli
+from utils.cache import cache_key, load_cached, purge_cache, save_cached
+from utils.data_loader import (
+    CHUNK_SIZE_BYTES,
+    LOG_MONITOR_COLUMNS,
+    iter_log_lines,
+    line_ranges,
+    load_data,
+    load_log_monitor,
+    parse_log_lines,
+    read_log_lines,
+    select_file,
+    select_files,
+)
+from utils.destination_mapping import (
+    DestinationMapping,
+    load_site_mapping,
+    mapping_positions,
+)
+from utils.event_store import (
+    concat_events,
+    ingest_log_monitor,
+    select_store_window_cli,
+)
+from utils.merge import iter_merged_log_lines
+from utils.message_codecs import (
+    SORTER_ARRAYS,
+    attempt_slots,
+    decode_messages,
+    explode_attempts,
+)
+from utils.parallel import map_processes, map_shards, shard_bounds
+from utils.ragged import RaggedArray
+from utils.schema import map_categorical
+from utils.sessions import (
+    PACKAGE_GAP_SEC,
+    empty_checkpoint,
+    load_checkpoint,
+    save_checkpoint,
+    sessionize,
+)
+from utils.spill import plan_batches, read_bucket, spill_area, spill_frame
+from utils.time_frame import mark_time_order, prompt_window, select_window_cli
 
 
 def format_data(df: pd.DataFrame) -> pd.DataFrame:
+    # Quotes and whitespace are already stripped by load_log_monitor
     df = df.copy()
-    df = df.replace('"', "", regex=True)  # Remove all double quotes
-    df = df.replace(r"\s+", "", regex=True)  # Remove all whitespace
-
-    df.columns = [
-        "timeStamp",
-        "flag",
-        "systemName",
-        "ipAddress",
-        "sender",
-        "unkown",
-        "unkown_2",
-        "timeStampPLC",
-        "mainCabinetName",
-        "messageCode",
-        "sequenceNo",
-        "rawMessage",
-    ]
+    df.columns = LOG_MONITOR_COLUMNS
 
     # Droping records that are not "54177" (S04) in messageCode column
     original_records = len(df)
@@ -48,129 +75,44 @@ def format_data(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def parse_data(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
-    df = df.copy()
-    # timeStamp parsing
-    df["timeStamp"] = pd.to_datetime(
-        df["timeStamp"], format="%y%m%d%H%M%S%f", errors="coerce"
-    )
-
-    # Helper functions to handle arrays inside values
-    def split_key_values(text: str) -> list[str]:
-        """Split key:value pairs by commas, ignoring commas inside [brackets]."""
-        parts: list[str] = []  # Final list of key:value strings
-        buf = ""  # Temporary buffer to collect characters
-        inside_brackets = 0  # Counter to track nesting depth of [ ]
-
-        for ch in text:
-            if ch == "[":
-                inside_brackets += 1  # Entering a bracket → increase depth
-            elif ch == "]":
-                inside_brackets -= 1  # Leaving a bracket → decrease depth
-
-            # Split only on commas that are *outside* brackets
-            if ch == "," and inside_brackets == 0:
-                parts.append(buf.strip())  # Save the current piece
-                buf = ""  # Reset buffer for next piece
-            else:
-                buf += ch  # Keep building the current piece
-
-        # Append the last piece (after the loop ends)
-        if buf:
-            parts.append(buf.strip())
-
-        return parts
-
-    def parse_row(text: str) -> dict[str, str]:
-        """Convert a rawMessage string into a dictionary of key:value pairs."""
-        key_value_strings = split_key_values(
-            text
-        )  # Split into ["key1:value1", "key2:value2", ...]
-        parsed_dict: dict[str, str] = {}  # Dictionary to hold final result
-
-        for pair in key_value_strings:
-            if ":" in pair:  # Only process well-formed pairs
-                key, value = pair.split(
-                    ":", 1
-                )  # Split into key and value (only on the first colon)
-                parsed_dict[key.strip()] = value.strip()  # Clean whitespace and store
-
-        return parsed_dict
-
-    def parse_list(val):
-        """Convert a string representation of a list into an actual Python list."""
-        if isinstance(val, str) and val.startswith("[") and val.endswith("]"):
-            try:
-                return ast.literal_eval(
-                    val
-                )  # Safely evaluate the string to a Python list
-            except (ValueError, SyntaxError):
-                return []  # Return empty list on error
-        return [val]  # Fallback: wrap non-list in a list
-
-    def normalize_lists(row, target_cols):
-        max_len = max(
-            len(row[c]) if isinstance(row[c], list) else 0 for c in target_cols
-        )
-        for c in target_cols:
-            if not isinstance(row[c], list):
-                row[c] = [row[c]]
-            if len(row[c]) < max_len:
-                filler = -1 if c != "requestedDestStatus" else "Unused"
-                row[c] = row[c] + [filler] * (max_len - len(row[c]))
-        return row
-
-    # Message Column parsing
-    df["rawMessage"] = df["rawMessage"].str.removeprefix("->{").str.removesuffix("}<")
-    # Expand rawMessage into columns
-    # Keeping in mind that some values are lists enclosed in [ ]
-    message_df = df["rawMessage"].apply(parse_row).apply(pd.Series)
-    # Extract first element from list-like values
-    columns_with_arrays = ["requestedDestMCID", "sortCode", "requestedDestStatus"]
-    for col in columns_with_arrays:
-        message_df[col] = message_df[col].apply(parse_list)
-
-    # Join parsed message columns with the base dataframe
-    parsed_df = pd.concat([df.drop(columns=["rawMessage"]), message_df], axis=1)
-    interim_df = parsed_df.copy()
-    parsed_df = parsed_df.apply(
-        normalize_lists, axis=1, target_cols=columns_with_arrays
-    )
-    parsed_df = parsed_df.explode(column=columns_with_arrays, ignore_index=True)  # type: ignore[arg-type]
-
-    # Drop rows that contain -1 in of the exploded columns
-    parsed_df = parsed_df[~parsed_df[columns_with_arrays].isin([-1]).any(axis=1)]
-
-    return parsed_df, interim_df
-
-
-def drop_constant_cols(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Drop columns that have only a single unique value across all rows.
-    """
-
-    # Avoid detecting constant columns dynamically (e.g. df.nunique() == 1)
-    # since some sites may populate certain fields inconsistently.
-    keep_cols = [
-        "timeStamp",
-        "plcRecordNo",
-        "itemID",
-        "indexNo",
-        "locationAWCS",
-        "barcodeAWCS",
-        "actualDestMCID",
-        "requestedDestMCID",
-        "sortCode",
-    ]
-
-    return df[keep_cols].copy()
-
+def parse_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse S04 rows into the interim frame, one row per telegram.
 
-def load_mapping() -> dict:
+    Uses the registered S04 codec, so requestedDestMCID, sortCode and
+    requestedDestStatus come back as ragged columns (offsets + values, see
+    `RaggedArray.to_series`). Use `explode_attempts` for one row per sort
+    attempt.
+    """
+    return decode_messages(df, S04_MESSAGE_CODE, SCAN_FIELDS)
+
+
+# Columns kept for the analysis. Avoid detecting constant columns dynamically
+# (e.g. df.nunique() == 1) since some sites may populate certain fields
+# inconsistently.
+KEEP_COLUMNS = [
+    "timeStamp",
+    "plcRecordNo",
+    "itemID",
+    "indexNo",
+    "locationAWCS",
+    "barcodeAWCS",
+    "actualDestMCID",
+    "requestedDestMCID",
+    "sortCode",
+]
+# Fields parsed from an S04 export, other keys (comHost, telegramType...) are
+# never extracted
+SCAN_FIELDS = KEEP_COLUMNS + ["requestedDestStatus"]
+
+
+def load_mapping() -> Optional[DestinationMapping]:
     """
-    Load and clean the destination mapping file for the specified site.
+    Load the compiled destination mapping for the specified site.
 
     The file name must follow the convention: "<SITE>_Destination_Mapping.xlsx".
+    The cleaned table is cached on disk until the Excel file changes (see
+    `utils.destination_mapping`).
     """
 
     site = input("Enter the site name (e.g., ORF5, SAT9, CNO8): ").strip().upper()
@@ -181,23 +123,7 @@ def load_mapping() -> dict:
     print(f"\nExtracting Mapping Destination Names for {site}...")
 
     try:
-        # Load Excel file
-        df = load_data(mapping_path)
-
-        # Clean strings: remove spaces and quotes if present
-        for col in df.columns:
-            df[col] = df[col].apply(lambda x: str(x).strip() if pd.notnull(x) else x)
-
-        # Build mapping: IndexNo -> {'amazon': ..., 'beumer': ..., 'jackpot': ...}
-        mapping = {
-            int(row["IndexNo"]): {
-                "amazon": row["Amazon"],
-                "beumer": row["Beumer"],
-                "jackpot": row["Jackpot"],
-            }
-            for _, row in df.iterrows()
-        }
-
+        mapping = load_site_mapping(site)
         print(f"Mapping file for {site} loaded successfully.")
         return mapping
 
@@ -206,150 +132,354 @@ def load_mapping() -> dict:
     except Exception as e:
         print(f"Error loading mapping for {site}: {e}")
 
-    return {}
-
+    return None
 
-def enrich_window_df(window_df: pd.DataFrame, mapping: dict) -> pd.DataFrame:
-    """Apply all enrichment mappings to window_df."""
 
-    window_df["sortReason"] = window_df["sortCode"].map(SORT_CODE_MAP)
-    window_df["defectCategory"] = window_df["sortReason"].map(DEFECT_CATEGORY_MAP)
+def enrich_window_df(
+    window_df: pd.DataFrame, mapping: DestinationMapping
+) -> pd.DataFrame:
+    """Apply all enrichment mappings to window_df (as categorical columns)."""
 
-    map_series = window_df["requestedDestMCID"].map(mapping)
-    # Expand mapping into separate columns
-    window_df["Amazon_Destination"] = map_series.apply(
-        lambda x: x["amazon"] if isinstance(x, dict) else None
-    )
-    window_df["Beumer_Destination"] = map_series.apply(
-        lambda x: x["beumer"] if isinstance(x, dict) else None
-    )
-    window_df["Jackpot_Destination"] = map_series.apply(
-        lambda x: x["jackpot"] if isinstance(x, dict) else None
+    window_df["sortReason"] = map_categorical(window_df["sortCode"], SORT_CODE_MAP)
+    window_df["defectCategory"] = map_categorical(
+        window_df["sortReason"], DEFECT_CATEGORY_MAP
     )
 
+    # One take per mapping column, missing where requestedDestMCID is unmapped
+    positions = mapping_positions(mapping, window_df["requestedDestMCID"])
+    found = positions >= 0
+
+    def take(table: np.ndarray) -> pd.Categorical:
+        # Categories come from the small per-IndexNo table, rows only get codes
+        names = pd.Categorical(table)
+        codes = np.where(found, names.codes[np.where(found, positions, 0)], -1)
+        return pd.Categorical.from_codes(codes, names.categories)
+
+    window_df["Amazon_Destination"] = take(mapping.amazon)
+    window_df["Beumer_Destination"] = take(mapping.beumer)
+    window_df["Jackpot_Destination"] = take(mapping.jackpot)
+    window_df["Is_Jackpot"] = found & mapping.is_jackpot[np.where(found, positions, 0)]
+
     return window_df
 
 
-def remove_false_positives(df: pd.DataFrame) -> pd.DataFrame:
+# Columns of the false-positive report
+FALSE_POSITIVE_COLUMNS = ["indexNo", "comment", "status", "row"]
+
+
+def load_false_positive_list() -> Optional[pd.DataFrame]:
+    """Ask for the user's false-positive list, None if none could be loaded."""
     try:
         print(
             "Please select the Excel file containing the list of indexNo values to remove false positives from."
         )
-        bad_ids_df = load_data()
+        return load_data()
     except ValueError as e:
         print(f"Error loading Excel file: {e}")
-        return df
+        return None
 
+
+def match_false_positives(bad_ids_df: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Match the user's false-positive list to scan-defect rows.
+
+    Every entry of the list (first column indexNo, second column comment)
+    consumes the next unused scan-defect row (sortCode 8, 9 or 10) with that
+    indexNo, in row order. Entries and rows are both numbered per indexNo
+    (1st, 2nd, ... occurrence) and joined on (indexNo, occurrence), so
+    repeated IDs in the list match repeated defects one to one. Only the
+    scan-defect rows of `df` matter, so it can hold just those.
+
+    Returns:
+        pd.DataFrame: One row per list entry: indexNo, comment, status
+        ("modified" or "not_applied") and the label of the matched row.
+    """
     # First two columns: ID and Comment
     id_col = bad_ids_df.columns[0]
     comment_col = bad_ids_df.columns[1]
 
-    # Build {indexNo -> comment} with 4-digit padding
-    id_comment_dict = {}
-    for _, row in bad_ids_df.iterrows():
-        if pd.notna(row[id_col]):
-            key = str(int(row[id_col])).zfill(4)
-            comment = row[comment_col] if pd.notna(row[comment_col]) else ""
-            id_comment_dict[key] = comment
+    # List entries, numbered per ID
+    entries = bad_ids_df[bad_ids_df[id_col].notna()]
+    entries = pd.DataFrame(
+        {
+            "indexNo": entries[id_col].map(lambda x: int(x)).astype(np.int64),
+            "comment": entries[comment_col].fillna(""),
+        }
+    ).reset_index(drop=True)
+    entries["occurrence"] = entries.groupby("indexNo").cumcount()
 
-    df["No Scan Defect Explanation"] = (
-        ""  # Creating New Column where the comments of the user will be stored
+    # Scan-defect rows, numbered per indexNo in row order
+    is_defect = df["sortCode"].isin([8, 9, 10]).to_numpy()
+    scan_defects = pd.DataFrame(
+        {
+            "indexNo": df["indexNo"].to_numpy(dtype=np.int64, na_value=-1)[is_defect],
+            "position": np.flatnonzero(is_defect),
+        }
     )
-    scan_defects = df[df["sortCode"].isin([8, 9, 10])]  # Restrict to scan-defect rows
-    modified_count = 0
-    matched_ids = []
-    # Keep track of which rows we've already modified
-    used_rows = set()
+    scan_defects["occurrence"] = scan_defects.groupby("indexNo").cumcount()
 
-    for bad_id, comment in zip(bad_ids_df[id_col], bad_ids_df[comment_col]):
-        if pd.isna(bad_id):
-            continue
-        padded_id = str(int(bad_id)).zfill(4)
+    report = entries.merge(scan_defects, on=["indexNo", "occurrence"], how="left")
+    matched = report["position"].notna().to_numpy()
+    positions = report.loc[matched, "position"].astype(int).to_numpy()
+    report["status"] = np.where(matched, "modified", "not_applied")
+    report["row"] = pd.Series(pd.NA, index=report.index, dtype=object)
+    report.loc[matched, "row"] = df.index[positions]
+    report = report[FALSE_POSITIVE_COLUMNS]
 
-        # Find candidate rows not already used
-        candidates = scan_defects.index[
-            (scan_defects["indexNo"] == padded_id)
-            & (~scan_defects.index.isin(used_rows))
-        ]
-
-        if len(candidates) > 0:
-            row_idx = candidates[0]  # take the next available one
-            df.at[row_idx, "sortCode"] = 0
-            df.at[row_idx, "No Scan Defect Explanation"] = (
-                comment if pd.notna(comment) else ""
-            )
-            used_rows.add(row_idx)
+    not_applied = report.loc[report["status"] == "not_applied", "indexNo"]
+    print(
+        f"Modified sortCode to 0 for {len(positions)} rows (respecting duplicates in user list)."
+    )
+    if not_applied.size:
+        print(
+            f"{not_applied.size} list entries not applied (no scan-defect row left), "
+            + f"e.g. {', '.join(not_applied.head(10).astype(str))}"
+        )
+    return report
 
-            matched_ids.append(padded_id)
-            modified_count += 1
 
-    # IDs from user list that didn’t get applied
-    not_found = [
-        str(int(x)).zfill(4)
-        for x in bad_ids_df[id_col]
-        if str(int(x)).zfill(4) not in matched_ids
-    ]
+def apply_false_positives(df: pd.DataFrame, report: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reset the sortCode of the rows a report matched and store the comments.
 
-    print(
-        f"Modified sortCode to 0 for {modified_count} rows (respecting duplicates in user list)."
+    Matched rows whose label is not in `df` are ignored, so a report built
+    for a whole window can be applied to any part of it.
+    """
+    df["No Scan Defect Explanation"] = (
+        ""  # Creating New Column where the comments of the user will be stored
+    )
+    # The window shares its columns with the full frame, copy before editing cells
+    df["sortCode"] = df["sortCode"].copy()
+
+    modified = report[report["status"] == "modified"]
+    positions = df.index.get_indexer(modified["row"])
+    found = positions >= 0
+    df.iloc[positions[found], df.columns.get_loc("sortCode")] = 0
+    df.iloc[positions[found], df.columns.get_loc("No Scan Defect Explanation")] = (
+        modified["comment"].to_numpy()[found]
     )
-    if matched_ids:
-        print("IDs modified:", matched_ids)
-    if not_found:
-        print("IDs not applied (no scan-defect row left):", not_found)
     return df
 
 
-def add_package_info(df: pd.DataFrame, threshold_sec: int = 1800) -> pd.DataFrame:
-    df = df.copy()
-    df["timeStamp"] = pd.to_datetime(df["timeStamp"])
+def remove_false_positives(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Reset the sortCode of scan defects the user marked as false positives.
 
-    # Sort and compute package boundaries
-    df = df.sort_values(["itemID", "timeStamp"])
-    new_pkg_flag = (
-        df.groupby("itemID")["timeStamp"]
-        .diff()
-        .dt.total_seconds()
-        .gt(threshold_sec)
-        .fillna(True)
-    )
-    group_idx = new_pkg_flag.groupby(df["itemID"]).cumsum().astype(int)
+    See `match_false_positives` for how list entries are matched to rows.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The updated frame and a report
+        with one row per list entry: indexNo, comment, status ("modified" or
+        "not_applied") and the label of the modified row.
+    """
+    bad_ids_df = load_false_positive_list()
+    if bad_ids_df is None:
+        return df, pd.DataFrame(columns=FALSE_POSITIVE_COLUMNS)
 
-    # Real package ID
-    df["RealPackageID"] = df["itemID"].astype(str) + "_" + group_idx.astype(str)
+    report = match_false_positives(bad_ids_df, df)
+    return apply_false_positives(df, report), report
 
-    # Classify packages
-    by_pkg = df.groupby("RealPackageID")
-    pkg_all_no_read = by_pkg["barcodeAWCS"].apply(
-        lambda s: s.str.fullmatch(r"\?+", na=False).all()
+
+def add_package_info(
+    df: pd.DataFrame,
+    threshold_sec: int = PACKAGE_GAP_SEC,
+    checkpoint_path: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Split each itemID into packages and classify every package.
+
+    Rows of an itemID more than `threshold_sec` apart start a new package
+    (RealPackageID "<itemID>_<n>"), see `sessionize`. With `checkpoint_path`
+    the packages left open by the previously analysed export are resumed,
+    and the state at the end of this one is saved there for the next.
+    """
+    checkpoint = load_checkpoint(checkpoint_path) if checkpoint_path else None
+    df, checkpoint = sessionize(df, checkpoint, threshold_sec)
+    if checkpoint_path:
+        save_checkpoint(checkpoint, checkpoint_path)
+        print(f"Package checkpoint saved to {checkpoint_path}")
+    return df
+
+
+def package_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the package table shared by the scan metrics.
+
+    The window frame is grouped once by RealPackageID and per-package
+    values are read from the rows at the recorded positions, so the metrics
+    never copy or deduplicate the frame themselves.
+
+    Args:
+        df: Enriched frame after `add_package_info`.
+
+    Returns:
+        pd.DataFrame: One row per RealPackageID, in order of first
+        appearance, with:
+            - first_ts, last_ts: first and last timeStamp
+            - attempts: number of rows
+            - first_sortCode, final_sortCode: sortCode of the first and
+              last row
+            - sortReason, Amazon_Destination: values of the first row that
+              is not a recirculation (missing when every row is one)
+            - defectCategory, pkg_type: values of the first row
+            - recirculated: more than one row and at least one
+              recirculation (sortCode 0 to a 3000-3999 destination)
+            - jackpot_hit: at least one successful sort to a jackpot
+    """
+    success = df["sortCode"] == 0
+    pkg, labels = pd.factorize(df["RealPackageID"])
+    rows = pd.DataFrame(
+        {
+            "pkg": pkg,
+            "pos": np.arange(len(df)),
+            "timeStamp": df["timeStamp"].to_numpy(),
+            "recirc": (success & df["requestedDestMCID"].between(3000, 3999)).to_numpy(
+                dtype=bool, na_value=False
+            ),
+            "jackpot": (success & df["Is_Jackpot"]).to_numpy(
+                dtype=bool, na_value=False
+            ),
+        }
     )
-    pkg_all_multi = by_pkg["barcodeAWCS"].apply(
-        lambda s: s.str.fullmatch(r"9+", na=False).all()
+    rows["kept_pos"] = rows["pos"].where(~rows["recirc"])
+
+    by_pkg = rows.groupby("pkg").agg(
+        first_ts=("timeStamp", "min"),
+        last_ts=("timeStamp", "max"),
+        attempts=("pos", "size"),
+        first_pos=("pos", "min"),
+        last_pos=("pos", "max"),
+        first_kept_pos=("kept_pos", "min"),
+        recirc=("recirc", "any"),
+        jackpot_hit=("jackpot", "any"),
     )
-    pkg_normal = ~(pkg_all_no_read | pkg_all_multi)
 
-    pkg_type = (
-        pkg_normal.map({True: "normal", False: None})
-        .combine_first(pkg_all_no_read.map({True: "no_read"}))
-        .combine_first(pkg_all_multi.map({True: "multi_read"}))
+    def at(col: str, pos_col: str):
+        """Values of `col` at the rows of a by_pkg position column."""
+        positions = by_pkg[pos_col].fillna(-1).to_numpy(dtype=np.int64)
+        return df[col].array.take(positions, allow_fill=True)
+
+    attempts = by_pkg["attempts"].to_numpy()
+    return pd.DataFrame(
+        {
+            "RealPackageID": labels,
+            "first_ts": by_pkg["first_ts"].to_numpy(),
+            "last_ts": by_pkg["last_ts"].to_numpy(),
+            "attempts": attempts,
+            "first_sortCode": at("sortCode", "first_pos"),
+            "final_sortCode": at("sortCode", "last_pos"),
+            "sortReason": at("sortReason", "first_kept_pos"),
+            "Amazon_Destination": at("Amazon_Destination", "first_kept_pos"),
+            "defectCategory": at("defectCategory", "first_pos"),
+            "pkg_type": at("pkg_type", "first_pos"),
+            "recirculated": (attempts > 1) & by_pkg["recirc"].to_numpy(),
+            "jackpot_hit": by_pkg["jackpot_hit"].to_numpy(),
+        }
     )
 
-    # Merge back to dataframe
-    df = df.merge(
-        pkg_type.rename("pkg_type"),
-        left_on="RealPackageID",
-        right_index=True,
-        how="left",
+
+# Columns read by `sessionize` and `package_summary`
+PACKAGE_COLUMNS = [
+    "itemID",
+    "timeStamp",
+    "barcodeAWCS",
+    "sortCode",
+    "requestedDestMCID",
+    "Is_Jackpot",
+    "sortReason",
+    "Amazon_Destination",
+    "defectCategory",
+]
+
+
+def _package_shard(
+    df: pd.DataFrame, checkpoint: Optional[pd.DataFrame], threshold_sec: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, pd.DataFrame, pd.DataFrame]:
+    """
+    Split the itemIDs of one shard into packages and summarize them.
+
+    Runs in a worker of `add_package_info_parallel`. Returns the shard's
+    row positions in sorted order, the package code and pkg_type of every
+    sorted row, the shard's package table and its checkpoint rows. The
+    pkg_type is returned per row because rows without itemID are packages
+    of their own that share one RealPackageID in the package table.
+    """
+    df, checkpoint = sessionize(df, checkpoint, threshold_sec)
+    packages = package_summary(df)
+    codes = pd.factorize(df["RealPackageID"])[0]
+    return df.index.to_numpy(), codes, df["pkg_type"].to_numpy(), packages, checkpoint
+
+
+def add_package_info_parallel(
+    df: pd.DataFrame,
+    workers: int,
+    threshold_sec: int = PACKAGE_GAP_SEC,
+    checkpoint_path: Optional[str] = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    `add_package_info` and `package_summary` on a pool of processes.
+
+    Packages never span two itemIDs, so the window is sharded by itemID:
+    each worker gets a contiguous range of the sorted itemIDs (with about
+    the same number of rows) through a shared Arrow file and sessionizes
+    and summarizes it. Concatenated in shard order, the sorted rows and the
+    package tables come out exactly as in a single process.
+
+    Args:
+        df: Enriched window frame.
+        workers: Number of worker processes.
+        threshold_sec: Gap that starts a new package.
+        checkpoint_path: Optional package checkpoint, see `add_package_info`.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The frame `add_package_info`
+        returns and its package table.
+    """
+    # Sorted itemID codes, missing itemIDs sort last as in sort_values
+    ranks, items = pd.factorize(df["itemID"], sort=True)
+    ranks = np.where(ranks < 0, len(items), ranks)
+    bounds = shard_bounds(ranks, len(items) + 1, workers)
+
+    # Each shard resumes the checkpoint rows of its own itemIDs
+    checkpoint = load_checkpoint(checkpoint_path) if checkpoint_path else None
+    shard_args = [(None, threshold_sec)] * workers
+    untouched = None
+    if checkpoint is not None:
+        known = pd.Index(items).get_indexer(checkpoint["itemID"])
+        shard = np.searchsorted(bounds, known, side="right") - 1
+        shard_args = [
+            (checkpoint[(known >= 0) & (shard == i)], threshold_sec)
+            for i in range(workers)
+        ]
+        untouched = checkpoint[known < 0]
+
+    results = map_shards(df[PACKAGE_COLUMNS], ranks, bounds, _package_shard, shard_args)
+    positions = np.concatenate([result[0] for result in results])
+    packages = concat_events([result[3] for result in results], ignore_index=True)
+    offsets = np.cumsum([0] + [len(result[3]) for result in results[:-1]])
+    codes = np.concatenate(
+        [result[1] + offset for result, offset in zip(results, offsets)]
     )
 
-    return df
+    out = df.take(positions)
+    out["timeStamp"] = pd.to_datetime(out["timeStamp"])
+    out["RealPackageID"] = packages["RealPackageID"].to_numpy()[codes]
+    out["pkg_type"] = np.concatenate([result[2] for result in results])
 
+    if checkpoint_path:
+        parts = [untouched] + [result[4] for result in results]
+        parts = [part for part in parts if len(part)]
+        checkpoint = (
+            pd.concat(parts, ignore_index=True) if parts else empty_checkpoint()
+        )
+        save_checkpoint(checkpoint, checkpoint_path)
+        print(f"Package checkpoint saved to {checkpoint_path}")
+    return out, packages
 
-def scanner_metrics(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
 
+def scanner_metrics(packages: pd.DataFrame) -> pd.DataFrame:
     # Counts from pkg_type (already precomputed)
-    pkg_type_counts = df.groupby("RealPackageID")["pkg_type"].first().value_counts()
+    pkg_type_counts = packages["pkg_type"].value_counts()
 
     totalPkgCount = int(pkg_type_counts.sum())
     normalPkgCount = int(pkg_type_counts.get("normal", 0))
@@ -375,26 +505,13 @@ def scanner_metrics(df: pd.DataFrame) -> pd.DataFrame:
     )
 
 
-def sort_code_metrics(df: pd.DataFrame) -> dict:
-    df = df.copy()
-
-    # Define recirculation mask (garbage condition)
-    recirc_mask = (df["sortCode"] == 0) & (df["requestedDestMCID"].between(3000, 3999))
-
-    # Detect recirculation before dropping
-    dup_mask = df.duplicated("RealPackageID", keep=False)
-    recirculating_ids = df.loc[dup_mask & recirc_mask, "RealPackageID"].unique()
-    recirculation_count = len(recirculating_ids)
-
-    # Now drop garbage for analysis
-    df = df.loc[~recirc_mask]
-
-    # Deduplicate for per-package metrics
-    unique_pkgs = df.drop_duplicates("RealPackageID")
+def sort_code_metrics(packages: pd.DataFrame) -> dict:
+    recirculation_count = int(packages["recirculated"].sum())
 
-    # Aggregations
+    # Aggregations: sortReason and Amazon_Destination come from the first
+    # non-recirculation row, packages with only recirculations are left out
     sort_counts = (
-        unique_pkgs.groupby("sortReason", as_index=False)
+        packages.groupby("sortReason", as_index=False, observed=True)
         .size()
         .rename(columns={"size": "count"})
         .sort_values("count", ascending=False)
@@ -402,7 +519,9 @@ def sort_code_metrics(df: pd.DataFrame) -> dict:
     )
 
     reason_dest_summary = (
-        unique_pkgs.groupby(["sortReason", "Amazon_Destination"], as_index=False)
+        packages.groupby(
+            ["sortReason", "Amazon_Destination"], as_index=False, observed=True
+        )
         .size()
         .rename(columns={"size": "count"})
         .sort_values(["sortReason", "count"], ascending=[True, False])
@@ -410,7 +529,11 @@ def sort_code_metrics(df: pd.DataFrame) -> dict:
     )
 
     reason_dest_pivot = reason_dest_summary.pivot_table(
-        index=["sortReason"], columns="Amazon_Destination", values="count", fill_value=0
+        index=["sortReason"],
+        columns="Amazon_Destination",
+        values="count",
+        fill_value=0,
+        observed=True,
     ).reset_index()
 
     print("\nSort Code Metrics Summary")
@@ -430,16 +553,14 @@ def sort_code_metrics(df: pd.DataFrame) -> dict:
     }
 
 
-def defect_metrics(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    # Take only one row per package (first occurrence is enough,
-    # since RealPackageID is already classified earlier)
-    unique_pkgs = df.drop_duplicates("RealPackageID")
-    total_processed = unique_pkgs.shape[0]
+def defect_metrics(packages: pd.DataFrame) -> pd.DataFrame:
+    # defectCategory of each package's first row
+    total_processed = packages.shape[0]
     # Count defects only (exclude NaN)
     defect_summary = (
-        unique_pkgs["defectCategory"]
+        packages["defectCategory"]
         .value_counts(dropna=True)
+        .loc[lambda counts: counts > 0]
         .rename_axis("defectCategory")
         .reset_index(name="count")
     )
@@ -467,26 +588,27 @@ def defect_metrics(df: pd.DataFrame) -> pd.DataFrame:
     return defect_summary
 
 
-def jackpot_metrics(df: pd.DataFrame) -> pd.DataFrame:
+def jackpot_metrics(df: pd.DataFrame, packages: pd.DataFrame) -> pd.DataFrame:
     """
     Summarize jackpot-related metrics:
       - Unique packages that hit at least one jackpot (sortCode == 0)
       - Breakdown by each Jackpot destination, showing Amazon & Beumer names
+
+    A package can hit several jackpots, so the breakdown reads the (few)
+    jackpot rows of `df`; the package count comes from `packages`.
     """
-    df = df.copy()
+    # Count unique packages hitting any jackpot
+    unique_jackpot_packages = int(packages["jackpot_hit"].sum())
 
     # Filter: success (sortCode == 0) + destination is a jackpot
-    mask = (df["sortCode"] == 0) & (
-        df["Jackpot_Destination"].astype(str).str.strip().str.lower() == "jackpot"
-    )
-    jackpot_df = df.loc[mask]
-
-    # Count unique packages hitting any jackpot
-    unique_jackpot_packages = jackpot_df["RealPackageID"].nunique()
+    mask = ((df["sortCode"] == 0) & df["Is_Jackpot"]).fillna(False)
+    jackpot_df = df.loc[
+        mask, ["RealPackageID", "Beumer_Destination", "Amazon_Destination"]
+    ]
 
     # Group by each destination (Beumer + Amazon combo)
     summary = (
-        jackpot_df.groupby(["Beumer_Destination", "Amazon_Destination"])[
+        jackpot_df.groupby(["Beumer_Destination", "Amazon_Destination"], observed=True)[
             "RealPackageID"
         ]
         .nunique()
@@ -504,6 +626,314 @@ def jackpot_metrics(df: pd.DataFrame) -> pd.DataFrame:
     return summary
 
 
+def analysis_metrics(packages: pd.DataFrame, df: pd.DataFrame) -> dict:
+    """
+    Compute the scan metrics of the exported summary.
+
+    Args:
+        packages: Package table of the window (see `package_summary`).
+        df: Window rows after `add_package_info`; only the jackpot rows are
+            read, so any frame holding at least those works.
+
+    Returns:
+        dict: Summary counts and tables, keyed as in `export_to_excel`.
+    """
+    scanner_df = scanner_metrics(packages)
+    sort_code_results = sort_code_metrics(packages)
+    defect_df = defect_metrics(packages)
+    jackpot_df = jackpot_metrics(df, packages)
+
+    return {
+        "package_processed": packages.shape[0],
+        "unique_packages": scanner_df.loc[
+            scanner_df["metric"] == "total_packages", "count"
+        ].values[0],
+        "recirculation_packages": sort_code_results["recirculation_count"],
+        # Rows of packages with more than one attempt
+        "recirculation_records": int(
+            packages.loc[packages["attempts"] > 1, "attempts"].sum()
+        ),
+        "jackpot_packages": jackpot_df,
+        "defect_summary": defect_df,
+        "sort_code_summary": sort_code_results["sort_counts"],
+        "reason_dest_pivot": sort_code_results["reason_dest_pivot"],
+    }
+
+
+def _expand_to_windows(
+    buckets: np.ndarray, on_edge: np.ndarray, n_windows: int, window_buckets: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Map each bucket to every sweep window that contains it.
+
+    Window k covers buckets k .. k + window_buckets - 1, so bucket b belongs
+    to windows b - window_buckets + 1 .. b. Window ends are included, so
+    rows at the very start of bucket b (`on_edge`) also belong to window
+    b - window_buckets, which ends there.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Positions into `buckets` (repeated once
+        per containing window) and the matching window numbers.
+    """
+    offsets = np.arange(window_buckets + 1)
+    windows = buckets[:, None] - offsets[None, :]
+    valid = (windows >= 0) & (windows < n_windows)
+    valid &= (offsets[None, :] < window_buckets) | on_edge[:, None]
+    rows = np.broadcast_to(np.arange(len(buckets))[:, None], windows.shape)
+    return rows[valid], windows[valid]
+
+
+def sweep_metrics(
+    df: pd.DataFrame, window_minutes: int = WINDOW_TIME, step_minutes: int = WINDOW_TIME
+) -> pd.DataFrame:
+    """
+    Compute the scan metrics for every window of a rolling sweep in one pass.
+
+    Windows are [start, start + window], both ends included as in
+    `select_window_cli`, and start every `step_minutes`, from the first
+    timestamp floored to the step. Rows are grouped once into
+    step-sized time buckets per package, and each window combines the
+    buckets it covers, so the data is never re-filtered per window. A
+    package split by a window edge counts in both windows with only its rows
+    inside each one, as if `add_package_info` had run on each window.
+
+    Args:
+        df: Enriched frame after `add_package_info` (needs RealPackageID,
+            sortReason, defectCategory and the destination columns).
+        window_minutes: Length of each window. Must be a multiple of the step.
+        step_minutes: Minutes between the starts of consecutive windows.
+
+    Returns:
+        pd.DataFrame: Tidy table with window_start, window_end, metric,
+        category and value columns. Metrics follow `scanner_metrics`,
+        `sort_code_metrics`, `defect_metrics` and `jackpot_metrics`.
+
+    Raises:
+        ValueError: If the window is not a positive multiple of the step.
+    """
+    if step_minutes <= 0 or window_minutes <= 0 or window_minutes % step_minutes:
+        raise ValueError(
+            f"Window ({window_minutes} min) must be a positive multiple of the step ({step_minutes} min)"
+        )
+    step = pd.Timedelta(minutes=step_minutes)
+    window_buckets = window_minutes // step_minutes
+
+    df = df[df["timeStamp"].notna()]
+    if df.empty:
+        return pd.DataFrame(
+            columns=["window_start", "window_end", "metric", "category", "value"]
+        )
+
+    origin = df["timeStamp"].min().floor(step)
+    elapsed = df["timeStamp"] - origin
+    bucket = (elapsed // step).to_numpy(dtype=np.int64)
+    # Rows exactly at a bucket start also close the window ending there
+    on_edge = (elapsed % step == pd.Timedelta(0)).to_numpy()
+    n_windows = max(int(bucket.max()) - window_buckets + 2, 1)
+    window_starts = origin + step * np.arange(n_windows)
+
+    # Row flags, computed once for the whole frame
+    barcode = df["barcodeAWCS"]
+    rows = pd.DataFrame(
+        {
+            "pkg": pd.factorize(df["RealPackageID"])[0],
+            "bucket": bucket,
+            "on_edge": on_edge,
+            "pos": np.arange(len(df)),
+            "no_read": barcode.str.fullmatch(r"\?+", na=False).to_numpy(),
+            "multi": barcode.str.fullmatch(r"9+", na=False).to_numpy(),
+            "recirc": (
+                (df["sortCode"] == 0) & df["requestedDestMCID"].between(3000, 3999)
+            ).to_numpy(dtype=bool, na_value=False),
+        }
+    )
+    rows["kept_pos"] = rows["pos"].where(~rows["recirc"])
+
+    # One entry per (package, bucket), then per (window, package)
+    by_bucket = rows.groupby(["pkg", "bucket", "on_edge"], as_index=False).agg(
+        n=("pos", "size"),
+        no_read=("no_read", "sum"),
+        multi=("multi", "sum"),
+        recirc=("recirc", "sum"),
+        first_pos=("pos", "min"),
+        first_kept_pos=("kept_pos", "min"),
+    )
+    idx, win = _expand_to_windows(
+        by_bucket["bucket"].to_numpy(),
+        by_bucket["on_edge"].to_numpy(),
+        n_windows,
+        window_buckets,
+    )
+    expanded = (
+        by_bucket.iloc[idx].drop(columns=["bucket", "on_edge"]).assign(window=win)
+    )
+    pkgs = expanded.groupby(["window", "pkg"], as_index=False).agg(
+        n=("n", "sum"),
+        no_read=("no_read", "sum"),
+        multi=("multi", "sum"),
+        recirc=("recirc", "sum"),
+        first_pos=("first_pos", "min"),
+        first_kept_pos=("first_kept_pos", "min"),
+    )
+
+    tidy: list[pd.DataFrame] = []
+
+    def add(values: pd.Series, metric: str, category: str = "") -> None:
+        """Append a window-indexed Series (or category-indexed) to the table."""
+        values = values.rename("value").reset_index()
+        if "category" not in values.columns:
+            values["category"] = category
+        values["metric"] = metric
+        tidy.append(values)
+
+    all_windows = pd.RangeIndex(n_windows, name="window")
+
+    # scanner_metrics
+    all_no_read = pkgs["no_read"] == pkgs["n"]
+    all_multi = (pkgs["multi"] == pkgs["n"]) & ~all_no_read
+    counts = {
+        "total_packages": pkgs["window"],
+        "normal_packages": pkgs.loc[~(all_no_read | all_multi), "window"],
+        "no_read_packages": pkgs.loc[all_no_read, "window"],
+        "multi_read_packages": pkgs.loc[all_multi, "window"],
+    }
+    for metric, windows in counts.items():
+        add(windows.value_counts().reindex(all_windows, fill_value=0), metric)
+
+    # sort_code_metrics: recirculation, then first non-recirculation row
+    recirculating = pkgs.loc[(pkgs["n"] > 1) & (pkgs["recirc"] > 0), "window"]
+    add(
+        recirculating.value_counts().reindex(all_windows, fill_value=0),
+        "recirculation_packages",
+    )
+    kept = pkgs.dropna(subset=["first_kept_pos"])
+    first_kept = df.iloc[kept["first_kept_pos"].astype(int)]
+    first_kept = pd.DataFrame(
+        {
+            "window": kept["window"].to_numpy(),
+            "sortReason": first_kept["sortReason"].to_numpy(),
+            "Amazon_Destination": first_kept["Amazon_Destination"].to_numpy(),
+        }
+    )
+    add(
+        first_kept.groupby(["window", "sortReason"])
+        .size()
+        .rename_axis(["window", "category"]),
+        "sort_reason",
+    )
+    reason_dest = first_kept.groupby(["window", "sortReason", "Amazon_Destination"])
+    reason_dest = reason_dest.size().reset_index(name="value")
+    reason_dest["category"] = (
+        reason_dest["sortReason"].astype(str)
+        + " / "
+        + reason_dest["Amazon_Destination"].astype(str)
+    )
+    add(
+        reason_dest.set_index(["window", "category"])["value"],
+        "sort_reason_destination",
+    )
+
+    # defect_metrics: first row of each package
+    first = pd.DataFrame(
+        {
+            "window": pkgs["window"].to_numpy(),
+            "defectCategory": df["defectCategory"].to_numpy()[pkgs["first_pos"]],
+        }
+    )
+    defects = first.groupby(["window", "defectCategory"]).size()
+    total = pkgs["window"].value_counts().reindex(all_windows, fill_value=0)
+    no_defect = total - defects.groupby(level="window").sum().reindex(
+        all_windows, fill_value=0
+    )
+    no_defect.index = pd.MultiIndex.from_arrays(
+        [all_windows, ["No Defect"] * n_windows], names=["window", "category"]
+    )
+    defects = pd.concat([defects.rename_axis(["window", "category"]), no_defect])
+    add(defects, "defect_count")
+    share = defects / total.reindex(defects.index.get_level_values("window")).to_numpy()
+    add((share * 100).round(4), "defect_percentage")
+
+    # jackpot_metrics: packages with a successful sort to a jackpot
+    jackpot = ((df["sortCode"] == 0) & df["Is_Jackpot"]).to_numpy(
+        dtype=bool, na_value=False
+    )
+    hits = pd.DataFrame(
+        {
+            "pkg": rows["pkg"].to_numpy()[jackpot],
+            "bucket": bucket[jackpot],
+            "on_edge": on_edge[jackpot],
+            "Beumer_Destination": df.loc[jackpot, "Beumer_Destination"].to_numpy(),
+            "Amazon_Destination": df.loc[jackpot, "Amazon_Destination"].to_numpy(),
+        }
+    ).drop_duplicates()
+    idx, win = _expand_to_windows(
+        hits["bucket"].to_numpy(), hits["on_edge"].to_numpy(), n_windows, window_buckets
+    )
+    hits = hits.iloc[idx].drop(columns=["bucket", "on_edge"]).assign(window=win)
+    add(
+        hits.groupby("window")["pkg"].nunique().reindex(all_windows, fill_value=0),
+        "jackpot_packages",
+    )
+    destinations = (
+        hits.groupby(["window", "Beumer_Destination", "Amazon_Destination"])["pkg"]
+        .nunique()
+        .reset_index(name="value")
+    )
+    destinations["category"] = (
+        destinations["Beumer_Destination"].astype(str)
+        + " / "
+        + destinations["Amazon_Destination"].astype(str)
+    )
+    add(destinations.set_index(["window", "category"])["value"], "jackpot_destination")
+
+    result = pd.concat(tidy, ignore_index=True)
+    result["window_start"] = window_starts[result["window"].to_numpy()]
+    result["window_end"] = result["window_start"] + pd.Timedelta(minutes=window_minutes)
+    result = result.sort_values("window", kind="stable")
+    return result[
+        ["window_start", "window_end", "metric", "category", "value"]
+    ].reset_index(drop=True)
+
+
+def export_sweep_to_excel(sweep_df: pd.DataFrame) -> None:
+    """
+    Save a sweep table to Excel: the tidy table plus one sheet per metric.
+
+    Totals (metrics without category) share the "Summary" sheet; every
+    breakdown gets a sheet with one row per window and one column per
+    category.
+    """
+    os.makedirs("data/reports", exist_ok=True)
+
+    start_str = sweep_df["window_start"].min().strftime("%Y%m%d-%H%M%S")
+    end_str = sweep_df["window_end"].max().strftime("%Y%m%d-%H%M%S")
+    output_path = f"data/reports/Sweep_S04_{start_str}_{end_str}.xlsx"
+
+    print("\nExporting sweep results to Excel file...")
+
+    with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
+        totals = sweep_df[sweep_df["category"] == ""]
+        totals.pivot_table(
+            index=["window_start", "window_end"],
+            columns="metric",
+            values="value",
+            sort=False,
+        ).reset_index().to_excel(writer, sheet_name="Summary", index=False)
+
+        breakdowns = sweep_df[sweep_df["category"] != ""]
+        for metric, group in breakdowns.groupby("metric", sort=False):
+            group.pivot_table(
+                index=["window_start", "window_end"],
+                columns="category",
+                values="value",
+                fill_value=0,
+            ).reset_index().to_excel(writer, sheet_name=str(metric)[:31], index=False)
+
+        sweep_df.to_excel(writer, sheet_name="Sweep_Metrics", index=False)
+
+    print(f"Sweep results saved to: {output_path}")
+
+
 def export_to_excel(results: dict) -> None:
     os.makedirs("data/reports", exist_ok=True)
 
@@ -662,31 +1092,502 @@ def export_to_excel(results: dict) -> None:
         )
 
         # Extra Sheets
-        results["interim_df"].to_excel(writer, sheet_name="Raw_Data", index=False)
-        results["parsed_df"].to_excel(writer, sheet_name="Parsed_Data", index=False)
-        results["window_df"].to_excel(writer, sheet_name="Window_Data", index=False)
+        # The row-level sheets are left out of out-of-core runs
+        sheets = {
+            "Raw_Data": "interim_df",
+            "Parsed_Data": "parsed_df",
+            "Window_Data": "window_df",
+        }
+        for sheet_name, name in sheets.items():
+            if results.get(name) is not None:
+                results[name].to_excel(writer, sheet_name=sheet_name, index=False)
         results["scan_defects"].to_excel(writer, sheet_name="Scan_Defects", index=False)
+        if results.get("false_positives") is not None:
+            results["false_positives"].to_excel(
+                writer, sheet_name="False_Positives", index=False
+            )
 
     print(f"Analysis results saved to: {output_path}")
 
 
-def main():
+# Exports smaller than this are parsed in one process even with --workers,
+# starting the pool would take longer than the parse
+PARALLEL_PARSE_MIN_BYTES = 64 * 1024 * 1024
+
+
+def parse_scan_lines(data: bytes) -> tuple[pd.DataFrame, pd.DataFrame, int, int]:
+    """
+    Tokenize, decode and explode raw S04 Log Monitor lines.
+
+    Returns the interim and clean frames, labelled from 0, followed by the
+    number of tokenized rows and of skipped lines.
+    """
+    raw_df, skipped = parse_log_lines(data)
+    interim_df = parse_data(raw_df[raw_df["messageCode"] == S04_MESSAGE_CODE])
+    clean_df = explode_attempts(interim_df, KEEP_COLUMNS)
+    return interim_df, clean_df, len(raw_df), skipped
+
+
+def _parse_range(
+    file_path: str, byte_range: tuple[int, int]
+) -> tuple[pd.DataFrame, pd.DataFrame, int, int, int, int]:
+    """
+    Load and parse the S04 lines of one byte range of an export.
+
+    Runs in a worker of `parse_export_parallel`. Returns the interim and
+    clean frames of the range, labelled from 0, followed by the number of
+    tokenized rows, kept lines, lines read and skipped lines.
+    """
+    data, kept_lines, total_lines = read_log_lines(
+        file_path, [S04_MESSAGE_CODE], byte_range=byte_range
+    )
+    interim_df, clean_df, n_rows, skipped = parse_scan_lines(data)
+    return interim_df, clean_df, n_rows, kept_lines, total_lines, skipped
+
+
+def parse_export_parallel(file_path: str, workers: int) -> dict[str, pd.DataFrame]:
+    """
+    Load and parse an S04 export on a pool of processes.
+
+    The file is split into `workers` byte ranges aligned to line boundaries
+    (see `line_ranges`) and every range is filtered, tokenized, decoded and
+    exploded in its own process. The ranges are put back in file order and
+    their rows relabelled as a single-process parse would label them, so
+    the interim and clean frames are the ones `load_scan_frames` builds.
+    """
+    ranges = line_ranges(file_path, workers)
+    print(f"Loading data from {file_path} in {len(ranges)} parallel ranges...")
+    results = map_processes(_parse_range, [(file_path, r) for r in ranges])
+
+    interims, cleans = [], []
+    row_offset = slot_offset = kept_lines = total_lines = skipped = 0
+    for interim_df, clean_df, n_rows, n_kept, n_lines, n_skipped in results:
+        interim_df.index = interim_df.index + row_offset
+        clean_df.index = clean_df.index + slot_offset
+        row_offset += n_rows
+        slot_offset += attempt_slots(interim_df)
+        kept_lines += n_kept
+        total_lines += n_lines
+        skipped += n_skipped
+        if len(interim_df) or not interims:
+            interims.append(interim_df)
+            cleans.append(clean_df)
+
+    print(
+        f"Streaming filter: kept {kept_lines} lines with messageCode {S04_MESSAGE_CODE}"
+        + f"\n\tdropped {total_lines - kept_lines} out of {total_lines} total lines"
+    )
+    if skipped:
+        print(
+            f"Skipped {skipped} malformed lines (more than {len(LOG_MONITOR_COLUMNS)} fields)"
+        )
+    # Ranges can store their arrays differently (e.g. Arrow int lists in one,
+    # Python lists of mixed values in another); such columns are rebuilt
+    # over the whole export, as a single parse would store them
+    interim_df = concat_events(interims)
+    for col in SORTER_ARRAYS:
+        if len({str(df[col].dtype) for df in interims}) == 1:
+            continue
+        ragged = RaggedArray.concat(
+            [RaggedArray.from_series(df[col]) for df in interims]
+        )
+        interim_df[col] = ragged.to_series(interim_df.index, col)
+    return {"interim": interim_df, "clean": concat_events(cleans)}
+
+
+def load_merged_scan_frames(file_paths: list[str]) -> dict[str, pd.DataFrame]:
+    """
+    Load and parse several time-sliced S04 exports as a single export.
+
+    The exports are merged in timeStamp order while they are streamed (see
+    `iter_merged_log_lines`), lines repeated by overlapping exports are
+    dropped, so the frames come out as for one export covering the whole
+    period and no step needs to sort them by time. Merged exports are not
+    cached.
+    """
+    print(f"Merging {len(file_paths)} exports in time order...")
+    kept: list[bytes] = []
+    total_lines = 0
+    for lines, n_lines in iter_merged_log_lines(file_paths, [S04_MESSAGE_CODE]):
+        kept.extend(lines)
+        total_lines += n_lines
+
+    print(
+        f"Streaming filter: kept {len(kept)} lines with messageCode {S04_MESSAGE_CODE}"
+        + f"\n\tdropped {total_lines - len(kept)} out of {total_lines} total lines"
+        + " (other messageCodes and lines repeated by overlapping exports)"
+    )
+    data = b"\n".join(kept) + b"\n" if kept else b""
+    del kept
+    interim_df, clean_df, _, skipped = parse_scan_lines(data)
+    if skipped:
+        print(
+            f"Skipped {skipped} malformed lines (more than {len(LOG_MONITOR_COLUMNS)} fields)"
+        )
+    return {"interim": mark_time_order(interim_df), "clean": mark_time_order(clean_df)}
+
+
+def load_scan_frames(
+    file_path: str, key: Optional[str], names: list[str], workers: int = 1
+) -> dict[str, pd.DataFrame]:
+    """
+    Return the S04 frames for an export, reusing the Parquet cache.
+
+    On a cache hit only the frames in `names` are read ("interim", one row
+    per telegram, or "clean", one row per sort attempt with KEEP_COLUMNS),
+    so the small clean frame is available quickly. On a miss (or when `key`
+    is None) the export is loaded and parsed and both frames are returned
+    and, with a key, written to the cache. The full per-attempt frame is
+    not stored; `explode_attempts` rebuilds it from the interim frame.
+    With several `workers`, exports of at least PARALLEL_PARSE_MIN_BYTES
+    are parsed by `parse_export_parallel`. Parsed frames are marked with
+    `mark_time_order` before they are cached.
+    """
+    if key:
+        cached = load_cached(key, names)
+        if cached is not None:
+            print(f"Loaded {', '.join(names)} data from cache ({key})")
+            return cached
+
+    if workers > 1 and os.path.getsize(file_path) >= PARALLEL_PARSE_MIN_BYTES:
+        frames = parse_export_parallel(file_path, workers)
+    else:
+        raw_df = load_log_monitor(file_path, message_codes=[S04_MESSAGE_CODE])
+        print("Parsing data...")
+        format_df = format_data(raw_df)
+        interim_df = parse_data(format_df)
+        frames = {
+            "interim": interim_df,
+            "clean": explode_attempts(interim_df, KEEP_COLUMNS),
+        }
+    # Sortedness is checked once here, and cached with the frames, rather than
+    # every time a window is selected
+    for df in frames.values():
+        mark_time_order(df)
+
+    if key:
+        save_cached(key, frames, file_path)
+        print(f"Parsed data cached ({key})")
+
+    return frames
+
+
+def select_store_window(
+    site: str,
+) -> tuple[pd.DataFrame, pd.Timestamp, pd.Timestamp, dict]:
+    """
+    Select a time window of S04 events from the event store.
+
+    Stored events are already decoded by the S04 codec. Only the selected
+    window is read and expanded into sort attempts, so the interim frame
+    exported to Excel covers the window only.
+    """
+    print("Select time window for analysis:")
+    events, start_ts, end_ts = select_store_window_cli(
+        site, S04_MESSAGE_CODE, WINDOW_TIME
+    )
+    interim_df = events[SCAN_FIELDS]
+    frames = {"interim": interim_df}
+    return explode_attempts(interim_df, KEEP_COLUMNS), start_ts, end_ts, frames
+
+
+# Out-of-core runs: approximate peak memory per byte of S04 lines while a
+# chunk is parsed, and per sort attempt while a batch of buckets is analysed
+PARSE_BYTES_PER_LINE_BYTE = 12
+ANALYSIS_BYTES_PER_ROW = 400
+
+
+class SpilledExport(NamedTuple):
+    """
+    S04 sort attempts of an export, spilled to buckets of hashed itemID.
+
+    Rows keep the index labels of an in-memory run. `scan_defects` holds
+    the scan-defect rows (sortCode 8, 9 or 10) in file order, for matching
+    the false-positive list across buckets.
+    """
+
+    root: str
+    rows_per_bucket: np.ndarray
+    telegrams: int
+    start_ts: pd.Timestamp
+    end_ts: pd.Timestamp
+    scan_defects: pd.DataFrame
+
+
+def spill_scan_export(file_path: str, root: str, memory_budget: int) -> SpilledExport:
+    """
+    Parse an S04 export chunk by chunk and spill its sort attempts to disk.
+
+    Lines are parsed in blocks sized for `memory_budget` bytes, exploded
+    into sort attempts and written to buckets of hashed itemID (see
+    `utils.spill`), so all the rows of an itemID, and therefore of its
+    packages, end up in the same bucket.
+    """
+    block_bytes = max(memory_budget // PARSE_BYTES_PER_LINE_BYTE, 1024 * 1024)
+    # Several buckets per budget-sized share of the file, batches regroup them
+    budget_shares = -(-os.path.getsize(file_path) // memory_budget)
+    n_buckets = int(np.clip(4 * budget_shares, 16, 1024))
+
+    rows_per_bucket = np.zeros(n_buckets, dtype=np.int64)
+    telegrams = offset = skipped = total_lines = kept_lines = 0
+    bounds: list[pd.Timestamp] = []
+    defects: list[pd.DataFrame] = []
+
+    def spill(lines: list[bytes], part: int) -> None:
+        nonlocal rows_per_bucket, telegrams, offset, skipped
+        raw_df, bad_lines = parse_log_lines(b"\n".join(lines) + b"\n")
+        skipped += bad_lines
+        interim_df = parse_data(raw_df[raw_df["messageCode"] == S04_MESSAGE_CODE])
+        clean_df = explode_attempts(interim_df, KEEP_COLUMNS)
+        # Label the attempts as one run over the whole export would
+        clean_df.index = clean_df.index + offset
+        offset += attempt_slots(interim_df)
+        telegrams += len(interim_df)
+
+        bounds.extend([clean_df["timeStamp"].min(), clean_df["timeStamp"].max()])
+        defects.append(
+            clean_df.loc[
+                clean_df["sortCode"].isin([8, 9, 10]),
+                ["indexNo", "timeStamp", "sortCode"],
+            ]
+        )
+        rows_per_bucket += spill_frame(clean_df, root, "itemID", n_buckets, part)
+
+    print(f"Loading data from {file_path} in blocks of {block_bytes >> 20} MB...")
+    lines: list[bytes] = []
+    size = part = 0
+    for kept, n_lines in iter_log_lines(
+        file_path, [S04_MESSAGE_CODE], min(CHUNK_SIZE_BYTES, block_bytes)
+    ):
+        total_lines += n_lines
+        kept_lines += len(kept)
+        lines.extend(kept)
+        size += sum(map(len, kept))
+        if size >= block_bytes:
+            spill(lines, part)
+            lines, size, part = [], 0, part + 1
+    if lines:
+        spill(lines, part)
+        part += 1
+
+    print(
+        f"Streaming filter: kept {kept_lines} lines with messageCode {S04_MESSAGE_CODE}"
+        + f"\n\tdropped {total_lines - kept_lines} out of {total_lines} total lines"
+    )
+    if skipped:
+        print(
+            f"Skipped {skipped} malformed lines (more than {len(LOG_MONITOR_COLUMNS)} fields)"
+        )
+    print(
+        f"Spilled {int(rows_per_bucket.sum())} sort attempts from {part} blocks "
+        + f"to {n_buckets} itemID buckets"
+    )
+
+    times = pd.Series(bounds, dtype="datetime64[ms]")
+    scan_defects = (
+        concat_events(defects)
+        if defects
+        else pd.DataFrame(columns=["indexNo", "timeStamp", "sortCode"])
+    )
+    return SpilledExport(
+        root, rows_per_bucket, telegrams, times.min(), times.max(), scan_defects
+    )
+
+
+def _in_window(
+    df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp, status: str
+) -> pd.DataFrame:
+    """Rows of `df` inside the window picked by `prompt_window`."""
+    if status == "full":
+        return df
+    if status == "empty":
+        return df.iloc[0:0]
+    return df.loc[(df["timeStamp"] >= start) & (df["timeStamp"] <= end)].copy()
+
+
+def run_out_of_core(memory_budget: int, checkpoint_path: Optional[str] = None) -> None:
+    """
+    Analyse an S04 export too large for memory, one itemID bucket at a time.
+
+    The export is spilled to disk (see `spill_scan_export`), then batches of
+    buckets sized for `memory_budget` bytes go through the same enrichment,
+    false-positive cleanup and sessionization as `main`. Packages never span
+    two buckets, so the package tables of the batches concatenate into the
+    table of an in-memory run and the metrics come out identical. The
+    row-level sheets (raw, parsed and window data) are not exported.
+
+    Args:
+        memory_budget: Target peak memory, in bytes.
+        checkpoint_path: Optional package checkpoint, as in `add_package_info`.
+    """
     print("Select a S04 data file (CSV format) from Log Monitor...")
     try:
-        raw_df = load_data()
+        file_path = select_file(file_types=["csv"])
     except ValueError as e:
         print(e)
         return
-    print("Parsing data...")
-    format_df = format_data(raw_df)
-    parsed_df, interim_df = parse_data(format_df)
-    clean_df = drop_constant_cols(parsed_df)
 
-    print("Select time window for analysis:")
-    window_df, start_ts, end_ts = select_window_cli(clean_df, WINDOW_TIME)
+    with spill_area() as root:
+        spilled = spill_scan_export(file_path, root, memory_budget)
+        if pd.isna(spilled.start_ts):
+            print("No timestamped S04 rows in the export.")
+            return
+
+        print("Select time window for analysis:")
+        print(f"Start Time: {spilled.start_ts}")
+        print(f"End Time: {spilled.end_ts}")
+        print(f"Delta Time: {spilled.end_ts - spilled.start_ts}\n")
+        start, end, status = prompt_window(
+            spilled.start_ts, spilled.end_ts, WINDOW_TIME
+        )
+        start_ts, end_ts = (
+            (spilled.start_ts, spilled.end_ts) if status == "full" else (start, end)
+        )
+
+        mapping_destination_names = load_mapping()
+        if mapping_destination_names is None:
+            print("Mapping loading failed. Exiting analysis.")
+            return
+
+        # The false-positive list is matched once against the whole window
+        do_cleanup = (
+            input(
+                "Do you want to clean up wrong sortCodes using the Excel file? (yes/no): "
+            )
+            .strip()
+            .lower()
+        )
+        bad_ids_df = None
+        false_positives_df = None
+        if do_cleanup == "yes":
+            bad_ids_df = load_false_positive_list()
+            false_positives_df = (
+                pd.DataFrame(columns=FALSE_POSITIVE_COLUMNS)
+                if bad_ids_df is None
+                else match_false_positives(
+                    bad_ids_df, _in_window(spilled.scan_defects, start, end, status)
+                )
+            )
+        else:
+            print("\nSkipping sortCode cleanup step.\n")
+
+        checkpoint = load_checkpoint(checkpoint_path) if checkpoint_path else None
+        batches = plan_batches(
+            spilled.rows_per_bucket, memory_budget // ANALYSIS_BYTES_PER_ROW
+        )
+        print(f"\nGetting analysis metrics from {len(batches)} batches of buckets...")
+        packages, jackpots, scan_defects = [], [], []
+        for batch in batches:
+            window_df = concat_events(
+                [read_bucket(root, bucket) for bucket in batch]
+            ).sort_index()
+            window_df = _in_window(window_df, start, end, status)
+            window_df = enrich_window_df(window_df, mapping_destination_names)
+            if bad_ids_df is not None:
+                window_df = apply_false_positives(window_df, false_positives_df)
+            window_df, checkpoint = sessionize(window_df, checkpoint)
+            if not checkpoint_path:
+                checkpoint = None
+
+            packages.append(package_summary(window_df))
+            is_jackpot = (window_df["sortCode"] == 0) & window_df["Is_Jackpot"]
+            jackpots.append(
+                window_df.loc[
+                    is_jackpot.fillna(False),
+                    [
+                        "RealPackageID",
+                        "sortCode",
+                        "Is_Jackpot",
+                        "Beumer_Destination",
+                        "Amazon_Destination",
+                    ],
+                ]
+            )
+            scan_defects.append(
+                window_df.loc[
+                    window_df["sortCode"].isin([8, 9, 10]),
+                    ["itemID", "indexNo", "timeStamp", "sortCode"],
+                ]
+            )
+            del window_df
+
+    if checkpoint_path:
+        save_checkpoint(checkpoint, checkpoint_path)
+        print(f"Package checkpoint saved to {checkpoint_path}")
+
+    # Same row order as the sorted window of an in-memory run
+    scan_defects_df = (
+        concat_events(scan_defects)
+        .sort_index()
+        .sort_values(["itemID", "timeStamp"])
+        .drop(columns="itemID")
+    )
+    analysis_results = {
+        # Metadata
+        "start_ts": start_ts,
+        "end_ts": end_ts,
+        "S04_processed": spilled.telegrams,
+        **analysis_metrics(
+            concat_events(packages, ignore_index=True), concat_events(jackpots)
+        ),
+        "scan_defects": scan_defects_df,
+        "false_positives": false_positives_df,
+    }
+
+    export_to_excel(analysis_results)
+
+
+def main(
+    use_cache: bool = True,
+    clear_cache: bool = False,
+    store_site: Optional[str] = None,
+    sweep: Optional[tuple[int, int]] = None,
+    checkpoint_path: Optional[str] = None,
+    memory_budget_mb: Optional[int] = None,
+    workers: int = 1,
+    merge: bool = False,
+):
+    if memory_budget_mb:
+        run_out_of_core(memory_budget_mb * 1024 * 1024, checkpoint_path)
+        return
+
+    if clear_cache:
+        print(f"Removed {purge_cache()} cached parse results")
+
+    if store_site:
+        try:
+            window_df, start_ts, end_ts, frames = select_store_window(store_site)
+        except ValueError as e:
+            print(e)
+            return
+    elif merge:
+        print("Select the S04 data files (CSV format) from Log Monitor to merge...")
+        try:
+            frames = load_merged_scan_frames(select_files(file_types=["csv"]))
+        except ValueError as e:
+            print(e)
+            return
+        clean_df = frames["clean"]
+
+        print("Select time window for analysis:")
+        window_df, start_ts, end_ts = select_window_cli(clean_df, WINDOW_TIME)
+    else:
+        print("Select a S04 data file (CSV format) from Log Monitor...")
+        try:
+            file_path = select_file(file_types=["csv"])
+            # Key on the S04 messageCode too, the cached frames only hold S04 rows
+            key = cache_key(file_path, S04_MESSAGE_CODE) if use_cache else None
+            frames = load_scan_frames(file_path, key, ["clean"], workers)
+        except ValueError as e:
+            print(e)
+            return
+        clean_df = frames["clean"]
+
+        print("Select time window for analysis:")
+        window_df, start_ts, end_ts = select_window_cli(clean_df, WINDOW_TIME)
 
     mapping_destination_names = load_mapping()
-    if not mapping_destination_names:
+    if mapping_destination_names is None:
         print("Mapping loading failed. Exiting analysis.")
         return
 
@@ -705,49 +1606,143 @@ def main():
         print(
             "\nYou selected to remove false positives. Please upload your Excel file containing the indexNo values to remove."
         )
-        window_df = remove_false_positives(window_df)
+        window_df, false_positives_df = remove_false_positives(window_df)
     else:
+        false_positives_df = None
         print("\nSkipping sortCode cleanup step.\n")
 
     print("\nGetting analysis metrics...")
-    window_df = add_package_info(window_df)
-    scanner_df = scanner_metrics(window_df)
-    sort_code_results = sort_code_metrics(window_df)
-    defect_df = defect_metrics(window_df)
-    jackpot_df = jackpot_metrics(window_df)
+    packages = None
+    if workers > 1:
+        window_df, packages = add_package_info_parallel(
+            window_df, workers, checkpoint_path=checkpoint_path
+        )
+    else:
+        window_df = add_package_info(window_df, checkpoint_path=checkpoint_path)
+
+    if sweep:
+        window_minutes, step_minutes = sweep
+        print(f"Sweeping {window_minutes} min windows every {step_minutes} min...")
+        sweep_df = sweep_metrics(window_df, window_minutes, step_minutes)
+        totals = sweep_df[sweep_df["category"] == ""]
+        print(
+            totals.pivot_table(
+                index="window_start", columns="metric", values="value", sort=False
+            ).to_string()
+        )
+        export = input("Export the sweep to Excel? (yes/no): ").strip().lower()
+        if export == "yes":
+            export_sweep_to_excel(sweep_df)
+        return
+
+    if packages is None:
+        packages = package_summary(window_df)
+    metrics = analysis_metrics(packages, window_df)
+
+    # Full frames for the export; on a cache hit they are only read now
+    if "interim" not in frames:
+        frames = load_scan_frames(file_path, key, ["interim"])
+    interim_df = frames["interim"]
+    parsed_df = explode_attempts(interim_df)
 
     analysis_results = {
         # Metadata
         "start_ts": start_ts,
         "end_ts": end_ts,
         "S04_processed": interim_df.shape[0],
-        "package_processed": window_df["RealPackageID"].nunique(),
-        "unique_packages": scanner_df.loc[
-            scanner_df["metric"] == "total_packages", "count"
-        ].values[0],
-        "recirculation_packages": sort_code_results["recirculation_count"],
-        "recirculation_records": window_df[
-            window_df["RealPackageID"].isin(
-                window_df.loc[
-                    window_df.duplicated("RealPackageID", keep=False), "RealPackageID"
-                ]
-            )
-        ].shape[0],
-        "jackpot_packages": jackpot_df,
+        **metrics,
         # DataFrames
-        "defect_summary": defect_df,
-        "sort_code_summary": sort_code_results["sort_counts"],
-        "reason_dest_pivot": sort_code_results["reason_dest_pivot"],
         "parsed_df": parsed_df,
         "window_df": window_df,
         "scan_defects": window_df[window_df["sortCode"].isin([8, 9, 10])][
             ["indexNo", "timeStamp", "sortCode"]
         ].copy(),
         "interim_df": interim_df,
+        "false_positives": false_positives_df,
     }
 
     export_to_excel(analysis_results)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="S04 scan analysis")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="parse the export again without reading or writing the cache",
+    )
+    parser.add_argument(
+        "--purge-cache",
+        action="store_true",
+        help="delete all cached parse results before running",
+    )
+    parser.add_argument(
+        "--ingest",
+        metavar="SITE",
+        help="add a Log Monitor export to the event store of SITE and exit",
+    )
+    parser.add_argument(
+        "--store",
+        metavar="SITE",
+        help="analyse a time window read from the event store of SITE",
+    )
+    parser.add_argument(
+        "--sweep",
+        nargs=2,
+        type=int,
+        metavar=("WINDOW", "STEP"),
+        help="compute the metrics for every WINDOW-minute window (both ends included, as when a window is selected), one every STEP minutes, inside the selected time range",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="PATH",
+        help="resume the packages of the previous export from PATH and save the new state there",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        metavar="MB",
+        help="analyse an export larger than memory in buckets of itemIDs, keeping peak memory near MB megabytes",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="parse large exports and split the packages of the window over N processes",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="analyse several time-sliced exports as one, merged in time order",
+    )
+    args = parser.parse_args()
+    if args.sweep and (min(args.sweep) <= 0 or args.sweep[0] % args.sweep[1]):
+        parser.error("--sweep WINDOW must be a positive multiple of STEP")
+    if args.memory_budget is not None and args.memory_budget <= 0:
+        parser.error("--memory-budget must be a positive number of MB")
+    if args.memory_budget and (args.store or args.sweep):
+        parser.error("--memory-budget cannot be combined with --store or --sweep")
+    if args.merge and (args.store or args.memory_budget):
+        parser.error("--merge cannot be combined with --store or --memory-budget")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and args.memory_budget:
+        parser.error("--workers cannot be combined with --memory-budget")
+    if args.ingest:
+        print("Select a Log Monitor data file (CSV format) to add to the store...")
+        try:
+            ingest_log_monitor(args.ingest)
+        except ValueError as e:
+            print(e)
+    else:
+        main(
+            use_cache=not args.no_cache,
+            clear_cache=args.purge_cache,
+            store_site=args.store,
+            sweep=args.sweep,
+            checkpoint_path=args.checkpoint,
+            memory_budget_mb=args.memory_budget,
+            workers=args.workers,
+            merge=args.merge,
+        )
@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Parsed frames are stored under data/cache/<key>/, one Parquet file per frame
+CACHE_DIR = "data/cache"
+# Bump whenever loading/parsing changes the frames, so stale entries are ignored
+PARSER_VERSION = "5"
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Value kinds used to store mixed int/str object columns losslessly
+_KIND_NAN, _KIND_NONE, _KIND_STR, _KIND_INT = 0, 1, 2, 3
+_KIND_SUFFIX = "__kind"
+_INDEX_COLUMN = "__index__"
+
+
+def file_digest(file_path: str, chunk_size: int = HASH_CHUNK_BYTES) -> str:
+    """Return the BLAKE2b hex digest of a file's content, read in chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(file_path: str, *parts: str) -> str:
+    """
+    Build the cache key for a source file.
+
+    The key combines the file content hash, PARSER_VERSION and any extra
+    parts (e.g. the messageCode), so renamed copies of an export share an
+    entry while edited exports or parser changes get a new one.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(file_digest(file_path).encode())
+    for part in (PARSER_VERSION, *parts):
+        digest.update(b"\0" + str(part).encode())
+    return digest.hexdigest()
+
+
+def _encode_scalars(values: np.ndarray) -> Optional[tuple[pa.Array, pa.Array]]:
+    """
+    Encode str/int/NaN/None values as a string array plus a kind array.
+
+    Returns None when other Python types are present.
+    """
+    types = np.fromiter(map(type, values), dtype=object, count=len(values))
+    is_none = types == type(None)
+    is_str = types == str
+    is_int = types == int
+    is_nan = (types == float) & pd.isna(values)
+    if not (is_str | is_int | is_nan | is_none).all():
+        return None
+
+    kind = np.full(len(values), _KIND_NAN, dtype=np.int8)
+    kind[is_none] = _KIND_NONE
+    kind[is_str] = _KIND_STR
+    kind[is_int] = _KIND_INT
+    text = np.where(is_str | is_int, values, None)
+    text[is_int] = [str(v) for v in values[is_int]]
+    return pa.array(text, type=pa.string()), pa.array(kind)
+
+
+def _decode_scalars(text: pa.Array, kind: np.ndarray) -> np.ndarray:
+    """Inverse of `_encode_scalars`."""
+    text = text.to_numpy(zero_copy_only=False)
+    values = np.full(len(text), np.nan, dtype=object)
+    values[kind == _KIND_NONE] = None
+    values[kind == _KIND_STR] = text[kind == _KIND_STR]
+    values[kind == _KIND_INT] = text[kind == _KIND_INT].astype(np.int64).tolist()
+    return values
+
+
+def _encode_column(s: pd.Series) -> tuple[str, list[pa.Array]]:
+    """
+    Convert one column to Arrow arrays, keeping Python object values intact.
+
+    Returns the encoding name stored in the file metadata and the arrays.
+    """
+    # Arrow-backed columns (e.g. the ragged S04 arrays) are stored as they are
+    if isinstance(s.dtype, pd.ArrowDtype):
+        return "arrow", [pa.array(s.array)]
+    # Nullable ints and categoricals map onto Arrow types, their pandas dtype
+    # is restored from the metadata on load
+    if isinstance(s.dtype, pd.api.extensions.ExtensionDtype):
+        return "extension", [pa.array(s, from_pandas=True)]
+    if s.dtype != object:
+        return "native", [pa.array(s, from_pandas=True)]
+
+    values = s.to_numpy()
+    missing = s.isna().to_numpy()
+
+    # Strings with one kind of missing value map onto an Arrow string column
+    if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+        none_missing = np.array([v is None for v in values[missing]], dtype=bool)
+        if not none_missing.any():
+            return "str_nan", [pa.array(values, type=pa.string(), from_pandas=True)]
+        if none_missing.all():
+            return "str_none", [pa.array(values, type=pa.string(), from_pandas=True)]
+
+    # Lists of str/int values (e.g. mixed S04 arrays) become Arrow list columns
+    if all(type(v) is list for v in values):
+        offsets = np.zeros(len(values) + 1, dtype=np.int32)
+        np.cumsum([len(v) for v in values], out=offsets[1:])
+        flat = np.empty(offsets[-1], dtype=object)
+        flat[:] = [x for v in values for x in v]
+        encoded = _encode_scalars(flat)
+        if encoded is not None:
+            offsets = pa.array(offsets)
+            return "list_mixed", [
+                pa.ListArray.from_arrays(offsets, encoded[0]),
+                pa.ListArray.from_arrays(offsets, encoded[1]),
+            ]
+
+    # int/str mixes (e.g. exploded sortCode next to "Unused") use a kind column
+    encoded = _encode_scalars(values)
+    if encoded is not None:
+        return "mixed", list(encoded)
+
+    # Anything else is pickled value by value
+    return "pickle", [pa.array([pickle.dumps(v) for v in values], type=pa.binary())]
+
+
+def _decode_column(
+    table: pa.Table, name: str, encoding: str, index: pd.Index
+) -> pd.Series:
+    """Inverse of `_encode_column` for one column of a cached table."""
+    column = table.column(name).combine_chunks()
+    if encoding in ("native", "extension"):
+        s = column.to_pandas()
+        s.index = index
+        return s.rename(name)
+    if encoding == "arrow":
+        return pd.Series(pd.arrays.ArrowExtensionArray(column), index=index, name=name)
+
+    if encoding == "pickle":
+        values = np.empty(len(column), dtype=object)
+        values[:] = [pickle.loads(v) for v in column.to_pylist()]
+    elif encoding == "mixed":
+        kind = table.column(name + _KIND_SUFFIX).to_numpy()
+        values = _decode_scalars(column, kind)
+    elif encoding == "list_mixed":
+        kind = table.column(name + _KIND_SUFFIX).combine_chunks()
+        flat = _decode_scalars(column.flatten(), kind.flatten().to_numpy()).tolist()
+        offsets = column.offsets.to_numpy()
+        offsets = (offsets - offsets[0]).tolist()
+        values = np.empty(len(column), dtype=object)
+        values[:] = [flat[i:j] for i, j in zip(offsets[:-1], offsets[1:])]
+    else:
+        values = column.to_numpy(zero_copy_only=False)
+        if encoding == "str_nan":
+            values[column.is_null().to_numpy(zero_copy_only=False)] = np.nan
+
+    return pd.Series(values, index=index, dtype=object, name=name)
+
+
+def save_frame(df: pd.DataFrame, path: str) -> None:
+    """
+    Write a DataFrame to Parquet so `load_frame` returns an identical copy.
+
+    Object columns holding only strings are stored natively; mixed int/str
+    columns and lists of such values are encoded so their Python types
+    survive the round trip. Arrow-backed, nullable int and categorical
+    columns keep their dtype. The index and `df.attrs` (which must be
+    JSON-serializable) are stored too.
+    """
+    names: list[str] = []
+    arrays: list[pa.Array] = []
+    encodings: dict[str, str] = {}
+    dtypes: dict[str, str] = {}
+
+    for name in df.columns:
+        encoding, encoded = _encode_column(df[name])
+        encodings[name] = encoding
+        if encoding == "extension":
+            dtypes[name] = str(df[name].dtype)
+        names.extend([name, name + _KIND_SUFFIX][: len(encoded)])
+        arrays.extend(encoded)
+
+    names.append(_INDEX_COLUMN)
+    arrays.append(pa.array(df.index.to_numpy(), from_pandas=True))
+
+    meta = {
+        "columns": list(df.columns),
+        "encodings": encodings,
+        "dtypes": dtypes,
+        "attrs": df.attrs,
+    }
+    table = pa.Table.from_arrays(arrays, names=names)
+    table = table.replace_schema_metadata({"frame": json.dumps(meta)})
+    pq.write_table(table, path)
+
+
+def load_frame(path: str) -> pd.DataFrame:
+    """Read a DataFrame written by `save_frame`."""
+    table = pq.read_table(path)
+    meta = json.loads(table.schema.metadata[b"frame"])
+    index = pd.Index(table.column(_INDEX_COLUMN).to_numpy())
+
+    columns = {
+        name: _decode_column(table, name, meta["encodings"][name], index)
+        for name in meta["columns"]
+    }
+    for name, dtype in meta.get("dtypes", {}).items():
+        if dtype != "category":
+            columns[name] = columns[name].astype(dtype)
+    df = pd.DataFrame(columns, index=index, columns=meta["columns"])
+    df.attrs.update(meta.get("attrs", {}))
+    return df
+
+
+def load_cached(key: str, names: list[str]) -> Optional[dict[str, pd.DataFrame]]:
+    """
+    Return the cached frames stored under `key`, or None on a cache miss.
+
+    Unreadable entries are treated as a miss so a broken cache never stops
+    an analysis; the frames are simply parsed again and rewritten.
+    """
+    entry = os.path.join(CACHE_DIR, key)
+    paths = {name: os.path.join(entry, f"{name}.parquet") for name in names}
+    if not all(os.path.exists(path) for path in paths.values()):
+        return None
+
+    try:
+        return {name: load_frame(path) for name, path in paths.items()}
+    except Exception as e:
+        print(f"Ignoring unreadable cache entry {entry}: {e}")
+        return None
+
+
+def save_cached(key: str, frames: dict[str, pd.DataFrame], source: str) -> None:
+    """Store `frames` under `key`, writing to a temporary folder first."""
+    entry = os.path.join(CACHE_DIR, key)
+    tmp_entry = entry + ".tmp"
+    shutil.rmtree(tmp_entry, ignore_errors=True)
+    os.makedirs(tmp_entry)
+
+    for name, df in frames.items():
+        save_frame(df, os.path.join(tmp_entry, f"{name}.parquet"))
+    with open(os.path.join(tmp_entry, "source.json"), "w", encoding="utf-8") as f:
+        json.dump({"source": source, "parser_version": PARSER_VERSION}, f)
+
+    shutil.rmtree(entry, ignore_errors=True)
+    os.replace(tmp_entry, entry)
+
+
+def purge_cache() -> int:
+    """
+    Delete every parse cache entry and return how many were removed.
+
+    Only the folders written by `save_cached` (they hold a source.json) are
+    entries; everything else under CACHE_DIR, such as the mapping cache,
+    spill folders or package checkpoints, is left alone.
+    """
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+    removed = 0
+    for name in os.listdir(CACHE_DIR):
+        entry = os.path.join(CACHE_DIR, name)
+        if not os.path.isfile(os.path.join(entry, "source.json")):
+            continue
+        try:
+            shutil.rmtree(entry)
+        except OSError as e:
+            print(f"Could not remove cache entry {entry}: {e}")
+            continue
+        removed += 1
+    return removed
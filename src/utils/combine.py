@@ -1,6 +1,19 @@
-import os
+import csv
 import glob
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Any, Callable, Iterator, Optional
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Filas leídas por bloque; cada bloque se escribe como un row group de Parquet
+COMBINE_CHUNK_ROWS = 100_000
+
 
 def combine_logs_to_csv(log_dir: str, output_csv: str) -> None:
     """
@@ -17,7 +30,9 @@ def combine_logs_to_csv(log_dir: str, output_csv: str) -> None:
     for f in all_files:
         try:
             # Usar separador ';' (clave para que tus columnas coincidan)
-            df = pd.read_csv(f, sep=";", engine="python", encoding="utf-8", on_bad_lines="skip")
+            df = pd.read_csv(
+                f, sep=";", engine="python", encoding="utf-8", on_bad_lines="skip"
+            )
             df["source_file"] = os.path.basename(f)  # opcional
             dfs.append(df)
         except Exception as e:
@@ -33,7 +48,208 @@ def combine_logs_to_csv(log_dir: str, output_csv: str) -> None:
     print(f"\n✅ CSV combinado generado en: {output_csv}")
     print(f"Total de filas: {len(combined_df)} | Columnas: {len(combined_df.columns)}")
 
+
+class _ValidRecords:
+    """
+    Archivo de texto sin las líneas de los registros con errores de comillas.
+
+    Con chunksize, el motor "python" de pandas no salta los registros que el
+    módulo csv rechaza (p. ej. una comilla suelta) y falla todo el archivo,
+    mientras que la lectura completa de combine_logs_to_csv sólo los descarta.
+    Aquí cada registro se lee antes con el mismo dialecto que usa pandas y sus
+    líneas sólo se entregan si no dan error, así que los bloques tienen las
+    mismas filas que la lectura completa.
+    """
+
+    def __init__(self, f: IO[str]):
+        self._lines = self._valid_lines(f)
+
+    @staticmethod
+    def _valid_lines(f: IO[str]) -> Iterator[str]:
+        record: list[str] = []
+
+        def read_lines() -> Iterator[str]:
+            for line in f:
+                record.append(line)
+                yield line
+
+        reader = csv.reader(read_lines(), delimiter=";", strict=True)
+        while True:
+            try:
+                next(reader)
+            except StopIteration:
+                return
+            except csv.Error:
+                record.clear()
+                continue
+            yield from record
+            record.clear()
+
+    def __iter__(self) -> "_ValidRecords":
+        return self
+
+    def __next__(self) -> str:
+        return next(self._lines)
+
+    def readline(self) -> str:
+        return next(self._lines, "")
+
+    def read(self, size: int = -1) -> str:
+        return "".join(self._lines)
+
+
+def _log_schema(columns: list[str]) -> pa.Schema:
+    """Esquema de un log: todas las columnas como texto y source_file categórico."""
+    return pa.schema(
+        [(col, pa.string()) for col in columns]
+        + [("source_file", pa.dictionary(pa.int32(), pa.string()))]
+    )
+
+
+def _log_to_parquet(path: str, part_path: str) -> tuple[int, Optional[str]]:
+    """
+    Lee un log por bloques y escribe cada bloque como un row group de `part_path`.
+
+    Se ejecuta en un proceso del pool de `combine_logs_to_parquet`. Las
+    columnas se leen como texto para que todos los bloques (y todos los
+    archivos) tengan el mismo esquema. Las líneas con errores se descartan
+    como en combine_logs_to_csv (ver `_ValidRecords`).
+
+    Returns:
+        tuple[int, Optional[str]]: Filas leídas y el error, None si no hubo.
+    """
+    rows = 0
+    writer = None
+    try:
+        with open(path, encoding="utf-8", newline="") as f:
+            chunks = pd.read_csv(
+                _ValidRecords(f),
+                sep=";",
+                engine="python",
+                on_bad_lines="skip",
+                dtype=str,
+                chunksize=COMBINE_CHUNK_ROWS,
+            )
+            for chunk in chunks:
+                chunk["source_file"] = pd.Categorical(
+                    [os.path.basename(path)] * len(chunk)
+                )
+                if writer is None:
+                    schema = _log_schema([str(col) for col in chunk.columns[:-1]])
+                    writer = pq.ParquetWriter(part_path, schema)
+                chunk.columns = writer.schema.names
+                writer.write_table(
+                    pa.Table.from_pandas(
+                        chunk, schema=writer.schema, preserve_index=False
+                    )
+                )
+                rows += len(chunk)
+    except Exception as e:
+        # El archivo no se añade, aunque ya se escribieran algunos bloques
+        return 0, f"{type(e).__name__}: {e}"
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        return 0, "El archivo no tiene filas"
+    return rows, None
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    """Llama a `func(*args)` y devuelve su resultado y los segundos que tardó."""
+    start = time.perf_counter()
+    return func(*args), time.perf_counter() - start
+
+
+def combine_logs_to_parquet(
+    log_dir: str, output_path: str, workers: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Combina todos los archivos .log en un único Parquet, leyéndolos en paralelo.
+
+    Cada proceso del pool lee un log por bloques de COMBINE_CHUNK_ROWS filas
+    y los escribe en un Parquet temporal propio; después se copian al archivo
+    final row group a row group, en orden de nombre de archivo. Así la
+    memoria depende del tamaño de los bloques y del número de procesos, no
+    del número de archivos de la carpeta.
+
+    Las columnas son las del primer archivo (leídas como texto) más
+    source_file, categórica. Un archivo con otras columnas no se añade y
+    queda como error en el informe.
+
+    Args:
+        log_dir: Carpeta con los archivos .log (separador ';').
+        output_path: Parquet de salida.
+        workers: Número de procesos, por defecto uno por CPU.
+
+    Returns:
+        pd.DataFrame: Informe con una fila por archivo: source_file, rows
+        (filas añadidas), seconds (tiempo de lectura) y error (None si se
+        añadió).
+    """
+    all_files = sorted(glob.glob(os.path.join(log_dir, "*.log")))
+    report = pd.DataFrame(
+        {
+            "source_file": [os.path.basename(f) for f in all_files],
+            "rows": 0,
+            "seconds": 0.0,
+            "error": None,
+        }
+    )
+    if not all_files:
+        return report
+
+    workers = min(workers or os.cpu_count() or 1, len(all_files))
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(output_path)))
+    writer = None
+    try:
+        parts = [
+            os.path.join(tmp_dir, f"{i:06d}.parquet") for i in range(len(all_files))
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_timed, _log_to_parquet, f, part)
+                for f, part in zip(all_files, parts)
+            ]
+            # Los archivos se añaden en orden a medida que terminan
+            for i, future in enumerate(futures):
+                (rows, error), seconds = future.result()
+                report.loc[i, "seconds"] = seconds
+                if error is None:
+                    part = pq.ParquetFile(parts[i])
+                    if writer is None:
+                        writer = pq.ParquetWriter(output_path, part.schema_arrow)
+                    if part.schema_arrow.equals(writer.schema):
+                        for group in range(part.num_row_groups):
+                            writer.write_table(part.read_row_group(group))
+                    else:
+                        rows = 0
+                        error = "Columnas distintas de las del primer archivo"
+                report.loc[i, ["rows", "error"]] = [rows, error]
+                if os.path.exists(parts[i]):
+                    os.remove(parts[i])
+    finally:
+        if writer is not None:
+            writer.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return report
+
+
 if __name__ == "__main__":
     log_dir = input("Ruta de la carpeta con logs: ").strip()
-    output_csv = "combined_logs.csv"
-    combine_logs_to_csv(log_dir, output_csv)
+    output_format = input("Formato de salida (csv/parquet) [csv]: ").strip().lower()
+    if output_format == "parquet":
+        output_path = "combined_logs.parquet"
+        report = combine_logs_to_parquet(log_dir, output_path)
+        if report.empty:
+            print(f"No se encontraron archivos .log en {log_dir}")
+        elif report["error"].notna().all():
+            print(report.to_string(index=False))
+            print("No se pudo leer ningún archivo válido.")
+        else:
+            print(report.to_string(index=False))
+            print(f"\n✅ Parquet combinado generado en: {output_path}")
+            print(f"Total de filas: {report['rows'].sum()}")
+    else:
+        output_csv = "combined_logs.csv"
+        combine_logs_to_csv(log_dir, output_csv)
@@ -1,11 +1,37 @@
 import csv
+import os
 import tkinter as tk
-from io import StringIO
+from io import BytesIO, StringIO
 from tkinter import filedialog
-from typing import Literal, Optional
+from typing import Iterable, Iterator, Literal, Optional
 
+import numpy as np
 import pandas as pd
 
+# Streaming reader settings for Log Monitor exports
+CHUNK_SIZE_BYTES = 32 * 1024 * 1024  # bytes read from disk per chunk
+MESSAGE_CODE_FIELD = 9  # 0-based position of messageCode in a Log Monitor line
+# Bytes ignored when comparing messageCode, the same ones format_data removes
+_IGNORED_BYTES = b' \t\r\n\x0b\x0c"'
+# Bytes stripped from every Log Monitor cell: double quotes and whitespace
+_STRIPPED_BYTES = b' \t\r\x0b\x0c\x1c\x1d\x1e\x1f"'
+
+# Column layout of a Log Monitor export line
+LOG_MONITOR_COLUMNS = [
+    "timeStamp",
+    "flag",
+    "systemName",
+    "ipAddress",
+    "sender",
+    "unkown",
+    "unkown_2",
+    "timeStampPLC",
+    "mainCabinetName",
+    "messageCode",
+    "sequenceNo",
+    "rawMessage",
+]
+
 
 def select_file(
     file_types: Optional[list[Literal["csv", "excel"]]] = None,
@@ -28,6 +54,53 @@ def select_file(
     if file_path:
         return file_path
 
+    root = tk.Tk()
+    root.withdraw()
+    selected_path = filedialog.askopenfilename(
+        title="Select File",
+        filetypes=_dialog_filetypes(file_types),
+    )
+    root.destroy()
+
+    if not selected_path:
+        raise ValueError("No file selected. Please select a valid file.")
+
+    return selected_path
+
+
+def select_files(
+    file_types: Optional[list[Literal["csv", "excel"]]] = None,
+) -> list[str]:
+    """
+    Select one or more files with a file picker.
+
+    Args:
+        file_types: List of file types to filter in dialog, see `select_file`.
+
+    Returns:
+        list[str]: The selected paths, sorted by name.
+
+    Raises:
+        ValueError: If no file is selected.
+    """
+    root = tk.Tk()
+    root.withdraw()
+    selected_paths = filedialog.askopenfilenames(
+        title="Select Files",
+        filetypes=_dialog_filetypes(file_types),
+    )
+    root.destroy()
+
+    if not selected_paths:
+        raise ValueError("No file selected. Please select at least one file.")
+
+    return sorted(selected_paths)
+
+
+def _dialog_filetypes(
+    file_types: Optional[list[Literal["csv", "excel"]]],
+) -> list[tuple[str, str]]:
+    """File type filters of the file picker, preferred types first."""
     # Build filetypes for dialog based on preferences
     if file_types is None:
         file_types = ["csv", "excel"]
@@ -43,24 +116,270 @@ def select_file(
 
     # Always add "All files" at the end
     filetypes.append(("All files", "*.*"))
+    return filetypes
 
-    root = tk.Tk()
-    root.withdraw()
-    selected_path = filedialog.askopenfilename(
-        title="Select File",
-        filetypes=filetypes,
+
+def timestamp_keys(lines: list[bytes]) -> np.ndarray:
+    """
+    Sort key of every Log Monitor line: its timeStamp field, as bytes.
+
+    Log Monitor writes fixed-width "yymmdd HHMMSS fff" server times, so once
+    quotes and spaces are removed the bytes sort in time order without
+    being decoded.
+    """
+    return np.array(
+        [line.split(b";", 1)[0].translate(None, _IGNORED_BYTES) for line in lines],
+        dtype=bytes,
     )
-    root.destroy()
 
-    if not selected_path:
-        raise ValueError("No file selected. Please select a valid file.")
 
-    return selected_path
+def line_ranges(file_path: str, n_ranges: int) -> list[tuple[int, int]]:
+    """
+    Split a file into up to `n_ranges` byte ranges of similar size.
+
+    Every range starts at the beginning of a line and ends just after a
+    newline (or at the end of the file), so each line belongs to exactly
+    one range. Ranges are returned in file order.
+    """
+    size = os.path.getsize(file_path)
+    cuts = [0]
+    with open(file_path, "rb") as f:
+        for i in range(1, n_ranges):
+            f.seek(max(size * i // n_ranges, cuts[-1]))
+            f.readline()  # move to the start of the next line
+            cuts.append(min(f.tell(), size))
+    cuts.append(size)
+    return [(lo, hi) for lo, hi in zip(cuts, cuts[1:]) if hi > lo]
+
+
+def iter_log_lines(
+    file_path: str,
+    message_codes: Iterable[str],
+    chunk_size: int = CHUNK_SIZE_BYTES,
+    byte_range: Optional[tuple[int, int]] = None,
+) -> Iterator[tuple[list[bytes], int]]:
+    """
+    Stream a Log Monitor CSV and yield the lines with the wanted messageCodes.
+
+    The file is read in `chunk_size` byte blocks; NUL bytes are stripped and
+    lines are filtered on their raw bytes before any CSV parsing, so only
+    one block and its kept lines are held at a time.
+
+    Args:
+        file_path: Path to the Log Monitor CSV export.
+        message_codes: messageCode values to keep (e.g. ["54177"]).
+        chunk_size: Number of bytes read from disk per iteration.
+        byte_range: Optional (start, stop) byte offsets to read, as returned
+            by `line_ranges`. Defaults to the whole file.
+
+    Yields:
+        tuple[list[bytes], int]: The kept lines of a block (without their
+            newline) and the number of lines the block held.
+    """
+    wanted = {code.encode() for code in message_codes}
+    n_split = MESSAGE_CODE_FIELD + 1
+
+    def filter_lines(block: bytes) -> tuple[list[bytes], int]:
+        lines = block.split(b"\n")
+        kept = [
+            line
+            for line in lines
+            if len(fields := line.split(b";", n_split)) > MESSAGE_CODE_FIELD
+            and fields[MESSAGE_CODE_FIELD].translate(None, _IGNORED_BYTES) in wanted
+        ]
+        return kept, len(lines)
+
+    start, stop = byte_range or (0, os.path.getsize(file_path))
+    tail = b""
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        while f.tell() < stop:
+            chunk = f.read(min(chunk_size, stop - f.tell()))
+            if not chunk:
+                break
+            chunk = tail + chunk.replace(b"\x00", b"")  # strip nulls
+
+            # Only complete lines are filtered, the rest waits for more bytes
+            cut = chunk.rfind(b"\n")
+            if cut < 0:
+                tail = chunk
+                continue
+            tail = chunk[cut + 1 :]
+            yield filter_lines(chunk[:cut])
+
+    if tail:
+        yield filter_lines(tail)
+
+
+def read_log_lines(
+    file_path: str,
+    message_codes: Iterable[str],
+    chunk_size: int = CHUNK_SIZE_BYTES,
+    byte_range: Optional[tuple[int, int]] = None,
+) -> tuple[bytes, int, int]:
+    """
+    Stream a Log Monitor CSV and keep only lines with the wanted messageCodes.
+
+    Peak memory depends on the chunk size and the kept lines only (see
+    `iter_log_lines`).
+
+    Args:
+        file_path: Path to the Log Monitor CSV export.
+        message_codes: messageCode values to keep (e.g. ["54177"]).
+        chunk_size: Number of bytes read from disk per iteration.
+        byte_range: Optional (start, stop) byte offsets to read, see
+            `line_ranges`.
+
+    Returns:
+        tuple[bytes, int, int]: The kept lines, how many lines were kept and
+            the total number of lines read.
+    """
+    kept: list[bytes] = []
+    total_lines = 0
+    for lines, n_lines in iter_log_lines(
+        file_path, message_codes, chunk_size, byte_range
+    ):
+        kept.extend(lines)
+        total_lines += n_lines
+
+    data = b"\n".join(kept) + b"\n" if kept else b""
+    return data, len(kept), total_lines
+
+
+def parse_log_lines(data: bytes) -> tuple[pd.DataFrame, int]:
+    """
+    Tokenize Log Monitor lines into the 12-column layout with the C engine.
+
+    Quotes and whitespace are stripped from the raw bytes before
+    tokenization, which replaces the frame-wide `df.replace` cleaning.
+    Lines that do not have exactly 12 fields are re-read with the python
+    engine and the original settings; whatever still fails is skipped.
+
+    Args:
+        data: Raw Log Monitor lines (NUL bytes already removed).
+
+    Returns:
+        tuple[pd.DataFrame, int]: Cleaned string frame named after
+            LOG_MONITOR_COLUMNS and the number of skipped lines.
+    """
+    n_fields = len(LOG_MONITOR_COLUMNS)
+    n_sep = n_fields - 1
+    read_fast = dict(
+        sep=";",
+        header=None,
+        names=LOG_MONITOR_COLUMNS,
+        engine="c",
+        quoting=csv.QUOTE_NONE,
+        dtype=str,
+        na_filter=False,
+        on_bad_lines="skip",
+        encoding="utf-8",
+        encoding_errors="replace",
+    )
+
+    if not data.strip():
+        return pd.DataFrame(columns=LOG_MONITOR_COLUMNS, dtype=str), 0
+
+    # Fast path: every line has exactly 12 fields
+    clean = data.translate(None, _STRIPPED_BYTES)
+    n_lines = clean.count(b"\n") + (not clean.endswith(b"\n"))
+    if clean.count(b";") == n_sep * n_lines:
+        df = pd.read_csv(BytesIO(clean), **read_fast)
+        if len(df) == n_lines:
+            return df, 0
+    del clean
+
+    # Slow path: split well-formed lines from the ones needing a fallback
+    lines = data.split(b"\n")
+    good = [i for i, line in enumerate(lines) if line.count(b";") == n_sep]
+    good_set = set(good)
+    other = [i for i, line in enumerate(lines) if i not in good_set and line.strip()]
+
+    frames = []
+    if good:
+        block = b"\n".join(lines[i] for i in good).translate(None, _STRIPPED_BYTES)
+        df = pd.read_csv(BytesIO(block), **read_fast)
+        df.index = good
+        frames.append(df)
+
+    skipped = 0
+    if other:
+        # Prefix each line with its position so parsed rows keep their order
+        bad_lines: list[list[str]] = []
+        text = b"\n".join(b"%d;%s" % (i, lines[i]) for i in other)
+        df = pd.read_csv(
+            StringIO(text.decode("utf-8", errors="replace")),
+            sep=";",
+            header=None,
+            names=["lineNo"] + LOG_MONITOR_COLUMNS,
+            engine="python",
+            quoting=csv.QUOTE_NONE,
+            skipinitialspace=True,
+            on_bad_lines=lambda fields: bad_lines.append(fields),
+            dtype=str,
+        )
+        df = df.replace('"', "", regex=True)  # Remove all double quotes
+        df = df.replace(r"\s+", "", regex=True)  # Remove all whitespace
+        skipped = len(bad_lines)
+        frames.append(df.set_index(df.pop("lineNo").astype(int)))
+
+    df = pd.concat(frames).sort_index().reset_index(drop=True)
+    return df, skipped
+
+
+def load_log_monitor(
+    file_path: Optional[str] = None,
+    message_codes: Optional[Iterable[str]] = None,
+    chunk_size: int = CHUNK_SIZE_BYTES,
+) -> pd.DataFrame:
+    """
+    Load a Log Monitor CSV export as a clean 12-column string frame.
+
+    Args:
+        file_path: Optional pre-defined file path. If None, opens file dialog.
+        message_codes: Optional messageCodes to keep; other lines are dropped
+                   while streaming the file (see `read_log_lines`).
+        chunk_size: Bytes per chunk for the streaming reader.
+
+    Returns:
+        pd.DataFrame: Columns named after LOG_MONITOR_COLUMNS, with quotes and
+        whitespace already removed from every cell.
+
+    Raises:
+        ValueError: If no file is selected.
+    """
+    file_path = select_file(file_types=["csv"], file_path=file_path)
+
+    print(f"Loading data from {file_path}...")
+
+    if message_codes is not None:
+        message_codes = list(message_codes)
+        data, kept_lines, total_lines = read_log_lines(
+            file_path, message_codes, chunk_size
+        )
+        print(
+            f"Streaming filter: kept {kept_lines} lines with messageCode in {message_codes}"
+            + f"\n\tdropped {total_lines - kept_lines} out of {total_lines} total lines"
+        )
+    else:
+        with open(file_path, "rb") as f:
+            data = f.read().replace(b"\x00", b"")  # strip nulls
+
+    df, skipped = parse_log_lines(data)
+    if skipped:
+        print(
+            f"Skipped {skipped} malformed lines (more than {len(LOG_MONITOR_COLUMNS)} fields)"
+        )
+
+    print(f"Loading data successful, dataframe shape: {df.shape}")
+    return df
 
 
 def load_data(
     file_path: Optional[str] = None,
     file_types: Optional[list[Literal["csv", "excel"]]] = None,
+    message_codes: Optional[Iterable[str]] = None,
+    chunk_size: int = CHUNK_SIZE_BYTES,
 ) -> pd.DataFrame:
     """
     Load CSV/Excel data either via file picker or fixed path.
@@ -69,6 +388,10 @@ def load_data(
         file_path: Optional pre-defined file path. If None, opens file dialog.
         file_types: List of file types to filter in dialog. Options: ["csv", "excel"].
                    If None, allows both CSV and Excel files.
+        message_codes: Optional Log Monitor messageCodes to keep. When given,
+                   CSV files are streamed in chunks and every other line is
+                   dropped before parsing.
+        chunk_size: Bytes per chunk for the streaming CSV reader.
 
     Returns:
         pd.DataFrame: Loaded data as a pandas DataFrame.
@@ -83,8 +406,23 @@ def load_data(
 
     # Handle CSV
     if file_path.lower().endswith(".csv"):
-        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-            text = f.read().replace("\x00", "")  # strip nulls
+        if message_codes is not None:
+            message_codes = list(message_codes)
+            data, kept_lines, total_lines = read_log_lines(
+                file_path, message_codes, chunk_size
+            )
+            text = data.decode("utf-8", errors="replace")
+            print(
+                f"Streaming filter: kept {kept_lines} lines with messageCode in {message_codes}"
+                + f"\n\tdropped {total_lines - kept_lines} out of {total_lines} total lines"
+            )
+        else:
+            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read().replace("\x00", "")  # strip nulls
+
+        if not text.strip():
+            raise ValueError(f"No data rows to load from {file_path}")
+
         buffer = StringIO(text)
         df = pd.read_csv(
             buffer,
@@ -0,0 +1,58 @@
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from utils.data_loader import CHUNK_SIZE_BYTES, load_log_monitor
+from utils.message_codecs import CODECS, decode_messages
+
+
+def demux_frames(
+    df: pd.DataFrame, message_codes: Optional[Iterable[str]] = None
+) -> dict[str, pd.DataFrame]:
+    """
+    Parse each messageCode of a Log Monitor frame with its codec.
+
+    Args:
+        df: Clean Log Monitor frame holding several message codes.
+        message_codes: Codes to return. Defaults to every registered code.
+
+    Returns:
+        dict[str, pd.DataFrame]: One parsed frame per requested messageCode
+        (empty codes are left out).
+    """
+    codes = list(CODECS if message_codes is None else message_codes)
+
+    frames: dict[str, pd.DataFrame] = {}
+    for code, group in df.groupby("messageCode", sort=False):
+        if code not in codes:
+            continue
+        frames[code] = decode_messages(group, code)  # type: ignore[arg-type]
+        print(f"  messageCode {code}: {len(group)} rows")
+
+    return {code: frames[code] for code in codes if code in frames}
+
+
+def demux_log_monitor(
+    file_path: Optional[str] = None,
+    message_codes: Optional[Iterable[str]] = None,
+    chunk_size: int = CHUNK_SIZE_BYTES,
+) -> dict[str, pd.DataFrame]:
+    """
+    Read a combined Log Monitor export once and split it per messageCode.
+
+    The file is streamed and tokenized a single time for all requested
+    codes, so every report of a shift can share the same read.
+
+    Args:
+        file_path: Optional pre-defined file path. If None, opens file dialog.
+        message_codes: Codes to keep. Defaults to every registered code.
+        chunk_size: Bytes per chunk for the streaming reader.
+
+    Returns:
+        dict[str, pd.DataFrame]: One parsed frame per messageCode found.
+    """
+    codes = list(CODECS if message_codes is None else message_codes)
+    raw_df = load_log_monitor(file_path, message_codes=codes, chunk_size=chunk_size)
+
+    print("Splitting data by messageCode...")
+    return demux_frames(raw_df, codes)
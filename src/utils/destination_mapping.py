@@ -0,0 +1,140 @@
+import os
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.cache import CACHE_DIR
+from utils.data_loader import load_data
+
+# Cleaned mapping tables, one Parquet file per site, checked against the
+# Excel file's modification time
+MAPPING_CACHE_DIR = os.path.join(CACHE_DIR, "mappings")
+MAPPING_COLUMNS = ["IndexNo", "Beumer", "Amazon", "Jackpot"]
+
+
+class DestinationMapping(NamedTuple):
+    """
+    Dense lookup tables of a site's destination mapping.
+
+    Entry i of every array describes IndexNo `base + i`. IndexNo values
+    missing from the Excel file hold None (and False in `is_jackpot`), like
+    a failed dictionary lookup.
+    """
+
+    base: int
+    amazon: np.ndarray
+    beumer: np.ndarray
+    jackpot: np.ndarray
+    is_jackpot: np.ndarray
+
+
+def compile_mapping(df: pd.DataFrame) -> DestinationMapping:
+    """
+    Build the lookup arrays from a cleaned mapping table.
+
+    Args:
+        df: Mapping with IndexNo, Beumer, Amazon and Jackpot columns. When an
+            IndexNo appears more than once, the last row wins.
+
+    Returns:
+        DestinationMapping: Arrays indexed by IndexNo - base.
+
+    Raises:
+        ValueError: If an IndexNo is not an integer.
+    """
+    index_no = np.array([int(x) for x in df["IndexNo"]], dtype=np.int64)
+    if len(index_no) == 0:
+        empty = np.empty(0, dtype=object)
+        return DestinationMapping(0, empty, empty, empty, np.zeros(0, dtype=bool))
+
+    base = int(index_no.min())
+    size = int(index_no.max()) - base + 1
+    # Keep the last row of duplicated IndexNo values, like building a dict
+    last = ~pd.Series(index_no).duplicated(keep="last").to_numpy()
+    slots = index_no[last] - base
+
+    def dense(col: str) -> np.ndarray:
+        values = np.full(size, None, dtype=object)
+        values[slots] = df[col].to_numpy(dtype=object)[last]
+        return values
+
+    jackpot = dense("Jackpot")
+    is_jackpot = (
+        pd.Series(jackpot).astype(str).str.strip().str.lower().eq("jackpot").to_numpy()
+    )
+    return DestinationMapping(
+        base, dense("Amazon"), dense("Beumer"), jackpot, is_jackpot
+    )
+
+
+def mapping_positions(mapping: DestinationMapping, values: pd.Series) -> np.ndarray:
+    """
+    Return the lookup-array position of every value, -1 when unmapped.
+
+    Only numbers are looked up (as a dict keyed by int would), so strings
+    such as "123" or "Unused" stay unmapped.
+    """
+    if pd.api.types.is_integer_dtype(values.dtype):
+        # Typed columns (e.g. nullable Int32 requestedDestMCID)
+        valid = values.notna().to_numpy()
+        keys = values.to_numpy(dtype=np.int64, na_value=0)
+    else:
+        obj = values.to_numpy(dtype=object)
+        if pd.api.types.infer_dtype(obj, skipna=False) == "integer":
+            keys = obj.astype(np.int64)
+            valid = np.ones(len(obj), dtype=bool)
+        else:
+            is_number = np.array(
+                [isinstance(v, (int, float, np.number)) for v in obj], dtype=bool
+            )
+            numbers = np.where(is_number, obj, np.nan).astype(float)
+            valid = np.isfinite(numbers) & (numbers == np.floor(numbers))
+            keys = np.where(valid, numbers, 0).astype(np.int64)
+
+    positions = keys - mapping.base
+    valid &= (positions >= 0) & (positions < len(mapping.amazon))
+    return np.where(valid, positions, -1)
+
+
+def _read_mapping_excel(mapping_path: str) -> pd.DataFrame:
+    """Load the mapping Excel file and strip spaces from every cell."""
+    df = load_data(mapping_path)
+    for col in df.columns:
+        df[col] = df[col].str.strip()
+    return df
+
+
+def load_site_mapping(site: str) -> DestinationMapping:
+    """
+    Load the compiled destination mapping of a site.
+
+    The mapping file must follow the convention
+    "data/<SITE>_Destination_Mapping.xlsx". The cleaned table is cached as
+    Parquet and reused while the Excel file's modification time is
+    unchanged, so a warm run does not open the Excel file.
+
+    Raises:
+        FileNotFoundError: If the mapping file does not exist.
+        ValueError: If an IndexNo is not an integer.
+    """
+    mapping_path = f"data/{site}_Destination_Mapping.xlsx"
+    mtime = str(os.stat(mapping_path).st_mtime_ns)
+    cache_path = os.path.join(MAPPING_CACHE_DIR, f"{site}.parquet")
+
+    if os.path.exists(cache_path):
+        table = pq.read_table(cache_path)
+        if (table.schema.metadata or {}).get(b"source_mtime") == mtime.encode():
+            df = table.to_pandas()
+            return compile_mapping(df.astype(object).where(df.notna(), np.nan))
+
+    df = _read_mapping_excel(mapping_path)
+    table = pa.Table.from_pandas(
+        df[MAPPING_COLUMNS].astype(object), preserve_index=False
+    )
+    table = table.replace_schema_metadata({"source_mtime": mtime})
+    os.makedirs(MAPPING_CACHE_DIR, exist_ok=True)
+    pq.write_table(table, cache_path)
+    return compile_mapping(df)
@@ -0,0 +1,249 @@
+import os
+from typing import Iterable, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.cache import load_frame, save_frame
+from utils.demux import demux_log_monitor
+from utils.time_frame import prompt_window
+
+# Parsed events live under data/store/<SITE>/<messageCode>/<YYYYMMDD>/<HH>.parquet
+STORE_DIR = "data/store"
+PARTITION_FREQ = "h"
+
+
+def partition_root(site: str, message_code: str) -> str:
+    """Folder holding the hourly partitions of one site and messageCode."""
+    return os.path.join(STORE_DIR, site.strip().upper(), message_code)
+
+
+def partition_path(root: str, hour: pd.Timestamp) -> str:
+    """Path of the partition file holding the events of `hour`."""
+    return os.path.join(root, hour.strftime("%Y%m%d"), hour.strftime("%H.parquet"))
+
+
+def list_partitions(site: str, message_code: str) -> list[pd.Timestamp]:
+    """
+    List the hours stored for a site and messageCode, oldest first.
+
+    Only folder and file names are read, no partition is opened.
+    """
+    root = partition_root(site, message_code)
+    if not os.path.isdir(root):
+        return []
+
+    hours = []
+    for day in os.listdir(root):
+        day_dir = os.path.join(root, day)
+        if not os.path.isdir(day_dir):
+            continue
+        for name in os.listdir(day_dir):
+            if name.endswith(".parquet"):
+                hours.append(pd.to_datetime(day + name[:2], format="%Y%m%d%H"))
+    return sorted(hours)
+
+
+def concat_events(
+    frames: list[pd.DataFrame], ignore_index: bool = False
+) -> pd.DataFrame:
+    """
+    Concatenate event frames, keeping categorical columns categorical.
+
+    `pd.concat` falls back to object when the categories differ (e.g. two
+    hours seeing different locations), so those columns are re-encoded.
+    """
+    df = pd.concat(frames, ignore_index=ignore_index)
+    for col in frames[0].columns:
+        if (
+            isinstance(frames[0][col].dtype, pd.CategoricalDtype)
+            and df[col].dtype == object
+        ):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def drop_duplicate_events(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drop exact duplicate events, array columns included.
+
+    List columns (sorter arrays) cannot be hashed, so they are compared by
+    their text form.
+    """
+    as_text = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        is_list = False
+        if isinstance(dtype, pd.ArrowDtype):
+            is_list = pa.types.is_list(dtype.pyarrow_dtype)
+        elif dtype == object:
+            values = df[col].dropna()
+            is_list = len(values) > 0 and isinstance(values.iloc[0], list)
+        if is_list:
+            as_text[col] = [str(v) for v in df[col].tolist()]
+    if not as_text:
+        return df.drop_duplicates()
+    return df[~df.assign(**as_text).duplicated()]
+
+
+def write_events(df: pd.DataFrame, site: str, message_code: str) -> int:
+    """
+    Add parsed events of one messageCode to the store, one file per hour.
+
+    Events falling in an hour that is already stored are merged with it and
+    exact duplicates are dropped, so overlapping exports can be ingested.
+    Rows without a timeStamp cannot be partitioned and are skipped.
+
+    Args:
+        df: Parsed events with a datetime timeStamp (see `parse_log_messages`).
+        site: Site name, e.g. "ORF5".
+        message_code: messageCode of the events.
+
+    Returns:
+        int: Number of hourly partitions written.
+    """
+    root = partition_root(site, message_code)
+    dated = df["timeStamp"].notna()
+    if not dated.all():
+        print(f"Skipped {int((~dated).sum())} events without timeStamp")
+
+    written = 0
+    for hour, group in df[dated].groupby(
+        df.loc[dated, "timeStamp"].dt.floor(PARTITION_FREQ)
+    ):
+        path = partition_path(root, hour)
+        if os.path.exists(path):
+            group = drop_duplicate_events(concat_events([load_frame(path), group]))
+        group = group.sort_values("timeStamp", kind="stable").reset_index(drop=True)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        save_frame(group, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        written += 1
+
+    return written
+
+
+def ingest_log_monitor(
+    site: str,
+    file_path: Optional[str] = None,
+    message_codes: Optional[Iterable[str]] = None,
+) -> dict[str, int]:
+    """
+    Parse a Log Monitor export and add its events to the store.
+
+    Args:
+        site: Site name the export belongs to.
+        file_path: Optional pre-defined file path. If None, opens file dialog.
+        message_codes: Codes to store. Defaults to every registered code.
+
+    Returns:
+        dict[str, int]: Number of hourly partitions written per messageCode.
+    """
+    frames = demux_log_monitor(file_path, message_codes)
+
+    written = {}
+    for code, df in frames.items():
+        written[code] = write_events(df, site, code)
+        print(
+            f"Stored messageCode {code}: {len(df)} events in {written[code]} hourly partitions"
+        )
+    return written
+
+
+def store_time_bounds(
+    site: str, message_code: str
+) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """
+    Return the first and last stored timeStamp of a site and messageCode.
+
+    Only the timeStamp column of the oldest and newest partitions is read.
+
+    Raises:
+        ValueError: If nothing is stored for the site and messageCode.
+    """
+    hours = list_partitions(site, message_code)
+    if not hours:
+        raise ValueError(
+            f"No stored events for site {site} and messageCode {message_code}"
+        )
+
+    root = partition_root(site, message_code)
+
+    def read_times(hour: pd.Timestamp) -> pd.Series:
+        table = pq.read_table(partition_path(root, hour), columns=["timeStamp"])
+        return table.column("timeStamp").to_pandas()
+
+    return read_times(hours[0]).min(), read_times(hours[-1]).max()
+
+
+def read_window(
+    site: str, message_code: str, start: pd.Timestamp, end: pd.Timestamp
+) -> pd.DataFrame:
+    """
+    Read the stored events with start <= timeStamp <= end.
+
+    Only the hourly partitions overlapping the window are opened. When none
+    overlap, an empty frame with the stored columns is returned.
+    """
+    hours = list_partitions(site, message_code)
+    if not hours:
+        raise ValueError(
+            f"No stored events for site {site} and messageCode {message_code}"
+        )
+
+    root = partition_root(site, message_code)
+    step = pd.Timedelta(1, unit=PARTITION_FREQ)
+    overlapping = [h for h in hours if h + step > start and h <= end]
+    if not overlapping:
+        return load_frame(partition_path(root, hours[0])).iloc[0:0]
+
+    df = concat_events(
+        [load_frame(partition_path(root, h)) for h in overlapping], ignore_index=True
+    )
+    win = df[(df["timeStamp"] >= start) & (df["timeStamp"] <= end)]
+    print(f"Read {len(overlapping)} of {len(hours)} hourly partitions")
+    return win.reset_index(drop=True)
+
+
+def select_store_window_cli(
+    site: str, message_code: str, window_time: int
+) -> tuple[pd.DataFrame, pd.Timestamp, pd.Timestamp]:
+    """
+    Prompt for a time window and read it from the store.
+
+    Only the hourly partitions overlapping the window are opened, so the
+    rest of the stored data is never loaded (see `read_window`).
+
+    Args:
+        site: Site name the events were stored under.
+        message_code: messageCode of the events to read.
+        window_time: Default duration (in minutes) if no end time is given.
+
+    Returns:
+        tuple[pd.DataFrame, pd.Timestamp, pd.Timestamp]: Stored events within
+        the selected window, and the window start and end.
+    """
+    global_start_time, global_end_time = store_time_bounds(site, message_code)
+    print(f"Start Time: {global_start_time}")
+    print(f"End Time: {global_end_time}")
+    print(f"Delta Time: {global_end_time - global_start_time}\n")
+
+    start, end, status = prompt_window(global_start_time, global_end_time, window_time)
+    if status == "empty":
+        win = read_window(site, message_code, start, start - pd.Timedelta(1))
+        return win, start, end
+
+    win = read_window(site, message_code, start, end)
+    if status == "full":
+        print(
+            f"\n⚡ Using the full dataset: {global_start_time} → {global_end_time}"
+            f" | Rows: {len(win)}"
+        )
+    else:
+        actual_duration = (end - start).total_seconds() / 60
+        print(
+            f"\nWindow: {start} → {end}  ({actual_duration:.1f} min) | Rows: {len(win)}"
+        )
+    return win, start, end
@@ -0,0 +1,126 @@
+import heapq
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import CHUNK_SIZE_BYTES, iter_log_lines, timestamp_keys
+
+# Smallest block read per file, however many files are merged
+MIN_MERGE_CHUNK_BYTES = 1024 * 1024
+
+
+class _Source:
+    """Lines of one export read so far but not merged yet, in key order."""
+
+    def __init__(self, blocks: Iterator[tuple[list[bytes], int]]):
+        self.blocks = blocks
+        self.lines = np.empty(0, dtype=object)
+        self.keys = np.empty(0, dtype=bytes)
+        self.exhausted = False
+
+    def refill(self) -> int:
+        """Read the next block of the export; returns the lines it held."""
+        try:
+            kept, n_lines = next(self.blocks)
+        except StopIteration:
+            self.exhausted = True
+            return 0
+        lines = np.empty(len(kept), dtype=object)
+        lines[:] = kept
+        keys = np.concatenate([self.keys, timestamp_keys(kept)])
+        # Blocks are sorted on arrival, lines out of order in the file still
+        # end up in the stream, at most one batch late
+        order = np.argsort(keys, kind="stable")
+        self.lines = np.concatenate([self.lines, lines])[order]
+        self.keys = keys[order]
+        return n_lines
+
+    def take_before(self, bound: Optional[bytes]) -> tuple[np.ndarray, np.ndarray]:
+        """Remove and return the buffered lines (and keys) before `bound`."""
+        end = len(self.keys) if bound is None else np.searchsorted(self.keys, bound)
+        taken = self.lines[:end], self.keys[:end]
+        self.lines, self.keys = self.lines[end:], self.keys[end:]
+        return taken
+
+
+def _drop_repeated(lines: np.ndarray, source: np.ndarray) -> np.ndarray:
+    """
+    Mask of the lines to keep when overlapping exports repeat them.
+
+    A line found n times in one export and m times in another is kept
+    max(n, m) times, so lines only repeated inside one export survive.
+    """
+    df = pd.DataFrame({"line": lines, "source": source})
+    occurrence = df.groupby(["line", "source"], sort=False).cumcount()
+    return ~df.assign(source=occurrence).duplicated().to_numpy()
+
+
+def iter_merged_log_lines(
+    file_paths: list[str],
+    message_codes: Iterable[str],
+    chunk_size: int = CHUNK_SIZE_BYTES,
+    drop_duplicates: bool = True,
+) -> Iterator[tuple[list[bytes], int]]:
+    """
+    Stream several time-sliced Log Monitor exports as one, in timeStamp order.
+
+    Every export is read and filtered block by block (see `iter_log_lines`).
+    A heap keyed on the last timeStamp buffered per export tells which
+    export to read next: every buffered line older than that timeStamp is
+    already final, so it is merged and yielded. Only a block per export is
+    held at a time and nothing is sorted beyond the blocks themselves.
+    Lines with equal timeStamps keep the order of `file_paths`, then of
+    their file.
+
+    Args:
+        file_paths: Exports to merge, each in time order as Log Monitor
+            writes them.
+        message_codes: messageCode values to keep (e.g. ["54177"]).
+        chunk_size: Bytes read per block, shared by all the exports.
+        drop_duplicates: Drop the lines repeated by overlapping exports
+            (see `_drop_repeated`).
+
+    Yields:
+        tuple[list[bytes], int]: Merged lines (without their newline) and
+            the number of lines read from the files since the previous
+            batch, as `iter_log_lines` yields them.
+    """
+    block_bytes = max(chunk_size // max(len(file_paths), 1), MIN_MERGE_CHUNK_BYTES)
+    sources = [
+        _Source(iter_log_lines(path, message_codes, block_bytes)) for path in file_paths
+    ]
+
+    n_lines = 0
+    heap: list[tuple[bytes, int]] = []
+    for i, source in enumerate(sources):
+        n_lines += source.refill()
+        while not source.exhausted and not len(source.keys):
+            n_lines += source.refill()
+        if not source.exhausted:
+            heap.append((source.keys[-1], i))
+    heapq.heapify(heap)
+
+    while True:
+        # Lines older than the last one buffered for every open export are final
+        bound = heap[0][0] if heap else None
+        taken = [source.take_before(bound) for source in sources]
+        lines = np.concatenate([t[0] for t in taken])
+        if len(lines):
+            keys = np.concatenate([t[1] for t in taken])
+            origin = np.repeat(np.arange(len(sources)), [len(t[0]) for t in taken])
+            order = np.argsort(keys, kind="stable")
+            lines, origin = lines[order], origin[order]
+            if drop_duplicates and len(sources) > 1:
+                lines = lines[_drop_repeated(lines, origin)]
+        if len(lines) or n_lines:
+            yield lines.tolist(), n_lines
+            n_lines = 0
+        if not heap:
+            return
+
+        # Read on in the export that holds the bound back
+        _, i = heapq.heappop(heap)
+        n_lines += sources[i].refill()
+        if not sources[i].exhausted:
+            heapq.heappush(heap, (sources[i].keys[-1], i))
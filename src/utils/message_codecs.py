@@ -0,0 +1,256 @@
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    MEASUREMENT_MESSAGE_CODES,
+    PPH_MESSAGE_CODE,
+    S01_MESSAGE_CODE,
+    S01_OH_MESSAGE_CODE,
+    S02_MESSAGE_CODE,
+    S04_MESSAGE_CODE,
+)
+from utils.data_loader import LOG_MONITOR_COLUMNS
+from utils.message_parser import (
+    explode_list_columns,
+    parse_list_column,
+    parse_log_messages,
+)
+from utils.ragged import RaggedArray
+from utils.schema import ARROW_STRING, DtypeSpec, cast_fields
+
+# Measurement telegrams sometimes carry "key,123" instead of "key:123"
+_FIX_AFTER_COMMAS = r",\s*([A-Za-z_]\w*)\s*,\s*([-+]?\d+(?:\.\d+)?)"
+_FIX_BEFORE_COMMAS = r"^(->\{)?\s*([A-Za-z_]\w*)\s*,\s*([-+]?\d+(?:\.\d+)?)"
+
+
+def repair_measurement_pairs(messages: pd.Series) -> pd.Series:
+    """Turn the "key,123" pairs of measurement telegrams into "key:123"."""
+    return messages.str.replace(_FIX_AFTER_COMMAS, r",\1:\2", regex=True).str.replace(
+        _FIX_BEFORE_COMMAS, r"\1\2:\3", regex=True
+    )
+
+
+class MessageCodec(NamedTuple):
+    """
+    Schema of one messageCode's telegrams.
+
+    `fields` lists the message keys in telegram order; None keeps every key
+    found, for codes whose layout is not documented yet. Keys in `numeric`
+    are converted with `pd.to_numeric`, keys in `arrays` ("[1,2]" values)
+    become ragged columns (see `parse_list_column`). `dtypes` declares the
+    dtype of fields (for an array field, of one attempt once exploded).
+    `repair` fixes raw message bodies before they are parsed.
+    """
+
+    name: str
+    fields: Optional[tuple[str, ...]]
+    numeric: tuple[str, ...] = ()
+    arrays: tuple[str, ...] = ()
+    dtypes: Optional[dict[str, DtypeSpec]] = None
+    repair: Optional[Callable[[pd.Series], pd.Series]] = None
+
+
+# Sorter array fields (one element per sort attempt) and their padding values
+SORTER_ARRAY_FILLERS = {
+    "requestedDestMCID": -1,
+    "sortCode": -1,
+    "requestedDestStatus": "Unused",
+}
+SORTER_ARRAYS = tuple(SORTER_ARRAY_FILLERS)
+# Declared dtypes of sorter fields: small integer codes as fixed-width
+# nullable ints, free text as Arrow strings, repeated text as categoricals
+SORTER_DTYPES: dict[str, DtypeSpec] = {
+    "plcRecordNo": "Int32",
+    "itemID": ARROW_STRING,
+    "indexNo": "Int16",
+    "locationAWCS": "category",
+    "barcodeAWCS": ARROW_STRING,
+    "actualDestMCID": "Int32",
+    "requestedDestMCID": "Int32",
+    "sortCode": "Int16",
+}
+MEASUREMENT_FIELDS = (
+    "event",
+    "inductionNo",
+    "indexNo",
+    "length",
+    "width",
+    "positionFront",
+    "positionBack",
+    "noOfCarriers",
+    "inductDelay",
+    "carrierDelay1",
+    "carrierDelay2",
+)
+
+# messageCode -> schema of its telegrams
+CODECS: dict[str, MessageCodec] = {
+    S01_MESSAGE_CODE: MessageCodec("S01", None),
+    S01_OH_MESSAGE_CODE: MessageCodec("S01 overhead", None),
+    PPH_MESSAGE_CODE: MessageCodec(
+        "Item inducted",
+        (
+            "event",
+            "awcsAction",
+            "plcRecordNo",
+            "itemID",
+            "indexNo",
+            "awcsStateNow",
+            "awcsStateNew",
+            "inductionStatus",
+            "inductionNo",
+            "destinationNo",
+            "carrierNo",
+            "carrierCount",
+            "comHost",
+            "comMode",
+            "telegramType",
+        ),
+        dtypes={"inductionNo": "Int16"},
+    ),
+    S02_MESSAGE_CODE: MessageCodec(
+        "S02",
+        (
+            "event",
+            "machineCode",
+            "unitID",
+            "plcRecordNo",
+            "itemID",
+            "indexNo",
+            "locationAWCS",
+            "barcodeAWCS",
+            "actualDestMCID",
+            "requestedDestMCID",
+            "sortCode",
+            "requestedDestStatus",
+            "comHost",
+            "comMode",
+            "telegramType",
+        ),
+        arrays=SORTER_ARRAYS,
+        dtypes=SORTER_DTYPES,
+    ),
+    S04_MESSAGE_CODE: MessageCodec(
+        "S04",
+        (
+            "event",
+            "machineCode",
+            "unitID",
+            "plcRecordNo",
+            "itemID",
+            "indexNo",
+            "locationAWCS",
+            "barcodeAWCS",
+            "actualDestMCID",
+            "requestedDestMCID",
+            "sortCode",
+            "requestedDestStatus",
+            "comHost",
+            "comMode",
+            "telegramType",
+        ),
+        arrays=SORTER_ARRAYS,
+        dtypes=SORTER_DTYPES,
+    ),
+    **{
+        code: MessageCodec(
+            "Item measurement",
+            MEASUREMENT_FIELDS,
+            numeric=MEASUREMENT_FIELDS[1:],
+            repair=repair_measurement_pairs,
+        )
+        for code in MEASUREMENT_MESSAGE_CODES
+    },
+}
+
+
+def decode_messages(
+    df: pd.DataFrame, code: str, fields: Optional[list[str]] = None
+) -> pd.DataFrame:
+    """
+    Parse the telegrams of one messageCode with its registered schema.
+
+    Every code goes through the same steps: repair (if any), the projected
+    key/value parse of `parse_log_messages` (timeStamp included), numeric
+    conversion, declared dtypes and ragged array columns. Codes without a
+    codec keep every key as text.
+
+    Args:
+        df: Clean Log Monitor rows of a single messageCode.
+        code: messageCode of the rows.
+        fields: Optional header columns and message keys to return, in
+            output order. Defaults to the header columns (without
+            rawMessage) followed by the codec's fields.
+
+    Returns:
+        pd.DataFrame: One row per telegram, one column per field.
+    """
+    codec = CODECS.get(code, MessageCodec(code, None))
+    if fields is None and codec.fields is not None:
+        header = [col for col in LOG_MONITOR_COLUMNS if col in df.columns]
+        fields = [col for col in header if col != "rawMessage"] + list(codec.fields)
+
+    if codec.repair is not None:
+        df = df.assign(rawMessage=codec.repair(df["rawMessage"]))
+    parsed_df = parse_log_messages(df, fields)
+
+    for col in codec.numeric:
+        if col in parsed_df.columns:
+            parsed_df[col] = pd.to_numeric(parsed_df[col], errors="coerce")
+    dtypes = codec.dtypes or {}
+    cast_fields(
+        parsed_df,
+        {col: dtype for col, dtype in dtypes.items() if col not in codec.arrays},
+    )
+    for col in codec.arrays:
+        if col in parsed_df.columns:
+            ragged = parse_list_column(parsed_df[col])
+            parsed_df[col] = ragged.to_series(parsed_df.index, col)
+
+    return parsed_df
+
+
+def explode_attempts(
+    interim_df: pd.DataFrame, columns: Optional[list[str]] = None
+) -> pd.DataFrame:
+    """
+    Make one row per sort attempt from decoded S02/S04 telegrams.
+
+    Shorter arrays of a telegram are padded (-1 or "Unused") to its longest
+    one, the array fields get their `SORTER_DTYPES` dtype and rows holding
+    -1 in any array field are dropped. Only `columns` (default: all)
+    are repeated per attempt, so a narrow frame never builds the full
+    exploded one first.
+    """
+    columns = list(interim_df.columns) if columns is None else columns
+    lists = {
+        col: RaggedArray.from_series(interim_df[col]) for col in SORTER_ARRAY_FILLERS
+    }
+    extra = [col for col in SORTER_ARRAY_FILLERS if col not in columns]
+    df = explode_list_columns(interim_df[columns + extra], lists, SORTER_ARRAY_FILLERS)
+    cast_fields(
+        df, {col: SORTER_DTYPES[col] for col in SORTER_ARRAYS if col in SORTER_DTYPES}
+    )
+
+    # Drop rows that contain -1 in of the exploded columns
+    df = df[~df[list(SORTER_ARRAY_FILLERS)].isin([-1]).any(axis=1)]
+    return df[columns]
+
+
+def attempt_slots(interim_df: pd.DataFrame) -> int:
+    """
+    Length of the index `explode_attempts` lays out for these telegrams.
+
+    Every telegram takes as many rows as its longest array (at least one)
+    before padding rows are dropped, so the attempts of consecutive chunks
+    can be labelled as in a single run by offsetting each chunk's index.
+    """
+    lengths = np.column_stack(
+        [
+            RaggedArray.from_series(interim_df[col]).lengths()
+            for col in SORTER_ARRAY_FILLERS
+        ]
+    )
+    return int(np.maximum(lengths.max(axis=1, initial=0), 1).sum())
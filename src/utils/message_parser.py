@@ -0,0 +1,419 @@
+import ast
+import re
+from functools import lru_cache
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.ragged import RaggedArray
+from utils.timestamps import decode_plc_times, decode_timestamps
+
+# A value is either a flat "[...]" array or a scalar without brackets/commas.
+# Anything else (nested arrays, stray brackets, whitespace) is left to the
+# reference parser so both paths always agree.
+_VALUE_PATTERN = r"(\[[^\[\]]*\]|[^,\[\]\s]*)"
+# Same value, matched but not captured: keys outside a projection
+_SKIP_PATTERN = r"(?:\[[^\[\]]*\]|[^,\[\]\s]*)"
+_SIGNATURE_RE = re.compile(r":[^,\[]*(?:\[[^\]]*\][^,\[]*)*")
+_KEY_RE = re.compile(r"[^\s,:\[\]]+")
+# "[1,-2,30]": plain int64 decimal literals, what array fields almost always hold
+_INT_LIST_PATTERN = r"\[(?:-?(?:0|[1-9]\d{0,17})(?:,-?(?:0|[1-9]\d{0,17}))*)?\]"
+# Integers an int64 array element can hold
+_INT64_MIN, _INT64_MAX = -(2**63), 2**63 - 1
+# Rows looked at by `constant_columns` before checking a column in full
+CONSTANT_SAMPLE_ROWS = 1000
+
+
+def split_key_values(text: str) -> list[str]:
+    """Split key:value pairs by commas, ignoring commas inside [brackets]."""
+    parts: list[str] = []  # Final list of key:value strings
+    buf = ""  # Temporary buffer to collect characters
+    inside_brackets = 0  # Counter to track nesting depth of [ ]
+
+    for ch in text:
+        if ch == "[":
+            inside_brackets += 1  # Entering a bracket → increase depth
+        elif ch == "]":
+            inside_brackets -= 1  # Leaving a bracket → decrease depth
+
+        # Split only on commas that are *outside* brackets
+        if ch == "," and inside_brackets == 0:
+            parts.append(buf.strip())  # Save the current piece
+            buf = ""  # Reset buffer for next piece
+        else:
+            buf += ch  # Keep building the current piece
+
+    # Append the last piece (after the loop ends)
+    if buf:
+        parts.append(buf.strip())
+
+    return parts
+
+
+def parse_row(text: str) -> dict[str, str]:
+    """Convert a rawMessage string into a dictionary of key:value pairs."""
+    if not isinstance(text, str):
+        return {}
+
+    parsed_dict: dict[str, str] = {}  # Dictionary to hold final result
+
+    for pair in split_key_values(text):
+        if ":" in pair:  # Only process well-formed pairs
+            key, value = pair.split(":", 1)  # Split only on the first colon
+            parsed_dict[key.strip()] = value.strip()  # Clean whitespace and store
+
+    return parsed_dict
+
+
+def parse_messages_reference(messages: pd.Series) -> pd.DataFrame:
+    """
+    Reference (row-by-row) key/value parser.
+
+    Kept as the ground truth for equivalence checks against
+    `parse_messages` and as the fallback for rows the fast path rejects.
+    """
+    return messages.apply(parse_row).apply(pd.Series)
+
+
+@lru_cache(maxsize=256)
+def _compile_schema(
+    signature: str, projection: Optional[tuple[str, ...]] = None
+) -> Optional[tuple[re.Pattern, list[str]]]:
+    """
+    Compile the anchored extraction regex for one key signature.
+
+    Only the first key and the keys in `projection` (default: all) get a
+    capture group; the first one tells whether a row matched at all.
+
+    Returns None when the signature cannot be handled by the fast path
+    (empty or malformed keys, duplicated keys).
+    """
+    keys = signature.split(",")
+    if len(set(keys)) != len(keys):
+        return None
+    if not all(_KEY_RE.fullmatch(key) for key in keys):
+        return None
+
+    captured = [
+        key
+        for i, key in enumerate(keys)
+        if i == 0 or projection is None or key in projection
+    ]
+    pattern = ",".join(
+        f"{re.escape(key)}:{_VALUE_PATTERN if key in captured else _SKIP_PATTERN}"
+        for key in keys
+    )
+    return re.compile(f"^{pattern}$"), captured
+
+
+def _extract_schema(
+    values: pd.Series,
+    rows: np.ndarray,
+    signature: str,
+    projection: Optional[tuple[str, ...]] = None,
+) -> tuple[Optional[pd.DataFrame], np.ndarray]:
+    """Extract `rows` with the schema of `signature`, return unmatched rows."""
+    schema = _compile_schema(signature, projection)
+    if schema is None:
+        return None, rows
+
+    regex, keys = schema
+    block = values.iloc[rows].str.extract(regex, expand=True)
+    block.columns = keys
+    matched = block[keys[0]].notna().to_numpy()
+    if projection is not None and keys[0] not in projection:
+        block = block.drop(columns=keys[0])
+    if matched.all():
+        return block, rows[:0]
+    return block[matched], rows[~matched]
+
+
+def parse_messages(
+    messages: pd.Series, keys: Optional[list[str]] = None
+) -> pd.DataFrame:
+    """
+    Expand "key:value,..." message bodies into one column per key.
+
+    Rows are grouped by their key signature (the ordered list of keys), and
+    each signature is extracted with a single compiled regex, so the columns
+    are built directly by pandas string operations instead of a Python dict
+    per row. The signature of the first row is tried on every row first,
+    since a Log Monitor export almost always uses one schema per message
+    code. Array values such as "[1,2]" are kept intact as strings.
+
+    Produces the same frame as `parse_messages_reference`: one object column
+    per key in order of first appearance, NaN where a row lacks the key.
+
+    With a projection (`keys`), values of other keys are matched but never
+    captured, so no column is allocated for them. The result then has
+    exactly the columns in `keys`, in that order, all NaN for a key that
+    never occurs.
+
+    Args:
+        messages: rawMessage bodies with the "->{" / "}<" wrappers removed.
+        keys: Optional message keys to keep. Defaults to every key.
+
+    Returns:
+        pd.DataFrame: Parsed key/value columns, indexed like `messages`.
+    """
+    projection = None if keys is None else tuple(keys)
+    if len(messages) == 0:
+        return pd.DataFrame(index=messages.index, columns=keys, dtype=object)
+
+    values = messages.reset_index(drop=True)
+    values = values.where(values.map(lambda x: isinstance(x, str)), "")
+
+    blocks: list[pd.DataFrame] = []
+    fallback_rows: list[np.ndarray] = []
+
+    # Fast path: the dominant schema, taken from the first row
+    first_signature = _SIGNATURE_RE.sub("", values.iloc[0])
+    block, pending = _extract_schema(
+        values, np.arange(len(values)), first_signature, projection
+    )
+    if block is not None:
+        blocks.append(block)
+
+    # Remaining rows: group by signature, one extraction per schema
+    if len(pending):
+        signatures = values.iloc[pending].str.replace(_SIGNATURE_RE, "", regex=True)
+        codes, uniques = pd.factorize(signatures, sort=False)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        for code, signature in enumerate(uniques):
+            rows = pending[order[bounds[code] : bounds[code + 1]]]
+            block, unmatched = _extract_schema(values, rows, signature, projection)
+            if block is not None:
+                blocks.append(block)
+            if len(unmatched):
+                fallback_rows.append(unmatched)
+
+    if projection is not None:
+        if fallback_rows:
+            rows = np.sort(np.concatenate(fallback_rows))
+            fallback = parse_messages_reference(values.iloc[rows])
+            blocks.append(fallback[fallback.columns.intersection(keys)])
+        parsed = pd.concat(blocks, axis=0, sort=False)
+        parsed = parsed.reindex(index=values.index, columns=keys)
+        parsed.index = messages.index
+        return parsed.astype(object)
+
+    first_seen: dict[str, int] = {}
+    for block in blocks:
+        if not block.empty:
+            for col in block.columns:
+                row = int(block.index.min())
+                if col not in first_seen or row < first_seen[col]:
+                    first_seen[col] = row
+
+    if fallback_rows:
+        rows = np.sort(np.concatenate(fallback_rows))
+        fallback = parse_messages_reference(values.iloc[rows])
+        present = fallback.notna()
+        for col, row in present.idxmax()[present.any()].items():
+            if col not in first_seen or row < first_seen[col]:
+                first_seen[col] = int(row)
+        blocks.append(fallback)
+
+    # Column order follows first appearance, like DataFrame-from-dicts
+    def key_rank(col: str) -> tuple[int, int]:
+        row = first_seen[col]
+        return row, list(parse_row(values.iloc[row])).index(col)
+
+    columns = sorted(first_seen, key=key_rank)
+
+    parsed = pd.concat(blocks, axis=0, sort=False)
+    parsed = parsed.reindex(index=values.index, columns=columns)
+    parsed.index = messages.index
+    return parsed.astype(object)
+
+
+def parse_list(val) -> list:
+    """Convert a string representation of a list into an actual Python list."""
+    if isinstance(val, str) and val.startswith("[") and val.endswith("]"):
+        try:
+            return ast.literal_eval(val)  # Safely evaluate the string to a Python list
+        except (ValueError, SyntaxError):
+            return []  # Return empty list on error
+    return [val]  # Fallback: wrap non-list in a list
+
+
+def parse_list_column(values: pd.Series) -> RaggedArray:
+    """
+    Parse an array-valued message column into a ragged array.
+
+    Values like "[3001,76,159]" are split and converted to integers in one
+    pass over the whole column. Anything else (quoted strings, floats,
+    malformed arrays, scalars, NaN) goes through `parse_list`, so every row
+    gives exactly the elements `parse_list` would, e.g. [] for a malformed
+    array and [val] for a scalar.
+
+    Args:
+        values: Array-valued column such as sortCode or requestedDestMCID.
+
+    Returns:
+        RaggedArray: Offsets plus all elements in row order, as an int64
+        array when every element is an integer, else an object array.
+    """
+    obj = values.to_numpy(dtype=object)
+    is_str = np.fromiter((type(v) is str for v in obj), dtype=bool, count=len(obj))
+    text = pd.Series(np.where(is_str, obj, ""), dtype=object)
+    fast = text.str.fullmatch(_INT_LIST_PATTERN).to_numpy(dtype=bool)
+
+    # Fast rows: strip the brackets and split everything at once
+    body = text[fast].str[1:-1]
+    lengths = np.zeros(len(obj), dtype=np.int64)
+    lengths[fast] = (body.str.count(",") + 1).where(body != "", 0).to_numpy()
+
+    slow_rows = np.flatnonzero(~fast)
+    slow_lists = [parse_list(v) for v in obj[slow_rows]]
+    lengths[slow_rows] = [len(v) for v in slow_lists]
+
+    offsets = np.zeros(len(obj) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    # Slow rows holding anything but int64-sized integers need object values
+    all_ints = all(
+        type(item) is int and _INT64_MIN <= item <= _INT64_MAX
+        for items in slow_lists
+        for item in items
+    )
+    flat = np.empty(offsets[-1], dtype=np.int64 if all_ints else object)
+
+    fast_lengths = lengths[fast]
+    if fast_lengths.sum():
+        numbers = ",".join(body[body != ""]).split(",")
+        # Position of every element: its row offset plus its index in the row
+        starts = np.repeat(offsets[:-1][fast], fast_lengths)
+        first = np.repeat(np.cumsum(fast_lengths) - fast_lengths, fast_lengths)
+        within = np.arange(len(numbers)) - first
+        flat[starts + within] = np.array(numbers).astype(np.int64)
+
+    for row, items in zip(slow_rows, slow_lists):
+        for i, item in enumerate(items):
+            flat[offsets[row] + i] = item
+
+    return RaggedArray(offsets, flat)
+
+
+def explode_list_columns(
+    df: pd.DataFrame,
+    lists: dict[str, RaggedArray],
+    fillers: dict[str, object],
+) -> pd.DataFrame:
+    """
+    Explode parsed array columns together, padding shorter arrays per row.
+
+    Equivalent to padding every row's arrays to the row's longest one with
+    `fillers`, then `df.explode(columns, ignore_index=True)`: a row whose
+    arrays are all empty gives one row of NaN, and the index counts the
+    exploded rows. The layout is computed from the row lengths alone, so
+    the other columns are repeated with one `take` instead of per row.
+
+    Args:
+        df: Frame holding the array columns (their values are ignored).
+        lists: Column name -> arrays of that column, one row per row of `df`.
+        fillers: Column name -> value used to pad shorter arrays.
+
+    Returns:
+        pd.DataFrame: The exploded frame with the columns of `df`.
+    """
+    lengths = np.column_stack([ragged.lengths() for ragged in lists.values()])
+    longest = lengths.max(axis=1, initial=0)
+    out_lengths = np.maximum(longest, 1)
+    starts = np.cumsum(out_lengths) - out_lengths
+    total = int(out_lengths.sum())
+
+    exploded: dict[str, np.ndarray] = {}
+    for col, ragged in lists.items():
+        values = np.full(total, fillers[col], dtype=object)
+        values[starts[longest == 0]] = np.nan
+        # Element i of a row lands at the row's first exploded position + i
+        rows, attempts, flat = ragged.all_attempts()
+        values[starts[rows] + attempts] = flat
+        exploded[col] = values
+
+    rows = np.repeat(np.arange(len(df)), out_lengths)
+    out = df.drop(columns=list(lists)).take(rows)
+    out.index = pd.RangeIndex(total)
+    for col, values in exploded.items():
+        out[col] = values
+    return out[df.columns]
+
+
+def parse_log_messages(
+    df: pd.DataFrame, fields: Optional[list[str]] = None
+) -> pd.DataFrame:
+    """
+    Parse a Log Monitor frame into header columns plus one column per key.
+
+    Args:
+        df: Clean Log Monitor frame (see `load_log_monitor`).
+        fields: Optional projection: the header columns and message keys a
+            report needs, in output order. Other header columns are dropped
+            before any work and other keys are never extracted.
+
+    Returns:
+        pd.DataFrame: Header columns without rawMessage, with timeStamp and
+        timeStampPLC as datetime64[ms], followed by the parsed message keys
+        (or just `fields`).
+    """
+    messages = df["rawMessage"]
+    if fields is None:
+        df = df.drop(columns="rawMessage")
+        keys = None
+    else:
+        df = df[
+            [col for col in df.columns if col in fields and col != "rawMessage"]
+        ].copy()
+        keys = [col for col in fields if col not in df.columns]
+
+    # timeStamp parsing, the PLC time of day is anchored to the server date
+    if "timeStamp" in df.columns:
+        df["timeStamp"] = decode_timestamps(df["timeStamp"])
+        if "timeStampPLC" in df.columns:
+            df["timeStampPLC"] = decode_plc_times(df["timeStampPLC"], df["timeStamp"])
+
+    # Message Column parsing
+    messages = messages.str.removeprefix("->{").str.removesuffix("}<")
+    message_df = parse_messages(messages, keys)
+
+    parsed_df = pd.concat([df, message_df], axis=1)
+    return parsed_df if fields is None else parsed_df[fields]
+
+
+def constant_columns(
+    df: pd.DataFrame,
+    keep: Iterable[str] = (),
+    sample_rows: int = CONSTANT_SAMPLE_ROWS,
+) -> list[str]:
+    """
+    List the columns holding a single distinct value (`df.nunique() == 1`).
+
+    Only columns that are constant on the first `sample_rows` rows are
+    checked in full, by comparing them with their first value instead of
+    hashing every value, so varying columns cost almost nothing.
+
+    Args:
+        df: Parsed frame.
+        keep: Columns never reported, e.g. the ones a report always needs.
+        sample_rows: Rows used to rule out varying columns.
+
+    Returns:
+        list[str]: Constant columns, in frame order.
+    """
+    keep = set(keep)
+    candidates = [col for col in df.columns if col not in keep]
+    sample = df[candidates].head(sample_rows)
+    candidates = sample.columns[sample.nunique() <= 1]
+
+    constant = []
+    for col in candidates:
+        s = df[col]
+        present = s.notna().to_numpy()
+        if not present.any():
+            continue
+        value = s.iloc[int(present.argmax())]
+        if s[present].eq(value).all():
+            constant.append(col)
+    return constant
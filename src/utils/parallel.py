@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils.spill import spill_area
+
+# Column of the shared file holding each row's shard key
+_KEY_COLUMN = "__key__"
+
+
+def _pandas_type(arrow_type: pa.DataType):
+    """Read text back as Arrow strings, as the decoded frames hold it."""
+    return pd.ArrowDtype(arrow_type) if pa.types.is_string(arrow_type) else None
+
+
+def write_shared_frame(df: pd.DataFrame, keys: np.ndarray, path: str) -> None:
+    """
+    Write a frame and its shard keys as an uncompressed Arrow IPC file.
+
+    Workers memory-map the file, so the frame is written once instead of
+    being pickled to every worker.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.append_column(_KEY_COLUMN, pa.array(keys, type=pa.int64()))
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_shared_shard(path: str, lo: int, hi: int) -> pd.DataFrame:
+    """
+    Read the rows of a shared frame whose key is in [lo, hi).
+
+    Only the selected rows are copied out of the memory map. The index holds
+    the rows' positions in the original frame, in their original order.
+    """
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    keys = table.column(_KEY_COLUMN).to_numpy()
+    rows = np.flatnonzero((keys >= lo) & (keys < hi))
+    table = table.drop_columns([_KEY_COLUMN]).take(pa.array(rows))
+    df = table.to_pandas(types_mapper=_pandas_type)
+    df.index = rows
+    return df
+
+
+def shard_bounds(keys: np.ndarray, n_keys: int, n_shards: int) -> np.ndarray:
+    """
+    Split the key codes 0 .. n_keys - 1 into contiguous ranges of similar size.
+
+    Shard i holds the keys in [bounds[i], bounds[i + 1]); ranges follow the
+    number of rows per key, so shards get about the same number of rows.
+    """
+    rows_before = np.cumsum(np.bincount(keys, minlength=n_keys))
+    targets = len(keys) * np.arange(1, n_shards) / n_shards
+    inner = np.searchsorted(rows_before, targets, side="left") + 1
+    return np.concatenate([[0], np.minimum(inner, n_keys), [n_keys]])
+
+
+def _run_shard(
+    path: str, lo: int, hi: int, func: Callable[..., Any], args: tuple
+) -> Any:
+    """Worker entry point: read one shard and apply `func` to it."""
+    return func(read_shared_shard(path, lo, hi), *args)
+
+
+def map_processes(func: Callable[..., Any], shard_args: list[tuple]) -> list[Any]:
+    """
+    Call `func(*args)` for every entry of `shard_args`, one process each.
+
+    `func` must be a module-level function. Results are returned in the
+    order of `shard_args`, whatever order the processes finish in.
+    """
+    with ProcessPoolExecutor(max_workers=len(shard_args)) as pool:
+        futures = [pool.submit(func, *args) for args in shard_args]
+        return [future.result() for future in futures]
+
+
+def map_shards(
+    df: pd.DataFrame,
+    keys: np.ndarray,
+    bounds: np.ndarray,
+    func: Callable[..., Any],
+    shard_args: list[tuple],
+) -> list[Any]:
+    """
+    Apply `func` to every shard of a frame in a pool of processes.
+
+    The frame is shared through an Arrow IPC file (see `write_shared_frame`)
+    and each worker reads only its rows. `func` must be a module-level
+    function; it gets the shard's rows (see `read_shared_shard`) followed by
+    the shard's entry of `shard_args`, and should return small results
+    since they are pickled back.
+
+    Args:
+        df: Frame to split, text held as Arrow strings.
+        keys: Shard key of every row.
+        bounds: Key ranges of the shards (see `shard_bounds`).
+        func: Function run on every shard.
+        shard_args: Extra arguments of every shard.
+
+    Returns:
+        list: Results of `func`, in shard order.
+    """
+    with spill_area() as root:
+        path = os.path.join(root, "frame.arrow")
+        write_shared_frame(df, keys, path)
+        return map_processes(
+            _run_shard,
+            [
+                (path, bounds[i], bounds[i + 1], func, args)
+                for i, args in enumerate(shard_args)
+            ],
+        )
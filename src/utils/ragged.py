@@ -0,0 +1,121 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+
+class RaggedArray(NamedTuple):
+    """
+    Variable-length arrays of one column, stored as offsets + flat values.
+
+    Row i holds `values[offsets[i]:offsets[i + 1]]`, like an Arrow list
+    array. S04 array fields (one element per sort attempt) are kept in this
+    form so single attempts can be read without exploding the frame.
+    """
+
+    offsets: np.ndarray
+    values: np.ndarray
+
+    @classmethod
+    def from_lengths(cls, values: np.ndarray, lengths: np.ndarray) -> "RaggedArray":
+        """Build from the flat values and the element count of every row."""
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(offsets, values)
+
+    @classmethod
+    def from_series(cls, s: pd.Series) -> "RaggedArray":
+        """
+        Build from a column written by `to_series` (Arrow list or Python lists).
+
+        Raises:
+            TypeError: If an object column holds something else than lists.
+        """
+        if isinstance(s.dtype, pd.ArrowDtype):
+            lists = pa.array(s.array)
+            if isinstance(lists, pa.ChunkedArray):
+                # Columns joined by pd.concat hold several chunks
+                lists = lists.combine_chunks()
+            offsets = lists.offsets.to_numpy().astype(np.int64)
+            values = lists.values.slice(offsets[0], offsets[-1] - offsets[0])
+            return cls(offsets - offsets[0], values.to_numpy(zero_copy_only=False))
+
+        rows = s.to_numpy(dtype=object)
+        if not all(type(v) is list for v in rows):
+            raise TypeError(f"Column {s.name} does not hold lists")
+        lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+        values = np.empty(int(lengths.sum()), dtype=object)
+        values[:] = [x for v in rows for x in v]
+        return cls.from_lengths(values, lengths)
+
+    @classmethod
+    def concat(cls, arrays: list["RaggedArray"]) -> "RaggedArray":
+        """Stack the rows of several arrays, values as Python objects."""
+        lengths = np.concatenate([array.lengths() for array in arrays])
+        values = np.concatenate([array.values.astype(object) for array in arrays])
+        return cls.from_lengths(values, lengths)
+
+    def lengths(self) -> np.ndarray:
+        """Element count of every row."""
+        return np.diff(self.offsets)
+
+    def attempt(self, n: int, fill: object = np.nan) -> np.ndarray:
+        """
+        Element `n` of every row, `fill` where the row is too short.
+
+        Negative `n` counts from the end, so -1 is the final attempt.
+        """
+        lengths = self.lengths()
+        pos = self.offsets[:-1] + (n if n >= 0 else lengths + n)
+        found = (lengths > n) if n >= 0 else (lengths >= -n)
+
+        out = np.full(len(lengths), fill, dtype=object)
+        out[found] = self.values[pos[found]]
+        return out
+
+    def primary(self, fill: object = np.nan) -> np.ndarray:
+        """First element of every row, `fill` for empty rows."""
+        return self.attempt(0, fill)
+
+    def final(self, fill: object = np.nan) -> np.ndarray:
+        """Last element of every row, `fill` for empty rows."""
+        return self.attempt(-1, fill)
+
+    def all_attempts(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return row position, attempt number and value of every element."""
+        lengths = self.lengths()
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        attempts = np.arange(len(self.values)) - np.repeat(self.offsets[:-1], lengths)
+        return rows, attempts, self.values
+
+    def to_lists(self) -> list[list]:
+        """One Python list per row."""
+        items = self.values.tolist()
+        bounds = self.offsets.tolist()
+        return [items[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def to_series(self, index: pd.Index, name: str) -> pd.Series:
+        """
+        Store the arrays as a frame column.
+
+        Integer or string arrays become an Arrow list column, which holds the
+        offsets and values directly instead of a Python list per row. Any
+        other mix of values is kept as Python lists.
+        """
+        kind = pd.api.types.infer_dtype(self.values, skipna=False)
+        value_type = {"integer": pa.int64(), "string": pa.string(), "empty": pa.int64()}
+        if kind in value_type:
+            try:
+                values = pa.array(self.values, type=value_type[kind])
+            except (pa.ArrowInvalid, OverflowError):
+                values = None
+            if values is not None:
+                lists = pa.ListArray.from_arrays(
+                    pa.array(self.offsets, pa.int32()), values
+                )
+                return pd.Series(
+                    pd.arrays.ArrowExtensionArray(lists), index=index, name=name
+                )
+
+        return pd.Series(self.to_lists(), index=index, name=name, dtype=object)
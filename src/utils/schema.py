@@ -0,0 +1,55 @@
+from typing import Mapping, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Text columns with many distinct values (barcodes, itemIDs) are held as
+# Arrow strings: one buffer plus offsets instead of a Python str per row
+ARROW_STRING = pd.ArrowDtype(pa.string())
+
+DtypeSpec = Union[str, pd.api.extensions.ExtensionDtype]
+
+
+def cast_column(values: pd.Series, dtype: DtypeSpec) -> pd.Series:
+    """
+    Convert a decoded column to its declared dtype.
+
+    Integer dtypes are nullable ("Int16", "Int32"...): values that are not
+    integers or do not fit the width become missing instead of failing the
+    whole column.
+    """
+    dtype = pd.api.types.pandas_dtype(dtype)
+    if values.dtype == dtype:
+        return values
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in "iu":
+        numbers = pd.to_numeric(values, errors="coerce")
+        info = np.iinfo(dtype.numpy_dtype)
+        exact = (numbers % 1 == 0) & numbers.between(info.min, info.max)
+        return numbers.where(exact).astype(dtype)
+    return values.astype(dtype)
+
+
+def cast_fields(df: pd.DataFrame, dtypes: Mapping[str, DtypeSpec]) -> pd.DataFrame:
+    """Apply `cast_column` to every column of `df` listed in `dtypes`."""
+    for col, dtype in dtypes.items():
+        if col in df.columns:
+            df[col] = cast_column(df[col], dtype)
+    return df
+
+
+def map_categorical(keys: pd.Series, mapping: Mapping) -> pd.Series:
+    """
+    Categorical equivalent of `keys.map(mapping)`.
+
+    Each distinct key is looked up once and rows only get category codes.
+    Categories are the sorted mapping values, so sorting and grouping order
+    match the object column `.map` would give. Unmapped keys are missing.
+    """
+    categories = pd.Index(sorted(set(mapping.values())))
+    codes, uniques = pd.factorize(keys)
+    lookup = categories.get_indexer([mapping.get(key) for key in uniques])
+    codes = np.where(codes >= 0, lookup[codes], -1)
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories), index=keys.index, name=keys.name
+    )
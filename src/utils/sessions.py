@@ -0,0 +1,164 @@
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import load_frame, save_frame
+
+# Rows of an itemID more than this apart belong to different packages
+PACKAGE_GAP_SEC = 1800
+
+# One row per itemID: time of its last row, number of its open package and
+# the barcode flags of that package so far
+CHECKPOINT_COLUMNS = ["itemID", "last_ts", "package_no", "all_no_read", "all_multi"]
+
+
+def empty_checkpoint() -> pd.DataFrame:
+    """Checkpoint of a sessionizer that has not seen any row yet."""
+    return pd.DataFrame(
+        {
+            "itemID": pd.Series(dtype=object),
+            "last_ts": pd.Series(dtype="datetime64[ns]"),
+            "package_no": pd.Series(dtype=np.int64),
+            "all_no_read": pd.Series(dtype=bool),
+            "all_multi": pd.Series(dtype=bool),
+        }
+    )
+
+
+def load_checkpoint(path: str) -> pd.DataFrame:
+    """Read a checkpoint written by `save_checkpoint`, empty if there is none."""
+    if not os.path.exists(path):
+        return empty_checkpoint()
+    return load_frame(path)
+
+
+def save_checkpoint(checkpoint: pd.DataFrame, path: str) -> None:
+    """Write a checkpoint, replacing the previous one only once it is complete."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    save_frame(checkpoint.reset_index(drop=True), path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+def sessionize(
+    df: pd.DataFrame,
+    checkpoint: Optional[pd.DataFrame] = None,
+    threshold_sec: int = PACKAGE_GAP_SEC,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split each itemID into packages, resuming from a previous export.
+
+    Rows of an itemID more than `threshold_sec` apart start a new package
+    (RealPackageID "<itemID>_<n>"). A package is "no_read" when all its
+    barcodes are "?", "multi_read" when all are "9", otherwise "normal".
+
+    After sorting by itemID and timeStamp each package is a contiguous run of
+    rows, so packages get integer keys from a cumulative sum and the barcode
+    masks are computed once and reduced per key; the string RealPackageID is
+    only built once per package for display.
+
+    With a checkpoint, an itemID already seen continues its open package (or
+    starts package n + 1 after a gap), so consecutive exports processed one
+    at a time, in time order, get the same RealPackageIDs as their
+    concatenation. The pkg_type of a continued package includes the barcodes
+    of the earlier exports; rows already returned for them are not revised.
+
+    Args:
+        df: Frame with itemID, timeStamp and barcodeAWCS columns.
+        checkpoint: State returned for the previous export, None to start
+            from scratch.
+        threshold_sec: Gap that starts a new package.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: Copy of `df` sorted by itemID and
+        timeStamp with RealPackageID and pkg_type columns, and the
+        checkpoint to pass with the next export.
+    """
+    if checkpoint is None:
+        checkpoint = empty_checkpoint()
+
+    df = df.copy()
+    df["timeStamp"] = pd.to_datetime(df["timeStamp"])
+
+    # Sort and compute package boundaries. Rows already in time order (e.g.
+    # merged exports) only need a stable sort on the itemID codes
+    if df["timeStamp"].is_monotonic_increasing:
+        codes, items = pd.factorize(df["itemID"], sort=True)
+        codes[codes < 0] = len(items)  # missing itemIDs last, as in sort_values
+        df = df.take(np.argsort(codes, kind="stable"))
+    else:
+        df = df.sort_values(["itemID", "timeStamp"])
+    # Missing itemIDs never equal each other, as in an object column
+    item = df["itemID"].to_numpy(dtype=object, na_value=np.nan)
+    ts = df["timeStamp"].to_numpy()
+    threshold = np.timedelta64(threshold_sec, "s")
+
+    new_item = np.ones(len(df), dtype=bool)
+    new_item[1:] = item[1:] != item[:-1]
+    gap = np.zeros(len(df), dtype=bool)
+    gap[1:] = (ts[1:] - ts[:-1]) > threshold
+    gap &= ~new_item
+    new_pkg = new_item | gap
+
+    # Where each itemID picks up from the checkpoint
+    item_start = np.flatnonzero(new_item)
+    item_no = np.cumsum(new_item) - 1
+    state = checkpoint.set_index("itemID").reindex(item[item_start])
+    seen = state["package_no"].notna().to_numpy()
+    after_gap = (ts[item_start] - state["last_ts"].to_numpy()) > threshold
+    resumes = seen & ~after_gap
+    first_no = np.where(
+        seen, state["package_no"].fillna(0).to_numpy(dtype=np.int64) + after_gap, 0
+    )
+
+    # Integer package keys and the per-item package number used in the label
+    pkg_key = np.cumsum(new_pkg) - 1
+    gaps_seen = np.cumsum(gap)
+    group_idx = first_no[item_no] + gaps_seen - gaps_seen[item_start][item_no]
+
+    # Real package ID, one label per package
+    pkg_start = np.flatnonzero(new_pkg)
+    labels = (
+        pd.Series(item[pkg_start]).astype(str) + "_" + group_idx[pkg_start].astype(str)
+    )
+    df["RealPackageID"] = labels.to_numpy()[pkg_key]
+
+    # Classify packages, a resumed package starts from its checkpoint flags
+    barcode = df["barcodeAWCS"]
+    no_read = barcode.str.fullmatch(r"\?+", na=False).to_numpy()
+    multi_read = barcode.str.fullmatch(r"9+", na=False).to_numpy()
+    pkg_all_no_read = pd.Series(no_read).groupby(pkg_key).all().to_numpy()
+    pkg_all_multi = pd.Series(multi_read).groupby(pkg_key).all().to_numpy()
+    resumed_pkg = pkg_key[item_start[resumes]]
+    pkg_all_no_read[resumed_pkg] &= (
+        state["all_no_read"].to_numpy()[resumes].astype(bool)
+    )
+    pkg_all_multi[resumed_pkg] &= state["all_multi"].to_numpy()[resumes].astype(bool)
+
+    pkg_type = np.where(
+        pkg_all_no_read,
+        "no_read",
+        np.where(pkg_all_multi, "multi_read", "normal"),
+    ).astype(object)
+    df["pkg_type"] = pkg_type[pkg_key]
+
+    # Updated state: the last package of every itemID of this export, the
+    # itemIDs it does not contain are kept as they were
+    item_end = np.append(item_start[1:], len(df))[: len(item_start)] - 1
+    last_pkg = pkg_key[item_end]
+    latest = pd.DataFrame(
+        {
+            "itemID": item[item_start],
+            "last_ts": pd.Series(ts).groupby(item_no).max().to_numpy(),
+            "package_no": group_idx[item_end],
+            "all_no_read": pkg_all_no_read[last_pkg],
+            "all_multi": pkg_all_multi[last_pkg],
+        }
+    )
+    latest = latest[latest["itemID"].notna()]
+    kept = checkpoint[~checkpoint["itemID"].isin(latest["itemID"])]
+    checkpoint = pd.concat([kept, latest], ignore_index=True) if len(kept) else latest
+    return df, checkpoint[CHECKPOINT_COLUMNS]
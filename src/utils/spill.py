@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import CACHE_DIR, load_frame, save_frame
+from utils.event_store import concat_events
+
+# Frames too large for memory are spilled under data/cache/spill/<run>/<bucket>/
+SPILL_DIR = os.path.join(CACHE_DIR, "spill")
+
+
+@contextmanager
+def spill_area() -> Iterator[str]:
+    """Create a scratch folder for one run, removed when the run ends."""
+    os.makedirs(SPILL_DIR, exist_ok=True)
+    root = tempfile.mkdtemp(dir=SPILL_DIR)
+    try:
+        yield root
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bucket_of(keys: pd.Series, n_buckets: int) -> np.ndarray:
+    """
+    Hash bucket of every key.
+
+    The hash only depends on the key's value, so a key lands in the same
+    bucket in every chunk (and every run).
+    """
+    hashes = pd.util.hash_array(keys.to_numpy(dtype=object))
+    return (hashes % np.uint64(n_buckets)).astype(np.int64)
+
+
+def bucket_path(root: str, bucket: int) -> str:
+    """Folder holding the spilled parts of one bucket."""
+    return os.path.join(root, f"{bucket:04d}")
+
+
+def spill_frame(
+    df: pd.DataFrame, root: str, key: str, n_buckets: int, part: int
+) -> np.ndarray:
+    """
+    Write the rows of a chunk to the buckets of their hashed `key`.
+
+    Each bucket gets one Parquet file per chunk (named after `part`), so
+    `read_bucket` returns the rows in chunk order.
+
+    Returns:
+        np.ndarray: Number of rows written to every bucket.
+    """
+    buckets = bucket_of(df[key], n_buckets)
+    counts = np.bincount(buckets, minlength=n_buckets)
+    order = np.argsort(buckets, kind="stable")
+    ends = np.cumsum(counts)
+    for bucket in np.flatnonzero(counts):
+        rows = order[ends[bucket] - counts[bucket] : ends[bucket]]
+        folder = bucket_path(root, int(bucket))
+        os.makedirs(folder, exist_ok=True)
+        save_frame(df.iloc[rows], os.path.join(folder, f"{part:06d}.parquet"))
+    return counts
+
+
+def read_bucket(root: str, bucket: int) -> Optional[pd.DataFrame]:
+    """Read back the rows spilled to a bucket, None if it is empty."""
+    folder = bucket_path(root, bucket)
+    if not os.path.isdir(folder):
+        return None
+    parts = sorted(name for name in os.listdir(folder) if name.endswith(".parquet"))
+    return concat_events([load_frame(os.path.join(folder, name)) for name in parts])
+
+
+def plan_batches(rows_per_bucket: np.ndarray, max_rows: int) -> list[list[int]]:
+    """
+    Group consecutive buckets into batches of at most `max_rows` rows.
+
+    A bucket larger than `max_rows` still makes a batch of its own. Empty
+    buckets are left out.
+    """
+    batches: list[list[int]] = []
+    current: list[int] = []
+    size = 0
+    for bucket in np.flatnonzero(rows_per_bucket):
+        rows = int(rows_per_bucket[bucket])
+        if current and size + rows > max_rows:
+            batches.append(current)
+            current, size = [], 0
+        current.append(int(bucket))
+        size += rows
+    if current:
+        batches.append(current)
+    return batches
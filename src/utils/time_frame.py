@@ -1,6 +1,11 @@
 import datetime as dt
+
 import pandas as pd
 
+# df.attrs key recording whether timeStamp is sorted (see `mark_time_order`)
+TIME_SORTED_ATTR = "timeStamp_sorted"
+
+
 def retrieve_global_time_bounds(df):
     """
     Retrieve the global start and end timestamps from the dataframe.
@@ -62,28 +67,28 @@ def parse_datetime_or_time(s, default_date):
         raise ValueError(f"Could not parse '{s}' as time or datetime")
 
 
-def select_window_cli(df, window_time):
+def prompt_window(global_start_time, global_end_time, window_time):
     """
-    Prompt the user to select a start and end time window for analysis.
+    Ask the user for a start and end time inside the data bounds.
 
     Parameters
     ----------
-    df : pandas.DataFrame
-        Dataset containing a 'timeStamp' column.
+    global_start_time, global_end_time : pd.Timestamp
+        First and last timestamp of the data.
     window_time : int
         Default duration (in minutes) if no end time is provided.
 
     Returns
     -------
-    win : pandas.DataFrame
-        Subset of df within the selected time window.
+    start, end : pd.Timestamp
+        Selected window boundaries (inclusive).
+    status : str
+        "full" for the entire dataset, "window" for a valid window and
+        "empty" when no data can fall inside the window.
     """
-    global_start_time, global_end_time = retrieve_global_time_bounds(df)
-
     choice = input("Type 'Full' to scan the entire dataset, or press Enter to define a time window: ").strip().lower()
     if choice == "full":
-        print(f"\n⚡ Using the full dataset: {global_start_time} → {global_end_time} | Rows: {len(df)}")
-        return df.copy(), global_start_time, global_end_time
+        return global_start_time, global_end_time, "full"
 
     # Build example inputs for the user prompt
     start_example_full = global_start_time.strftime("%Y-%m-%d %H:%M")
@@ -111,7 +116,7 @@ def select_window_cli(df, window_time):
     if start > global_end_time:
         print(f"❌ ERROR: Requested start time ({start}) is after data ends ({global_end_time})")
         print("   → No data available for this time window")
-        return df.iloc[0:0].copy(), start, start
+        return start, start, "empty"
 
     # Get end time
     e = input(
@@ -136,10 +141,84 @@ def select_window_cli(df, window_time):
     if end < start:
         print(f"❌ ERROR: End time ({end}) is before start time ({start})")
         print("   → No valid time window")
+        return start, end, "empty"
+
+    return start, end, "window"
+
+
+def mark_time_order(df):
+    """
+    Record in df.attrs whether timeStamp is sorted, for `slice_window`.
+
+    Called once when a frame is built, so selecting windows on it later does
+    not scan the whole column again. The flag describes the rows as they
+    were marked: a frame reordered afterwards must be marked again.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Dataset containing a 'timeStamp' column.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The same frame, marked.
+    """
+    df.attrs[TIME_SORTED_ATTR] = bool(df["timeStamp"].is_monotonic_increasing)
+    return df
+
+
+def slice_window(df, start, end):
+    """
+    Return the rows of df with start <= timeStamp <= end.
+
+    When timeStamp is sorted (Log Monitor exports are written in time order)
+    the bounds are found by binary search and the slice shares its columns
+    with df instead of copying them; assigning a column on the slice is safe,
+    but cells must not be edited in place without copying their column first.
+    Unsorted frames, or frames with missing timestamps, fall back to a mask.
+    Sortedness is read from the flag set by `mark_time_order` and only
+    checked here for frames that were never marked.
+    """
+    ts = df["timeStamp"]
+    is_sorted = df.attrs.get(TIME_SORTED_ATTR)
+    if is_sorted is None:
+        is_sorted = ts.is_monotonic_increasing
+    if is_sorted:
+        lo = ts.searchsorted(start, side="left")
+        hi = ts.searchsorted(end, side="right")
+        return df.iloc[lo:hi].copy(deep=False)
+
+    mask = (ts >= start) & (ts <= end)
+    return df.loc[mask].copy()
+
+
+def select_window_cli(df, window_time):
+    """
+    Prompt the user to select a start and end time window for analysis.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Dataset containing a 'timeStamp' column.
+    window_time : int
+        Default duration (in minutes) if no end time is provided.
+
+    Returns
+    -------
+    win : pandas.DataFrame
+        Subset of df within the selected time window.
+    """
+    global_start_time, global_end_time = retrieve_global_time_bounds(df)
+
+    start, end, status = prompt_window(global_start_time, global_end_time, window_time)
+    if status == "full":
+        print(f"\n⚡ Using the full dataset: {global_start_time} → {global_end_time} | Rows: {len(df)}")
+        return df.copy(deep=False), global_start_time, global_end_time
+    if status == "empty":
         return df.iloc[0:0].copy(), start, end
 
-    mask = (df["timeStamp"] >= start) & (df["timeStamp"] <= end)
-    win = df.loc[mask].copy()
+    win = slice_window(df, start, end)
     actual_duration = (end - start).total_seconds() / 60
     print(f"\nWindow: {start} → {end}  ({actual_duration:.1f} min) | Rows: {len(win)}")
     return win, start, end
@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Log Monitor server time: "yymmddHHMMSSfff" once the loader removed spaces
+TIMESTAMP_FORMAT = "%y%m%d%H%M%S%f"
+TIMESTAMP_WIDTH = 15
+# PLC time of day: "HH:MM:SS,fff", the PLC does not log its date
+PLC_TIME_WIDTH = 12
+_PLC_SEPARATORS = {2: ord(":"), 5: ord(":"), 8: ord(",")}
+
+_MS_PER_DAY = 86_400_000
+_HALF_DAY = np.timedelta64(_MS_PER_DAY // 2, "ms")
+_ONE_DAY = np.timedelta64(_MS_PER_DAY, "ms")
+
+
+def _fixed_width_bytes(
+    values: pd.Series, width: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Select the values that are exactly `width` bytes long.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Positions of the selected
+        rows, their bytes as a (rows, width) uint8 matrix read straight from
+        the Arrow string buffer, and the mask of non-missing values.
+    """
+    try:
+        text = pa.array(
+            values.to_numpy(dtype=object), type=pa.string(), from_pandas=True
+        )
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        present = values.notna().to_numpy()
+        return np.empty(0, dtype=np.int64), np.empty((0, width), np.uint8), present
+
+    fits = pc.fill_null(pc.equal(pc.binary_length(text), width), False)
+    fits = fits.to_numpy(zero_copy_only=False)
+    present = text.is_valid().to_numpy(zero_copy_only=False)
+    positions = np.flatnonzero(fits)
+    if not len(positions):
+        return positions, np.empty((0, width), dtype=np.uint8), present
+
+    # The selected values sit back to back in the data buffer
+    selected = pc.take(text, pa.array(positions))
+    _, offsets, data = selected.buffers()
+    start = int(np.frombuffer(offsets, dtype=np.int32)[selected.offset])
+    raw = np.frombuffer(
+        data, dtype=np.uint8, count=len(positions) * width, offset=start
+    )
+    return positions, raw.reshape(-1, width), present
+
+
+def _number(digits: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Integer written by the digit columns start..stop-1."""
+    weights = 10 ** np.arange(stop - start - 1, -1, -1, dtype=np.int64)
+    return digits[:, start:stop].astype(np.int64) @ weights
+
+
+def decode_timestamps(values: pd.Series) -> pd.Series:
+    """
+    Decode Log Monitor "yymmddHHMMSSfff" timestamps into datetime64[ms].
+
+    Same result as `pd.to_datetime(values, format=TIMESTAMP_FORMAT,
+    errors="coerce")`: well-formed 15-digit values are decoded from their
+    bytes with integer arithmetic, anything else (other widths, out of range
+    fields) goes through `pd.to_datetime` and malformed values are NaT.
+    """
+    out = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[ms]")
+    positions, raw, present = _fixed_width_bytes(values, TIMESTAMP_WIDTH)
+    # uint8 wraps around, so any non-digit byte ends up above 9
+    digits = raw - np.uint8(ord("0"))
+    is_digits = (digits <= 9).all(axis=1)
+
+    yy = _number(digits, 0, 2)
+    month = _number(digits, 2, 4)
+    day = _number(digits, 4, 6)
+    hour = _number(digits, 6, 8)
+    minute = _number(digits, 8, 10)
+    second = _number(digits, 10, 12)
+    millis = _number(digits, 12, 15)
+
+    # %y: 69-99 -> 19xx, 00-68 -> 20xx
+    year = yy + np.where(yy >= 69, 1900, 2000)
+    months = (year - 1970) * 12 + np.clip(month, 1, 12) - 1
+    first_day = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    next_month = (months + 1).astype("datetime64[M]").astype("datetime64[D]")
+    days_in_month = next_month.astype(np.int64) - first_day
+
+    valid = (
+        is_digits
+        & (month >= 1)
+        & (month <= 12)
+        & (day >= 1)
+        & (day <= days_in_month)
+        & (hour < 24)
+        & (minute < 60)
+        & (second < 60)
+    )
+    ms = (first_day + day - 1) * _MS_PER_DAY
+    ms += ((hour * 60 + minute) * 60 + second) * 1000 + millis
+    out[positions[valid]] = ms[valid].astype("datetime64[ms]")
+
+    # Other layouts keep the pd.to_datetime behaviour
+    rest = present.copy()
+    rest[positions[valid]] = False
+    if rest.any():
+        parsed = pd.to_datetime(
+            values[rest], format=TIMESTAMP_FORMAT, errors="coerce"
+        ).to_numpy()
+        out[rest] = parsed.astype("datetime64[ms]")
+
+    return pd.Series(out, index=values.index, name=values.name)
+
+
+def decode_plc_times(values: pd.Series, server_time: pd.Series) -> pd.Series:
+    """
+    Decode PLC "HH:MM:SS,fff" times of day into datetime64[ms].
+
+    The PLC only logs the time of day, so each value is placed on the day
+    (before, of or after the server timeStamp's date) that brings it
+    closest to the server time. Malformed values, and rows without a server
+    time, are NaT.
+
+    Args:
+        values: Raw timeStampPLC column.
+        server_time: Decoded timeStamp of the same rows.
+
+    Returns:
+        pd.Series: PLC timestamps, aligned with `values`.
+    """
+    out = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[ms]")
+    positions, raw, _ = _fixed_width_bytes(values, PLC_TIME_WIDTH)
+    digit_cols = [i for i in range(PLC_TIME_WIDTH) if i not in _PLC_SEPARATORS]
+    digits = raw[:, digit_cols] - np.uint8(ord("0"))
+    valid = (digits <= 9).all(axis=1)
+    for i, sep in _PLC_SEPARATORS.items():
+        valid &= raw[:, i] == sep
+
+    hour = _number(digits, 0, 2)
+    minute = _number(digits, 2, 4)
+    second = _number(digits, 4, 6)
+    millis = _number(digits, 6, 9)
+    valid &= (hour < 24) & (minute < 60) & (second < 60)
+    time_of_day = (((hour * 60 + minute) * 60 + second) * 1000 + millis).astype(
+        "timedelta64[ms]"
+    )
+
+    server = server_time.to_numpy(dtype="datetime64[ms]")[positions]
+    valid &= ~np.isnat(server)
+    plc = server.astype("datetime64[D]").astype("datetime64[ms]") + time_of_day
+    offset = plc - server
+    plc = np.where(offset > _HALF_DAY, plc - _ONE_DAY, plc)
+    plc = np.where(offset < -_HALF_DAY, plc + _ONE_DAY, plc)
+    out[positions[valid]] = plc[valid]
+
+    return pd.Series(out, index=values.index, name=values.name)
+
+
+def clock_skew(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summarize the PLC clock offset (timeStampPLC - timeStamp) per cabinet.
+
+    Args:
+        df: Parsed frame with decoded timeStamp and timeStampPLC columns and
+            the mainCabinetName header column.
+
+    Returns:
+        pd.DataFrame: One row per mainCabinetName with the number of
+        timestamped rows and the median, min and max offset.
+    """
+    skew = (df["timeStampPLC"] - df["timeStamp"]).rename("skew")
+    return (
+        skew.groupby(df["mainCabinetName"])
+        .agg(["count", "median", "min", "max"])
+        .reset_index()
+    )
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from config import S04_MESSAGE_CODE
+
+
+def s04_line(
+    stamp: str, record: int, item: str, dests: str, codes: str, barcode: str = "SB1"
+) -> str:
+    """One Log Monitor S04 line, as exported."""
+    return (
+        f'"{stamp}";"N";"SMC";"10.0.0.1:7200";"AWCS.Comm";"";"";'
+        f'"{stamp[7:9]}:{stamp[9:11]}:{stamp[11:13]},{stamp[14:]};MC01;'
+        f"{S04_MESSAGE_CODE};SQ {record:03d};->{{event: "
+        '"AwcsConverterReceiveS04", machineCode: "MC01", unitID: "SO4", '
+        f'plcRecordNo: {record:04d}, itemID: "{item}", indexNo: "{record:04d}", '
+        f'locationAWCS: "S01ab", barcodeAWCS: "{barcode}", actualDestMCID: 159, '
+        f"requestedDestMCID: [{dests}], sortCode: [{codes}], "
+        'requestedDestStatus: [], comHost: "AWCS", comMode: "TCP", '
+        'telegramType: "S04"}<"'
+    )
+
+
+def s04_export(n_lines: int, n_items: int = 2000, seed: int = 0) -> list[str]:
+    """
+    S04 lines of a synthetic export, in time order.
+
+    itemIDs come back every few minutes with one to three sort attempts per
+    telegram, recirculations (3000-3999), jackpot (76) and scan-defect
+    (8, 9) codes and no-read/multi-read barcodes.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-09-23 09:00")
+    offsets = np.sort(rng.integers(0, 2 * 3600 * 1000, n_lines))
+    lines = []
+    for record, offset in enumerate(offsets):
+        ts = start + pd.Timedelta(int(offset), unit="ms")
+        stamp = ts.strftime("%y%m%d %H%M%S ") + f"{ts.microsecond // 1000:03d}"
+        attempts = int(rng.integers(1, 4))
+        dests = rng.choice([76, 159, 160, 3001, 3002], attempts)
+        codes = rng.choice([0, 0, 1, 5, 7, 8, 9], attempts)
+        lines.append(
+            s04_line(
+                stamp,
+                record,
+                f"{rng.integers(n_items)}U",
+                ",".join(map(str, dests)),
+                ",".join(map(str, codes)),
+                rng.choice(["SB1", "SB2", "????", "9999"]),
+            )
+        )
+    return lines
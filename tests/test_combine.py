@@ -0,0 +1,34 @@
+import pandas as pd
+import pyarrow.parquet as pq
+
+from utils.combine import combine_logs_to_csv, combine_logs_to_parquet
+
+
+def test_parquet_mode_drops_the_same_lines_as_csv_mode(tmp_path, monkeypatch):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    header = '"timeStamp";"flag";"rawMessage"'
+    lines = [f'"250923 0600{i:02d} 000";"N";"msg {i}"' for i in range(10)]
+    # A stray quote, a quote closed inside a field and an extra field
+    bad = [
+        '"250923 060100 000";"N";"msg "broken"',
+        '"250923 060101 000";"N";"msg" x',
+        '"250923 060102 000";"N";"msg";"extra"',
+    ]
+    (log_dir / "a.log").write_text(
+        "\n".join([header, *lines[:4], *bad, *lines[4:]]) + "\n", encoding="utf-8"
+    )
+    (log_dir / "b.log").write_text("\n".join([header, *lines]) + "\n", encoding="utf-8")
+    # Several blocks per file, so the bad lines fall inside the chunked read
+    monkeypatch.setattr("utils.combine.COMBINE_CHUNK_ROWS", 3)
+
+    csv_path = tmp_path / "combined.csv"
+    combine_logs_to_csv(str(log_dir), str(csv_path))
+    parquet_path = tmp_path / "combined.parquet"
+    report = combine_logs_to_parquet(str(log_dir), str(parquet_path), workers=2)
+
+    csv_rows = len(pd.read_csv(csv_path))
+    assert csv_rows == 20
+    assert report["error"].isna().all()
+    assert report["rows"].sum() == csv_rows
+    assert pq.read_metadata(parquet_path).num_rows == csv_rows
@@ -0,0 +1,35 @@
+import pandas as pd
+from log_lines import s04_line
+
+import scan
+from config import S04_MESSAGE_CODE
+from utils import event_store
+
+SITE = "TEST"
+
+
+def test_store_window_spanning_full_partitions(tmp_path, monkeypatch):
+    # Two hours of telegrams, so the store holds two hourly partitions
+    lines = [
+        s04_line("250923 090000 100", 1, "1U", "159", "1"),
+        s04_line("250923 093000 200", 2, "2U", "159,160", "7,1"),
+        s04_line("250923 100000 300", 3, "3U", "161", "1"),
+        s04_line("250923 105959 400", 4, "1U", "159,162,163", "7,7,1"),
+    ]
+    export = tmp_path / "export.csv"
+    export.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    monkeypatch.setattr(event_store, "STORE_DIR", str(tmp_path / "store"))
+    event_store.ingest_log_monitor(SITE, str(export), [S04_MESSAGE_CODE])
+    assert len(event_store.list_partitions(SITE, S04_MESSAGE_CODE)) == 2
+
+    # "Full" takes every row of both partitions
+    monkeypatch.setattr("builtins.input", lambda *args: "full")
+    attempts, start, end, frames = scan.select_store_window(SITE)
+
+    assert len(frames["interim"]) == 4
+    assert attempts["sortCode"].tolist() == [1, 7, 1, 1, 7, 7, 1]
+    assert attempts["requestedDestMCID"].tolist() == [159, 159, 160, 161, 159, 162, 163]
+    assert (start, end) == (
+        pd.Timestamp("2025-09-23 09:00:00.100"),
+        pd.Timestamp("2025-09-23 10:59:59.400"),
+    )
@@ -0,0 +1,80 @@
+import random
+
+import pandas as pd
+import pytest
+from log_lines import s04_line
+
+from config import S04_MESSAGE_CODE
+from utils import merge
+from utils.merge import iter_merged_log_lines
+
+OTHER_CODE = "54178"
+
+
+def timed_lines(seconds, first_record=0, message_code=S04_MESSAGE_CODE):
+    """S04 lines (or lines of another messageCode) at the given seconds."""
+    start = pd.Timestamp("2025-09-23 09:00")
+    lines = []
+    for record, second in enumerate(seconds, first_record):
+        stamp = (start + pd.Timedelta(seconds=second)).strftime("%y%m%d %H%M%S 000")
+        line = s04_line(stamp, record, f"{record % 50}U", "159", "1")
+        lines.append(line.replace(f";{S04_MESSAGE_CODE};", f";{message_code};"))
+    return lines
+
+
+def write_export(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def merged(file_paths, chunk_size):
+    batches = list(iter_merged_log_lines(file_paths, [S04_MESSAGE_CODE], chunk_size))
+    lines = [line.decode() for batch, _ in batches for line in batch]
+    return lines, sum(n_lines for _, n_lines in batches)
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    # Blocks of a few lines, so every export is read in many blocks
+    monkeypatch.setattr(merge, "MIN_MERGE_CHUNK_BYTES", 1)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("chunk_size", [1500, 20_000])
+def test_overlapping_slices_merge_back_into_the_export(tmp_path, seed, chunk_size):
+    # One line per second, with lines of another messageCode in between
+    s04 = timed_lines(range(0, 600, 2))
+    other = timed_lines(range(1, 600, 2), 1000, OTHER_CODE)
+    export = [line for pair in zip(s04, other) for line in pair]
+    slices = [export[0:250], export[200:420], export[380:600], export[100:150]]
+    paths = [
+        write_export(tmp_path / f"slice{i}.csv", lines)
+        for i, lines in enumerate(slices)
+    ]
+    random.Random(seed).shuffle(paths)
+
+    lines, n_lines = merged(paths, chunk_size)
+
+    assert lines == s04
+    assert n_lines >= sum(len(lines) for lines in slices)
+
+
+def test_equal_timestamps_across_block_boundaries(tmp_path):
+    # 40 lines sharing one timeStamp in each export, read 2 or 3 lines at a time
+    first = timed_lines([0, 1] + [5] * 40 + [9], 0)
+    second = timed_lines([2] + [5] * 40 + [6, 7], 100)
+    paths = [
+        write_export(tmp_path / "first.csv", first),
+        write_export(tmp_path / "second.csv", second),
+    ]
+
+    lines, _ = merged(paths, 2000)
+
+    # Ties keep the order of the exports, then of their lines
+    assert lines == first[:2] + second[:1] + first[2:42] + second[1:41] + (
+        second[41:] + first[42:]
+    )
+    swapped, _ = merged(paths[::-1], 2000)
+    assert swapped == first[:2] + second[:1] + second[1:41] + first[2:42] + (
+        second[41:] + first[42:]
+    )
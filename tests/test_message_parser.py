@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.message_parser import (
+    constant_columns,
+    explode_list_columns,
+    parse_list,
+    parse_list_column,
+    parse_messages,
+    parse_messages_reference,
+)
+
+S04_BODY = (
+    'event: "AwcsConverterReceiveS04", machineCode: "MC01", itemID: "1327U", '
+    "actualDestMCID: 159, requestedDestMCID: [159,160], sortCode: [10,1], "
+    "requestedDestStatus: []"
+)
+
+MESSAGES = {
+    "one schema": [S04_BODY] * 3,
+    "missing keys": [
+        S04_BODY,
+        'event: "AwcsConverterReceiveS04", itemID: "2U", sortCode: [1]',
+        'itemID: "3U", machineCode: "MC02"',
+    ],
+    "nested arrays": [
+        S04_BODY,
+        "itemID: 4U, sortCode: [[1,2],[3]], requestedDestMCID: [159]",
+        "itemID: 5U, sortCode: [1,[2]]",
+    ],
+    "odd signatures": [
+        "itemID: 6U, itemID: 7U",
+        "a:1,b:2,c",
+        ":1,b:2",
+        "x:[1,2",
+        "y:1]",
+        "k: v:w, z: [a, b]",
+        "",
+        "no pairs at all",
+    ],
+    "whitespace": [
+        "  itemID :  8U  ,sortCode:[ 1 , 2 ]  ",
+        "itemID:\t9U,\tsortCode: [3]",
+        "itemID: 10 U, sortCode: []",
+    ],
+    "not strings": [S04_BODY, np.nan, None, 'itemID: "11U"'],
+}
+
+
+@pytest.mark.parametrize("rows", MESSAGES.values(), ids=MESSAGES.keys())
+def test_parse_messages_matches_reference(rows):
+    messages = pd.Series(rows, index=pd.RangeIndex(10, 10 + len(rows)), dtype=object)
+    expected = parse_messages_reference(messages)
+    pd.testing.assert_frame_equal(parse_messages(messages), expected)
+
+
+@pytest.mark.parametrize("rows", MESSAGES.values(), ids=MESSAGES.keys())
+def test_parse_messages_projection_matches_reference(rows):
+    keys = ["sortCode", "itemID", "neverThere"]
+    messages = pd.Series(rows, dtype=object)
+    expected = parse_messages_reference(messages).reindex(columns=keys)
+    pd.testing.assert_frame_equal(
+        parse_messages(messages, keys), expected.astype(object)
+    )
+
+
+LIST_VALUES = {
+    "int lists": ["[3001,76,159]", "[]", "[-1,0]", "[10]", "[9223372036854775807]"],
+    "other values": [
+        "[3001,76,159]",
+        "[1, 2]",
+        "['a', 3]",
+        "[1.5]",
+        "[1,2",
+        "[]",
+        "7",
+        "[99999999999999999999]",
+        np.nan,
+        None,
+    ],
+}
+
+
+@pytest.mark.parametrize("values", LIST_VALUES.values(), ids=LIST_VALUES.keys())
+def test_parse_list_column_matches_parse_list(values):
+    ragged = parse_list_column(pd.Series(values, dtype=object))
+    # repr, so NaN elements compare equal
+    assert repr(ragged.to_lists()) == repr([parse_list(v) for v in values])
+
+
+def test_parse_list_column_keeps_int_values_in_an_int64_array():
+    ints = parse_list_column(pd.Series(LIST_VALUES["int lists"], dtype=object))
+    others = parse_list_column(pd.Series(LIST_VALUES["other values"], dtype=object))
+    assert ints.values.dtype == np.int64
+    assert others.values.dtype == object
+
+
+def test_explode_list_columns_matches_padded_explode():
+    df = pd.DataFrame(
+        {
+            "itemID": ["1U", "2U", "3U", "4U", "5U"],
+            "sortCode": ["[1,7,0]", "[]", "[8]", "[7,0]", "[]"],
+            "location": ["['a']", "[]", "['b','c']", "[]", "['d']"],
+        },
+        index=[10, 11, 12, 13, 14],
+    )
+    fillers = {"sortCode": -1, "location": "Unused"}
+    lists = {col: parse_list_column(df[col]) for col in fillers}
+
+    padded = df.copy()
+    for i in range(len(df)):
+        rows = {col: parse_list(df[col].iloc[i]) for col in fillers}
+        longest = max(len(v) for v in rows.values())
+        for col, values in rows.items():
+            padded.at[padded.index[i], col] = values + [fillers[col]] * (
+                longest - len(values)
+            )
+    expected = padded.explode(list(fillers), ignore_index=True)
+
+    pd.testing.assert_frame_equal(explode_list_columns(df, lists, fillers), expected)
+
+
+def test_constant_columns_matches_nunique():
+    df = pd.DataFrame(
+        {
+            "flag": ["N"] * 6,
+            "itemID": ["1U", "2U", "3U", "4U", "5U", "6U"],
+            "late": ["A"] * 5 + ["B"],
+            "gaps": [np.nan, "X", np.nan, "X", "X", np.nan],
+            "empty": [np.nan] * 6,
+            "inductionNo": pd.array([3] * 6, dtype="Int16"),
+            "category": pd.Series(["S01ab"] * 6, dtype="category"),
+        }
+    )
+    expected = df.columns[df.nunique() == 1].drop("inductionNo").tolist()
+
+    assert constant_columns(df, keep=["inductionNo"], sample_rows=2) == expected
+    assert "empty" not in expected
@@ -0,0 +1,92 @@
+import re
+
+import numpy as np
+import pandas as pd
+from log_lines import s04_export
+
+import scan
+from utils import spill
+from utils.destination_mapping import compile_mapping
+from utils.spill import bucket_of, plan_batches
+
+MAPPING = compile_mapping(
+    pd.DataFrame(
+        {
+            "IndexNo": [76, 159, 160, 3001, 3002],
+            "Beumer": ["CHU076", "CHU159", "CHU160", "REC001", "REC002"],
+            "Amazon": ["S01076", "S01159", None, None, None],
+            "Jackpot": ["Jackpot", "normal", "normal", "normal", "normal"],
+        }
+    )
+)
+
+
+def test_out_of_core_metrics_match_in_memory_run(tmp_path, monkeypatch, capsys):
+    # About 3 MB of lines: several 1 MB parse blocks and many itemID buckets
+    export = tmp_path / "export.csv"
+    export.write_text("\n".join(s04_export(7000)) + "\n", encoding="utf-8")
+    memory_budget = 256 * 1024
+
+    monkeypatch.setattr(spill, "SPILL_DIR", str(tmp_path / "spill"))
+    monkeypatch.setattr(scan, "select_file", lambda *args, **kwargs: str(export))
+    monkeypatch.setattr(scan, "load_mapping", lambda: MAPPING)
+    answers = iter(["full", "no"])
+    monkeypatch.setattr("builtins.input", lambda *args: next(answers))
+    results = {}
+    monkeypatch.setattr(scan, "export_to_excel", results.update)
+    spilled = []
+    spill_scan_export = scan.spill_scan_export
+    monkeypatch.setattr(
+        scan,
+        "spill_scan_export",
+        lambda *args: spilled.append(spill_scan_export(*args)) or spilled[-1],
+    )
+
+    scan.run_out_of_core(memory_budget)
+
+    blocks = int(re.search(r"from (\d+) blocks", capsys.readouterr().out).group(1))
+    assert blocks > 1
+    rows_per_bucket = spilled[0].rows_per_bucket
+    assert (rows_per_bucket > 0).sum() > 1
+    assert len(plan_batches(rows_per_bucket, memory_budget // 400)) > 1
+
+    # In-memory run of the same export over its full time range
+    frames = scan.load_scan_frames(str(export), None, ["clean"])
+    window_df = scan.enrich_window_df(frames["clean"], MAPPING)
+    window_df = scan.add_package_info(window_df)
+    expected = scan.analysis_metrics(scan.package_summary(window_df), window_df)
+
+    assert results["S04_processed"] == len(frames["interim"])
+    for key, value in expected.items():
+        if isinstance(value, pd.DataFrame):
+            pd.testing.assert_frame_equal(results[key], value, obj=key)
+        else:
+            assert results[key] == value, key
+    pd.testing.assert_frame_equal(
+        results["scan_defects"],
+        window_df.loc[
+            window_df["sortCode"].isin([8, 9, 10]), ["indexNo", "timeStamp", "sortCode"]
+        ],
+    )
+
+
+def test_plan_batches_groups_consecutive_buckets():
+    rows_per_bucket = np.array([0, 5, 3, 0, 10, 2, 2])
+
+    assert plan_batches(rows_per_bucket, 8) == [[1, 2], [4], [5, 6]]
+    assert plan_batches(rows_per_bucket, 100) == [[1, 2, 4, 5, 6]]
+    assert plan_batches(np.zeros(4, dtype=np.int64), 8) == []
+
+
+def test_bucket_of_is_stable_across_chunks_and_dtypes():
+    items = pd.Series([f"{i}U" for i in range(500)])
+
+    buckets = bucket_of(items, 16)
+
+    assert ((buckets >= 0) & (buckets < 16)).all()
+    assert len(np.unique(buckets)) == 16
+    arrow = items.astype("string[pyarrow]")
+    np.testing.assert_array_equal(bucket_of(arrow, 16), buckets)
+    # A key gets the same bucket in any chunk, whatever its position
+    chunk = items.iloc[::-7].reset_index(drop=True)
+    np.testing.assert_array_equal(bucket_of(chunk, 16), buckets[::-7])
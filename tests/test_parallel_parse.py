@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+from log_lines import s04_export
+
+import scan
+from config import S04_MESSAGE_CODE
+from utils.data_loader import line_ranges
+
+OTHER_CODE = "54178"
+
+
+@pytest.fixture
+def export(tmp_path):
+    """
+    S04 lines around a long run of another messageCode.
+
+    One telegram carries a float requestedDestStatus, so the ranges store
+    their array columns differently.
+    """
+    lines = s04_export(300)
+    lines[40] = lines[40].replace(
+        "requestedDestStatus: []", "requestedDestStatus: [1, 0.5]"
+    )
+    other = [
+        line.replace(f";{S04_MESSAGE_CODE};", f";{OTHER_CODE};")
+        for line in s04_export(600, seed=1)
+    ]
+    path = tmp_path / "export.csv"
+    path.write_text("\n".join(lines[:150] + other + lines[150:]) + "\n")
+    return str(path)
+
+
+def serial_frames(file_path):
+    return scan.load_scan_frames(file_path, None, ["interim", "clean"])
+
+
+@pytest.mark.parametrize("n_ranges", [1, 2, 3, 7, 2000])
+def test_line_ranges_split_on_line_boundaries(tmp_path, n_ranges):
+    data = b"".join(b"x" * (n % 37) + b"\n" for n in range(500)) + b"no newline"
+    path = tmp_path / "lines.csv"
+    path.write_bytes(data)
+
+    ranges = line_ranges(str(path), n_ranges)
+
+    assert len(ranges) <= n_ranges
+    assert b"".join(data[lo:hi] for lo, hi in ranges) == data
+    for lo, hi in ranges:
+        assert lo == 0 or data[lo - 1 : lo] == b"\n"
+        assert hi == len(data) or data[hi - 1 : hi] == b"\n"
+    # Even cuts land mid-line, and are moved to the next line
+    if n_ranges > 1:
+        assert any(len(data) * i // n_ranges != lo for i, (lo, _) in enumerate(ranges))
+
+
+@pytest.mark.parametrize("workers", [2, 3, 5])
+def test_parallel_parse_matches_serial_parse(export, workers):
+    with open(export, "rb") as f:
+        data = f.read()
+    ranges = line_ranges(export, workers)
+    s04 = f";{S04_MESSAGE_CODE};".encode()
+    if workers > 2:
+        assert any(s04 not in data[lo:hi] for lo, hi in ranges)
+
+    frames = scan.parse_export_parallel(export, workers)
+
+    expected = serial_frames(export)
+    pd.testing.assert_frame_equal(frames["interim"], expected["interim"])
+    pd.testing.assert_frame_equal(frames["clean"], expected["clean"])
+
+
+@pytest.mark.parametrize("min_bytes, parallel", [(0, True), (64 * 1024 * 1024, False)])
+def test_load_scan_frames_parses_in_parallel_above_min_bytes(
+    export, monkeypatch, min_bytes, parallel
+):
+    expected = serial_frames(export)
+    monkeypatch.setattr(scan, "PARALLEL_PARSE_MIN_BYTES", min_bytes)
+    calls = []
+    parse_export_parallel = scan.parse_export_parallel
+    monkeypatch.setattr(
+        scan,
+        "parse_export_parallel",
+        lambda *args: calls.append(args) or parse_export_parallel(*args),
+    )
+
+    frames = scan.load_scan_frames(export, None, ["interim", "clean"], workers=3)
+
+    assert bool(calls) == parallel
+    pd.testing.assert_frame_equal(frames["interim"], expected["interim"])
+    pd.testing.assert_frame_equal(frames["clean"], expected["clean"])
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import scan
+from utils import spill
+from utils.parallel import shard_bounds
+
+
+def window_frame(n_rows, n_items, seed=0):
+    """Enriched window rows with the dtypes of the scan pipeline."""
+    rng = np.random.default_rng(seed)
+    items = rng.choice([f"{i}U" for i in range(n_items)], n_rows).astype(object)
+    items[rng.random(n_rows) < 0.05] = None
+    seconds = np.sort(rng.choice(np.arange(7200), n_rows))
+    sort_codes = rng.choice([0, 0, 0, 1, 5, 8, 9], n_rows)
+    dest = rng.choice([76, 159, 3001, 3002], n_rows)
+    return pd.DataFrame(
+        {
+            "timeStamp": (
+                pd.Timestamp("2025-09-23 06:00") + pd.to_timedelta(seconds, "s")
+            ).astype("datetime64[ms]"),
+            "itemID": pd.array(items, dtype="string[pyarrow]"),
+            "barcodeAWCS": pd.array(
+                rng.choice(["SB1", "SB2", "???", "9999"], n_rows),
+                dtype="string[pyarrow]",
+            ),
+            "requestedDestMCID": pd.array(dest, dtype="Int32"),
+            "sortCode": pd.array(sort_codes, dtype="Int16"),
+            "sortReason": pd.Categorical(
+                np.where(sort_codes == 0, "Success", "Destination_Full")
+            ),
+            "defectCategory": pd.Categorical(
+                np.where(sort_codes >= 8, "Scan Defect", None)
+            ),
+            "Amazon_Destination": pd.Categorical(np.where(dest < 3000, "S01091", None)),
+            "Is_Jackpot": dest == 76,
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "n_rows, n_items, workers",
+    [(400, 30, 3), (400, 30, 1), (40, 2, 5), (0, 1, 3)],
+    ids=["3 workers", "1 worker", "more workers than itemIDs", "empty"],
+)
+def test_parallel_packages_match_single_process(
+    tmp_path, monkeypatch, n_rows, n_items, workers
+):
+    monkeypatch.setattr(spill, "SPILL_DIR", str(tmp_path))
+    df = window_frame(n_rows, n_items)
+
+    out, packages = scan.add_package_info_parallel(df, workers, threshold_sec=600)
+
+    expected = scan.add_package_info(df, threshold_sec=600)
+    pd.testing.assert_frame_equal(out, expected)
+    pd.testing.assert_frame_equal(packages, scan.package_summary(expected))
+
+
+@pytest.mark.parametrize(
+    "n_keys, n_shards", [(30, 3), (30, 1), (4, 7), (0, 3)], ids=str
+)
+def test_shard_bounds_cover_every_key_once(n_keys, n_shards):
+    rng = np.random.default_rng(n_keys)
+    keys = np.sort(rng.zipf(1.5, 1000) % max(n_keys, 1))[: 1000 if n_keys else 0]
+
+    bounds = shard_bounds(keys, n_keys, n_shards)
+
+    assert len(bounds) == n_shards + 1
+    assert bounds[0] == 0 and bounds[-1] == n_keys
+    assert (np.diff(bounds) >= 0).all()
+    # Shards hold about the same rows, at most one key's rows above the share
+    rows = np.bincount(
+        np.searchsorted(bounds, keys, side="right") - 1, minlength=n_shards
+    )
+    largest_key = np.bincount(keys).max(initial=0)
+    assert rows.sum() == len(keys)
+    assert rows.max(initial=0) <= len(keys) / n_shards + largest_key
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.sessions import load_checkpoint, save_checkpoint, sessionize
+
+THRESHOLD_SEC = 60
+
+
+def scan_rows(n_rows, missing_items=0.0, seed=0):
+    """Scans of a few itemIDs over 20 minutes, with gaps longer than the threshold."""
+    rng = np.random.default_rng(seed)
+    items = rng.choice([f"{i}U" for i in range(12)], n_rows).astype(object)
+    items[rng.random(n_rows) < missing_items] = None
+    seconds = np.sort(rng.choice(np.arange(1200), n_rows))
+    return pd.DataFrame(
+        {
+            "itemID": items,
+            "timeStamp": pd.Timestamp("2025-09-23 09:00")
+            + pd.to_timedelta(seconds, "s"),
+            "barcodeAWCS": rng.choice(["SB1", "???", "999", "SB2"], n_rows),
+        },
+        index=rng.permutation(n_rows) + 1000,
+    )
+
+
+def chained_run(df, cuts, checkpoint_path, shuffle):
+    """Sessionize df as consecutive exports, cut at the given row positions."""
+    out = []
+    for lo, hi in zip([0, *cuts], [*cuts, len(df)]):
+        part = df.iloc[lo:hi]
+        if shuffle:
+            part = part.sample(frac=1, random_state=0)
+        part_df, checkpoint = sessionize(
+            part, load_checkpoint(checkpoint_path), THRESHOLD_SEC
+        )
+        save_checkpoint(checkpoint, checkpoint_path)
+        out.append(part_df)
+    return pd.concat(out), load_checkpoint(checkpoint_path)
+
+
+@pytest.mark.parametrize("shuffle", [False, True], ids=["time order", "shuffled"])
+@pytest.mark.parametrize(
+    "cuts", [[200], [90, 310], [1, 399]], ids=["2 exports", "3 exports", "edges"]
+)
+@pytest.mark.parametrize("missing_items", [0.0, 0.1], ids=["all items", "missing"])
+def test_chained_exports_match_single_run(tmp_path, cuts, shuffle, missing_items):
+    df = scan_rows(400, missing_items)
+    whole, whole_checkpoint = sessionize(df, threshold_sec=THRESHOLD_SEC)
+
+    chained, checkpoint = chained_run(
+        df, cuts, str(tmp_path / "checkpoint.parquet"), shuffle
+    )
+
+    pd.testing.assert_series_equal(
+        chained["RealPackageID"].sort_index(), whole["RealPackageID"].sort_index()
+    )
+    pd.testing.assert_frame_equal(
+        checkpoint.sort_values("itemID").reset_index(drop=True),
+        whole_checkpoint.sort_values("itemID").reset_index(drop=True),
+        check_dtype=False,
+    )
+
+
+def test_missing_itemids_are_one_package_each():
+    df = scan_rows(50, missing_items=0.5)
+
+    out, checkpoint = sessionize(df, threshold_sec=THRESHOLD_SEC)
+
+    missing = out["itemID"].isna()
+    assert (out.loc[missing, "RealPackageID"] == "nan_0").all()
+    assert checkpoint["itemID"].notna().all()
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from utils.cache import load_frame, save_frame
+from utils.time_frame import TIME_SORTED_ATTR, mark_time_order, slice_window
+
+START = pd.Timestamp("2025-09-23 06:00:01")
+END = pd.Timestamp("2025-09-23 06:00:03")
+
+
+def frame(seconds: list) -> pd.DataFrame:
+    stamps = [
+        pd.NaT
+        if s is None
+        else pd.Timestamp("2025-09-23 06:00:00") + pd.Timedelta(s, "s")
+        for s in seconds
+    ]
+    return pd.DataFrame(
+        {
+            "timeStamp": pd.Series(stamps, dtype="datetime64[ns]"),
+            "row": range(len(stamps)),
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "seconds",
+    [[0, 1, 1, 2, 3, 3, 4], [3, 0, 2, 1, 4, 1], [0, 1, None, 2, 3], []],
+    ids=["sorted", "unsorted", "missing", "empty"],
+)
+@pytest.mark.parametrize("marked", [True, False])
+def test_slice_window_matches_mask(seconds, marked):
+    df = frame(seconds)
+    if marked:
+        mark_time_order(df)
+    expected = df[(df["timeStamp"] >= START) & (df["timeStamp"] <= END)]
+    pd.testing.assert_frame_equal(slice_window(df, START, END), expected)
+
+
+def test_time_order_mark_survives_the_cache(tmp_path):
+    sorted_df = mark_time_order(frame([0, 1, 2]))
+    unsorted_df = mark_time_order(frame([2, 1, 0]))
+    assert sorted_df.attrs[TIME_SORTED_ATTR] is True
+    assert unsorted_df.attrs[TIME_SORTED_ATTR] is False
+
+    save_frame(sorted_df, str(tmp_path / "sorted.parquet"))
+    save_frame(unsorted_df, str(tmp_path / "unsorted.parquet"))
+    assert load_frame(str(tmp_path / "sorted.parquet")).attrs == sorted_df.attrs
+    assert load_frame(str(tmp_path / "unsorted.parquet")).attrs == unsorted_df.attrs
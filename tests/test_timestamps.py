@@ -0,0 +1,116 @@
+import pandas as pd
+import pytest
+
+from utils.timestamps import (
+    TIMESTAMP_FORMAT,
+    clock_skew,
+    decode_plc_times,
+    decode_timestamps,
+)
+
+STAMPS = [
+    "250923090000100",
+    "251231235959999",
+    "240229120000000",  # leap day
+    "230229120000000",  # no 29 February
+    "250931120000000",  # no 31 September
+    "250001120000000",  # month 0
+    "251301120000000",  # month 13
+    "250923240000000",  # hour 24
+    "250923096000000",  # minute 60
+    "690101000000000",  # %y 69 is 1969
+    "680101000000000",  # %y 68 is 2068
+    "25092309000010",  # too short
+    "2509230900001000",  # too long
+    "25092309000a100",
+    "",
+    None,
+]
+
+
+def expected_timestamps(values):
+    parsed = pd.to_datetime(values, format=TIMESTAMP_FORMAT, errors="coerce")
+    return parsed.astype("datetime64[ms]")
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        pd.Series(STAMPS, dtype=object),
+        pd.Series(STAMPS, dtype="string[pyarrow]"),
+        pd.Series(STAMPS, dtype=object, index=range(100, 100 + len(STAMPS))).iloc[3::2],
+        pd.Series(STAMPS, dtype="string[pyarrow]").iloc[5:],
+        pd.Series([None, None], dtype=object),
+        pd.Series([], dtype=object),
+    ],
+    ids=["object", "arrow", "sliced object", "sliced arrow", "missing", "empty"],
+)
+def test_decode_timestamps_matches_to_datetime(values):
+    got = decode_timestamps(values)
+
+    pd.testing.assert_series_equal(got, expected_timestamps(values))
+
+
+def expected_plc_times(values, server_time):
+    """Place each time of day on the day closest to the server time."""
+    out = []
+    for value, server in zip(values, server_time):
+        if value is None or len(value) != 12 or pd.isna(server):
+            out.append(pd.NaT)
+            continue
+        try:
+            time_of_day = pd.to_datetime(value, format="%H:%M:%S,%f")
+        except ValueError:
+            out.append(pd.NaT)
+            continue
+        day = server.normalize() + (time_of_day - time_of_day.normalize())
+        candidates = [day + pd.Timedelta(days=n) for n in (-1, 0, 1)]
+        out.append(min(candidates, key=lambda c: abs(c - server)))
+    return pd.Series(out, index=values.index, name=values.name).astype("datetime64[ms]")
+
+
+def test_decode_plc_times_picks_the_closest_day():
+    rows = [
+        ("09:00:00,120", "2025-09-23 09:00:00.100"),
+        ("00:00:00,100", "2025-09-23 23:59:59.900"),  # PLC already past midnight
+        ("23:59:59,950", "2025-09-24 00:00:00.050"),  # server already past midnight
+        ("23:59:59,950", "2025-12-31 23:59:59.900"),
+        ("00:00:01,000", "2025-12-31 23:59:58.000"),  # into the new year
+        ("12:00:00,000", "2025-09-23 09:00:00.000"),
+        ("24:00:00,000", "2025-09-23 09:00:00.000"),
+        ("12:00:00.000", "2025-09-23 09:00:00.000"),
+        ("9:00:00,000", "2025-09-23 09:00:00.000"),
+        ("09:00:00,120", None),
+        (None, "2025-09-23 09:00:00.000"),
+    ]
+    values = pd.Series([r[0] for r in rows], index=range(10, 10 + len(rows)))
+    server_time = pd.Series(
+        pd.to_datetime([r[1] for r in rows]), index=values.index
+    ).astype("datetime64[ms]")
+
+    got = decode_plc_times(values, server_time)
+
+    pd.testing.assert_series_equal(got, expected_plc_times(values, server_time))
+    sliced = slice(3, None)
+    pd.testing.assert_series_equal(
+        decode_plc_times(values.iloc[sliced], server_time.iloc[sliced]),
+        got.iloc[sliced],
+    )
+
+
+def test_clock_skew_per_cabinet():
+    server = pd.to_datetime(["2025-09-23 09:00:00"] * 3 + ["2025-09-23 10:00:00"])
+    df = pd.DataFrame(
+        {
+            "mainCabinetName": ["MC01", "MC01", "MC01", "MC02"],
+            "timeStamp": server,
+            "timeStampPLC": server
+            + pd.to_timedelta([1, 2, 4, -3], unit="s").to_numpy(),
+        }
+    )
+
+    skew = clock_skew(df).set_index("mainCabinetName")
+
+    assert skew.loc["MC01", "count"] == 3
+    assert skew.loc["MC01", "median"] == pd.Timedelta(seconds=2)
+    assert skew.loc["MC02", "min"] == pd.Timedelta(seconds=-3)